@@ -0,0 +1,170 @@
+# -*- coding: UTF-8 -*-
+#
+#   Benchmark the build stages and keep a history of the results.
+#
+#       python3 scripts/benchmark-build.py run --fixtures small,real --repeat 3
+#       python3 scripts/benchmark-build.py run --fixtures 5k,20k --stages masters,fontmake
+#       python3 scripts/benchmark-build.py compare --threshold 10
+#       python3 scripts/benchmark-build.py list
+#
+#   Fixtures are "real" (the sources) and synthetic fonts of "small" (200),
+#   "5k" and "20k" glyphs, see scriptsLib/benchmark.py.
+#   Every run is appended to out/benchmarks/history.json. compare takes the last
+#   two runs of the history by default, or the runs by index, and exits with 1 if
+#   a stage is more than --threshold percent slower. With less than 2 runs there
+#   is nothing to compare, and it exits with 0, as it does for runs of different
+#   design spaces. Runs on different hosts are compared with a warning.
+#
+import argparse
+import sys
+
+sys.path.insert(0, ".")
+
+from scriptsLib import DESIGN_SPACES
+from scriptsLib.benchmark import (
+    FIXTURES,
+    HISTORY_PATH,
+    STAGES,
+    appendHistory,
+    benchmarkFixture,
+    compareRuns,
+    makeRun,
+    readHistory,
+)
+
+
+def csv(choices):
+    def parse(value):
+        values = [v for v in value.split(",") if v]
+        for v in values:
+            if v not in choices:
+                raise argparse.ArgumentTypeError(
+                    "%s is not one of %s" % (v, ", ".join(choices))
+                )
+        return values
+
+    return parse
+
+
+def runCommand(args):
+    results = {}
+    for fixture in args.fixtures:
+        print("--- Benchmark %s %s" % (fixture, args.designspace))
+        results[fixture] = result = benchmarkFixture(
+            fixture, args.designspace, args.repeat, args.stages
+        )
+        for stage, times in result["stages"].items():
+            print(
+                "... %-6s %5d glyphs %-14s min %8.3fs median %8.3fs"
+                % (fixture, result["glyphs"], stage, times["min"], times["median"])
+            )
+    index = appendHistory(makeRun(results, args.designspace, args.note), args.history)
+    print("... Saved as run %d in %s" % (index, args.history))
+
+
+def listCommand(args):
+    for index, run in enumerate(readHistory(args.history)):
+        print(
+            "%4d %s %-14s %-6s %s"
+            % (
+                index,
+                run["date"],
+                run["commit"],
+                ",".join(run["fixtures"]),
+                run["note"] or "",
+            )
+        )
+
+
+def compareCommand(args):
+    history = readHistory(args.history)
+    if len(history) < 2:
+        # The first run of a fresh checkout has nothing to compare with yet.
+        print(
+            "... Nothing to compare, %s has %d of 2 runs" % (args.history, len(history))
+        )
+        return
+    base, head = history[args.base], history[args.head]
+    if base.get("designspace") != head.get("designspace"):
+        print(
+            "### Can't compare runs of %s and %s"
+            % (base.get("designspace"), head.get("designspace"))
+        )
+        return
+    print(
+        "... Compare %s (%s) with %s (%s)"
+        % (base["date"], base["commit"], head["date"], head["commit"])
+    )
+    if base["host"] != head["host"]:
+        print("### Different hosts: %s and %s" % (base["host"], head["host"]))
+    regressions = 0
+    for fixture, stage, b, h, ratio in compareRuns(base, head):
+        flag = ""
+        if ratio > 1 + args.threshold / 100:
+            flag = "### SLOWER"
+            regressions += 1
+        elif ratio < 1 - args.threshold / 100:
+            flag = "faster"
+        print(
+            "    %-6s %-14s %8.3fs --> %8.3fs %+6.1f%% %s"
+            % (fixture, stage, b, h, (ratio - 1) * 100, flag)
+        )
+    if regressions:
+        print("### %d stages are more than %g%% slower" % (regressions, args.threshold))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Bitcount build stages.")
+    parser.add_argument(
+        "--history",
+        default=HISTORY_PATH,
+        help="JSON file with the results (default %(default)s)",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmarks, add them to the history")
+    run.add_argument(
+        "--fixtures",
+        type=csv(FIXTURES),
+        default=["small", "real"],
+        help="Comma separated fixtures of %s (default small,real)" % ",".join(FIXTURES),
+    )
+    run.add_argument(
+        "--stages",
+        type=csv(STAGES),
+        default=list(STAGES),
+        help="Comma separated stages of %s (default all)" % ",".join(STAGES),
+    )
+    run.add_argument(
+        "--designspace",
+        default="Bitcount_Grid_Single4.designspace",
+        choices=list(DESIGN_SPACES),
+        help="Design space to build (default %(default)s)",
+    )
+    run.add_argument(
+        "--repeat", type=int, default=3, help="Runs of every fixture (default 3)"
+    )
+    run.add_argument("--note", help="Note to save with the results")
+    run.set_defaults(method=runCommand)
+
+    compare = commands.add_parser("compare", help="Compare two runs of the history")
+    compare.add_argument(
+        "base", type=int, nargs="?", default=-2, help="Index of the base run"
+    )
+    compare.add_argument(
+        "head", type=int, nargs="?", default=-1, help="Index of the new run"
+    )
+    compare.add_argument(
+        "--threshold",
+        type=float,
+        default=10,
+        help="Percentage of slowdown that is a regression (default %(default)s)",
+    )
+    compare.set_defaults(method=compareCommand)
+
+    history = commands.add_parser("list", help="List the runs in the history")
+    history.set_defaults(method=listCommand)
+
+    args = parser.parse_args()
+    args.method(args)
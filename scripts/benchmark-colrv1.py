@@ -0,0 +1,149 @@
+# -*- coding: UTF-8 -*-
+#
+#   Benchmark the rendering of the COLRv1 color VFs across the axes.
+#
+#       python3 scripts/benchmark-colrv1.py --save
+#       python3 scripts/benchmark-colrv1.py Bitcount_Grid_Single4.designspace --repeat 3
+#
+#   Every color VF in fonts/ttf/variable renders a few strings with blackrenderer
+#   at the default, at the minimum and maximum of each axis and with all SZP axes
+#   at maximum, see scriptsLib/colrrender.py. The milliseconds per glyph and per
+#   string are compared with the baseline in out/benchmarks/colrv1-render.json,
+#   the script exits with 1 if a string is more than --threshold percent slower.
+#   --save makes the results the new baseline.
+#
+#   Needs blackrenderer with skia-python or pycairo:
+#
+#       pip install --no-deps blackrenderer skia-python
+#
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from scriptsLib import DESIGN_SPACES, VF_PATH
+from scriptsLib.benchmark import gitCommit
+
+try:
+    from scriptsLib.colrrender import (
+        BASELINE_PATH,
+        SIZE,
+        STRINGS,
+        benchmarkFont,
+        compareResults,
+        msPerGlyph,
+        readResults,
+        surfaceClass,
+        writeResults,
+    )
+except ImportError as e:
+    print(
+        "### Needs blackrenderer, pip install --no-deps blackrenderer skia-python: %s"
+        % e
+    )
+    sys.exit(2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the rendering of the Bitcount COLRv1 fonts."
+    )
+    parser.add_argument(
+        "designspaces",
+        nargs="*",
+        default=list(DESIGN_SPACES),
+        help="Design space names of the color VFs (default all 6)",
+    )
+    parser.add_argument(
+        "--strings",
+        default=",".join(STRINGS),
+        help="Comma separated strings to render (default %(default)s)",
+    )
+    parser.add_argument(
+        "--size", type=int, default=SIZE, help="Pixels per em (default %(default)s)"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Renders of every string (default 1)"
+    )
+    parser.add_argument("--backend", help="blackrenderer backend (default skia, cairo)")
+    parser.add_argument(
+        "--baseline",
+        default=BASELINE_PATH,
+        help="JSON file with the baseline results (default %(default)s)",
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="Save the results as the new baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=20,
+        help="Percentage of slowdown that is a regression (default %(default)s)",
+    )
+    args = parser.parse_args()
+    try:
+        backend = surfaceClass(args.backend)
+    except ImportError as e:
+        print("### %s" % e)
+        sys.exit(2)
+
+    strings = [text for text in args.strings.split(",") if text]
+    results = dict(
+        date=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        commit=gitCommit(),
+        backend=backend.__name__,
+        size=args.size,
+        fonts={},
+    )
+    for dsName in args.designspaces:
+        fontName = DESIGN_SPACES[dsName].colorVfName
+        path = VF_PATH + fontName
+        if not os.path.exists(path):
+            print("### Missing %s, build it first" % path)
+            continue
+        print("--- Render %s" % fontName)
+        t = time.time()
+        results["fonts"][fontName] = locations = benchmarkFont(
+            path, strings, None, args.size, args.repeat, args.backend
+        )
+        for name, location in locations.items():
+            print(
+                "... %-24s %7.2f ms/glyph  %s"
+                % (
+                    name,
+                    msPerGlyph(location),
+                    "  ".join(
+                        "%s %.1f ms" % (text, s["ms"])
+                        for text, s in location["strings"].items()
+                    ),
+                )
+            )
+        print("... %s in %.1fs" % (fontName, time.time() - t))
+
+    base = readResults(args.baseline)
+    regressions = 0
+    if base is not None and base["size"] != args.size:
+        print("### Baseline %s is rendered at another size" % args.baseline)
+    elif base is not None:
+        print(
+            "--- Compare with the baseline of %s (%s)" % (base["date"], base["commit"])
+        )
+        for fontName, name, text, b, h, ratio in compareResults(base, results):
+            if ratio > 1 + args.threshold / 100:
+                print(
+                    "### SLOWER %s %s %s %.1f ms --> %.1f ms %+.1f%%"
+                    % (fontName, name, text, b, h, (ratio - 1) * 100)
+                )
+                regressions += 1
+        if not regressions:
+            print("... No strings more than %g%% slower" % args.threshold)
+    if args.save:
+        writeResults(results, args.baseline)
+        print("... Saved the baseline in %s" % args.baseline)
+    if regressions:
+        print(
+            "### %d strings are more than %g%% slower" % (regressions, args.threshold)
+        )
+        sys.exit(1)
@@ -0,0 +1,154 @@
+# -*- coding: UTF-8 -*-
+#
+#   Benchmark scriptsLib.render.renderText against rendering the compiled VF
+#   with HarfBuzz shaping and FreeType rasterization (as hb-view does).
+#
+#       python3 scripts/benchmark-render.py --size 48 --count 500
+#
+#   The FreeType baseline needs freetype-py and uharfbuzz, see requirements.txt.
+#   The images of both are compared, renderText only has the ligatures and the
+#   kerning of the sources and rounds the pixels to whole device pixels, see
+#   scriptsLib/render.py.
+#
+import argparse
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, ".")
+
+from scriptsLib import VF_PATH, DesignSpaceParams
+from scriptsLib.render import ASCENDER, DESCENDER, UPM, renderText
+
+LABELS = [
+    "Bitcount %d",
+    "Hamburgefonstiv %d",
+    "The quick brown fox jumps over the lazy dog %d",
+    "TYPETR %d",
+]
+
+
+def makeLabels(count):
+    return [LABELS[i % len(LABELS)] % i for i in range(count)]
+
+
+def renderFreeType(face, hbFont, text, size):
+    """Shape the text with HarfBuzz and render the glyphs with FreeType."""
+    import freetype
+    import uharfbuzz as hb
+
+    buf = hb.Buffer()
+    buf.add_str(text)
+    buf.guess_segment_properties()
+    hb.shape(hbFont, buf)
+    scale = size / UPM
+    width = sum(pos.x_advance for pos in buf.glyph_positions)
+    h = int((ASCENDER - DESCENDER) * scale) + 1
+    w = int(width * scale) + 1
+    margin = size  # Glyphs may stick out of their advance, e.g. in italic
+    image = np.zeros((h + 2 * margin, w + 2 * margin), dtype=np.uint8)
+    x = 0
+    baseline = ASCENDER * scale + margin
+    for info, pos in zip(buf.glyph_infos, buf.glyph_positions):
+        face.load_glyph(info.codepoint, freetype.FT_LOAD_RENDER)
+        glyph = face.glyph
+        bitmap = glyph.bitmap
+        if bitmap.rows and bitmap.width:
+            data = np.array(bitmap.buffer, dtype=np.uint8).reshape(
+                bitmap.rows, bitmap.pitch
+            )[:, : bitmap.width]
+            top = int(baseline - glyph.bitmap_top)
+            left = int(x * scale + glyph.bitmap_left) + margin
+            region = image[top : top + bitmap.rows, left : left + bitmap.width]
+            np.maximum(region, data[: region.shape[0], : region.shape[1]], out=region)
+        x += pos.x_advance
+    return image[margin : margin + h, margin : margin + w]
+
+
+def benchmark(name, render, labels):
+    render(labels[0])  # Warm up caches
+    t = time.perf_counter()
+    for label in labels:
+        render(label)
+    duration = time.perf_counter() - t
+    print(
+        "... %-10s %6d labels in %6.2fs, %8.1f labels/s"
+        % (name, len(labels), duration, len(labels) / duration)
+    )
+    return duration
+
+
+def compare(render, baseline, labels):
+    """Print the mean difference of the images of the labels, in their common
+    area, and the number of labels that have a different image size."""
+    differences = []
+    sizes = 0
+    for label in labels:
+        image, expected = render(label), baseline(label)
+        sizes += image.shape != expected.shape
+        h = min(image.shape[0], expected.shape[0])
+        w = min(image.shape[1], expected.shape[1])
+        differences.append(
+            np.abs(image[:h, :w].astype(np.int16) - expected[:h, :w]).mean()
+        )
+    print(
+        "... Mean difference with FreeType %.1f (max %.1f) of 255, %d of %d labels "
+        "differ in size" % (np.mean(differences), max(differences), sizes, len(labels))
+    )
+    print(
+        "    renderText only applies the ligatures and kerning of the sources, and "
+        "rounds the pixels to device pixels"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pixel grid renderer.")
+    parser.add_argument("--variant", default="Grid")
+    parser.add_argument("--stem", default="Single")
+    parser.add_argument("--size", type=int, default=48, help="Pixels per em")
+    parser.add_argument("--count", type=int, default=500, help="Number of labels")
+    parser.add_argument(
+        "--location",
+        default="wght=400",
+        help="Comma separated axis=value, e.g. wght=700,ELSH=50,slnt=-8",
+    )
+    args = parser.parse_args()
+    location = {}
+    for value in args.location.split(","):
+        if value:
+            axis, v = value.split("=")
+            location[axis] = float(v)
+    labels = makeLabels(args.count)
+
+    grid = benchmark(
+        "renderText",
+        lambda text: renderText(text, args.variant, args.stem, location, args.size),
+        labels,
+    )
+    try:
+        import freetype
+        import uharfbuzz as hb
+    except ImportError as e:
+        print("### Skip the FreeType baseline: %s" % e)
+        sys.exit(0)
+
+    vfPath = VF_PATH + DesignSpaceParams(args.variant, args.stem).vfName
+    face = freetype.Face(vfPath)
+    axes = face.get_variation_info().axes
+    face.set_var_design_coords([location.get(axis.tag, axis.default) for axis in axes])
+    face.set_pixel_sizes(0, args.size)
+    with open(vfPath, "rb") as f:
+        hbFont = hb.Font(hb.Face(f.read()))
+    hbFont.set_variations(location)
+    freeType = benchmark(
+        "FreeType",
+        lambda text: renderFreeType(face, hbFont, text, args.size),
+        labels,
+    )
+    print("... renderText is %.1fx the speed of FreeType" % (freeType / grid))
+    compare(
+        lambda text: renderText(text, args.variant, args.stem, location, args.size),
+        lambda text: renderFreeType(face, hbFont, text, args.size),
+        labels,
+    )
@@ -6,86 +6,678 @@
 #
 #   Building process
 #
+#   Each of the 6 design spaces is built as an independent job:
+#   design space file, masters, fontmake, STAT, gftools fix-family and COLRv1.
+#   With --jobs N, up to N design spaces are built in parallel processes.
 #
+#       python3 scripts/build.py --jobs 6
+#
+#   Artifacts of every stage are cached in BUILD_CACHE_PATH, keyed on the
+#   content of the stage inputs and tool versions. Unchanged stages are skipped.
+#   Use --no-cache to run everything.
+#
+#   The wall, CPU and child process time and the peak memory of every stage are
+#   shown in a table at the end, --trace writes them as Chrome trace events.
+#   BITCOUNT_PROFILE=1 in the environment profiles the Python stages, --tracemalloc
+#   lists their top allocation sites, see scriptsLib/trace.py.
+#   With --memory-budget MB, a stage that uses more memory fails the build.
+#
+#   The paint trees of the COLRv1 VF are checked against the PAINT_BUDGETS of the
+#   variant, see scriptsLib/paintgraph.py. Glyphs over budget are reported, with
+#   --strict-paint-budgets they fail the build.
+#
+#   The last stage makes the web fonts of the VF and the color VF: WOFF2 files,
+#   sliced by unicode-range, in WEB_PATH, see scriptsLib/web.py. At the end the
+#   @font-face CSS of all of them is written and their transfer sizes are shown.
+#   With --jobs 6 the 12 fonts are made in parallel. --no-web skips this.
+#
+#   --limit-axes makes reduced-axis VFs of both VFs with the fontTools instancer,
+#   in LIMITED_VF_PATH, and compares their size and speed with the full VFs. By
+#   default CRSV, ELSH and ELXP are pinned, see AXIS_LIMITS and scriptsLib/limit.py.
+#
+#       python3 scripts/build.py --limit-axes --axis-limits CRSV,ELSH,ELXP,wght=300:700
+#
+#   --prune-masters leaves the masters out of the design spaces that interpolation
+#   of the other masters predicts within --prune-tolerance font units, see
+#   scriptsLib/prune.py. At the end the size and fontmake time of the VFs are
+#   compared with the last build without pruning.
+#
+#       python3 scripts/build.py --prune-masters --prune-tolerance 4
+#
+import argparse
 import os
-import subprocess
+import shlex
 import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 sys.path.insert(0, ".")
 
-from scriptsLib import DESIGN_SPACES, MASTERS_PATH, VF_PATH
-from scriptsLib.make import addCOLRv1toVF, copyMasters, makeDesignSpaceFile
+from scriptsLib import (
+    AXIS_LIMITS,
+    BUILD_CACHE_SIZE,
+    COLOR_AXES,
+    DESIGN_SPACES,
+    DESIGNSPACE_TEMPLATE_PATH,
+    LAYER_ELEMENTS,
+    LAYER_ELEMENTS_ITALIC,
+    LIMITED_VF_PATH,
+    MASTERS_PATH,
+    MONO_AXES,
+    PRUNE_TOLERANCE,
+    UFO_PATH,
+    VARIATION_PIXELS,
+    VF_PATH,
+    WEB_PATH,
+    WEB_SLICES,
+)
+from scriptsLib.cache import Stage, StageCache, runStages
+from scriptsLib.jobs import runCommand, startJob
+from scriptsLib.make import (
+    addCOLRv1toVF,
+    buildVF,
+    copyMasters,
+    makeDesignSpaceFile,
+)
+from scriptsLib.limit import (
+    formatLimits,
+    limitedPath,
+    limitReport,
+    limitVF,
+    parseLimits,
+    reportLine,
+)
+from scriptsLib.glyphData import PIXEL_DATA
+from scriptsLib.masterData import MASTERS_DATA
+from scriptsLib.paintgraph import PaintBudgetError, checkBudgets
+from scriptsLib.prune import FULL, PRUNED, pruneMasters, pruneReport, writeStats
+from scriptsLib.web import makeWebFonts, readWebFonts, transferReport, writeCSS
+from scriptsLib.trace import (
+    MB,
+    TRACER,
+    MemoryBudgetError,
+    allocationReport,
+    profilePath,
+    summary,
+    writeChromeTrace,
+)
 
 GOOGLEFONTS = True
 
 styleSpacePath = "sources/Bitcount.stylespace"
 styleSpaceCOLRv1Path = "sources/Bitcount_COLRv1.stylespace"
 
-if not os.path.exists(VF_PATH):
-    os.makedirs(VF_PATH)
+PAINT_BUDGET_LINES = 20  # Max number of glyphs over budget in the output
+WEB_CSS_PATH = WEB_PATH + "bitcount.css"
 
-
-for dsName in [
+DS_NAMES = [
     "Bitcount_Grid_Single4.designspace",
     "Bitcount_Grid_Double4.designspace",
     "Bitcount_Mono_Single4.designspace",
     "Bitcount_Mono_Double4.designspace",
     "Bitcount_Prop_Single4.designspace",
     "Bitcount_Prop_Double4.designspace",
-]:
+]
+
 
+def buildDesignSpace(
+    dsName,
+    useCache=True,
+    dumpMasters=False,
+    masterWorkers=1,
+    dedupeGlyf=False,
+    memoryBudget=None,
+    traceMalloc=False,
+    strictPaintBudgets=False,
+    web=True,
+    axisLimits=None,
+    prunedPixels=(),
+):
+    """Build the VF and COLRv1 VF of one design space. This runs as isolated job,
+    in its own process if the build is parallel. Stages with unchanged inputs
+    are restored from the build cache instead of running again.
+    The masters are made in memory, unless dumpMasters is True, then they
+    are written into dsParams.ufoPath too, by `masterWorkers` threads.
+    If dedupeGlyf is True, identical glyphs become a reference to one of them.
+    A stage that uses more than memoryBudget bytes raises MemoryBudgetError.
+    If strictPaintBudgets is True, color glyphs over the paint budgets of the variant
+    raise PaintBudgetError, otherwise they are only reported.
+    If web is True, the web fonts of both VFs are made too.
+    If there are axisLimits, the reduced-axis VFs of both VFs are made too.
+    The masters of the pixel names in prunedPixels are left out of the design space.
+    Answer the list of TRACER events of the stages."""
     dsParams = DESIGN_SPACES[dsName]
+    md = MASTERS_DATA[dsParams.masterName]
+    startJob(dsParams)
+    job = "%s-%s" % (dsParams.variant, dsParams.stem)
+    TRACER.start(job, memoryBudget, traceMalloc)
 
     print("---", dsName)
     dsPath = os.path.join(MASTERS_PATH, dsName)
+    vfPath = VF_PATH + dsParams.vfName  # Regular VF name
+    colorPath = VF_PATH + dsParams.colorVfName  # Target color VF name
+    webPath = "%s%s-%s/" % (WEB_PATH, dsParams.variant, dsParams.stem)
 
-    # For all 6 design spaces, generate the OTF/TTF/VF
-    # Auto generate the design space file for this variant.
-    # This is fast, we can always do all of them.
-    makeDesignSpaceFile(dsPath, dsParams, googlefonts=GOOGLEFONTS)
+    def makeDesignSpace():
+        # For all 6 design spaces, generate the OTF/TTF/VF
+        # Auto generate the design space file for this variant.
+        # This is fast, we can always do all of them.
+        with TRACER.span("makeDesignSpaceFile", profile=True):
+            makeDesignSpaceFile(
+                dsPath, dsParams, googlefonts=GOOGLEFONTS, pruned=prunedPixels
+            )
 
-    print("--- Copy UFO masters")
-    # Copy the ufo/ masters to _masters/<variant>/<UFOs> for every master and apply the
-    # right file name based on location  and variant
-    copyMasters(dsParams, googlefonts=GOOGLEFONTS)
+    # The masters made by copyMasters, handed to fontmake without reading them again.
+    # This stays empty if the dumped masters are restored from the cache.
+    masters = {}
 
-    print("--- Make variable fonts")
-    vfPath = VF_PATH + dsParams.vfName  # Regular VF name
-    # Compile calibrated UFOs masters/ into vf/ variable font
-    cmd = ["fontmake", "-o", "variable", "-m", dsPath, "--output-path", vfPath]
-    print("...", " ".join(cmd))
-    subprocess.run(cmd, check=True)
+    def makeMasters():
+        print("--- Make UFO masters")
+        # Make the masters for every location from the ufo/ masters, apply the right
+        # name based on location and variant. Optionally dump them to _masters/<variant>/<UFOs>
+        with TRACER.span("copyMasters", profile=True):
+            masters.update(
+                copyMasters(
+                    dsParams,
+                    googlefonts=GOOGLEFONTS,
+                    dump=dumpMasters,
+                    workers=masterWorkers,
+                    dedupe=dedupeGlyf,
+                    pruned=prunedPixels,
+                )
+            )
+
+    def makeVF():
+        print("--- Make variable fonts")
+        # Compile calibrated UFOs masters/ into vf/ variable font
+        t = time.perf_counter()
+        with TRACER.span("buildVF", profile=True):
+            buildVF(dsPath, vfPath, masters)
+        masters.clear()  # Compiled in place, they can't be used again
+        writeStats(
+            vfPath,
+            len(PIXEL_DATA) - len(prunedPixels),
+            time.perf_counter() - t,
+            PRUNED if prunedPixels else FULL,
+        )
 
     if GOOGLEFONTS:
-        cmd = "gftools-gen-stat --src sources/stat.yaml --inplace %s" % vfPath
+        statCmd = "gftools-gen-stat --src sources/stat.yaml --inplace %s" % vfPath
+        statInputs = ["sources/stat.yaml"]
     else:
         # Add STAT table to the freshly generate VF for all 10 axes
-        cmd = "statmake --stylespace %s --designspace %s %s" % (
+        statCmd = "statmake --stylespace %s --designspace %s %s" % (
             styleSpacePath,
             dsPath,
             vfPath,
         )
-    print("... statMake VF", cmd)
-    subprocess.run(cmd, shell=True, check=True)
+        statInputs = [styleSpacePath]
 
-    if GOOGLEFONTS:
-        print("... Run Google Fonts fixes", cmd)
-        subprocess.run(
-            ["gftools", "fix-family", "--inplace", vfPath],
-            check=True,
-        )
+    def makeStat():
+        print("... statMake VF", statCmd)
+        # Without a shell in between, so the memory use of the tool is measured.
+        runCommand(shlex.split(statCmd))
 
-    print("... Add COLRv1 to", vfPath)
-    colorPath = VF_PATH + dsParams.colorVfName  # Target color VF name
-    addCOLRv1toVF(vfPath, colorPath)
+    def fixFamily():
+        print("... Run Google Fonts fixes", statCmd)
+        runCommand(["gftools", "fix-family", "--inplace", vfPath])
+
+    def makeCOLRv1():
+        print("... Add COLRv1 to", vfPath)
+        addCOLRv1toVF(vfPath, colorPath, profilePath(job, "paintcompiler"))
+        with TRACER.span("checkBudgets", profile=True):
+            overBudget = checkBudgets(colorPath, dsParams.variant)
+        for glyphName, metric, value, limit in overBudget[:PAINT_BUDGET_LINES]:
+            print(
+                "### /%s has %s %d, over the budget of %d"
+                % (glyphName, metric, value, limit)
+            )
+        if len(overBudget) > PAINT_BUDGET_LINES:
+            print("### ... and %d more" % (len(overBudget) - PAINT_BUDGET_LINES))
+        if overBudget and strictPaintBudgets:
+            raise PaintBudgetError(
+                "%d paint budgets of %s exceeded in %d glyphs"
+                % (
+                    len(overBudget),
+                    dsParams.variant,
+                    len({item[0] for item in overBudget}),
+                )
+            )
 
     if GOOGLEFONTS:
-        cmd = "gftools-gen-stat --src sources/stat-color.yaml  --inplace %s" % colorPath
+        colorStatCmd = (
+            "gftools-gen-stat --src sources/stat-color.yaml  --inplace %s" % colorPath
+        )
+        colorStatInputs = ["sources/stat-color.yaml"]
     else:
-        cmd = "statmake --stylespace %s --designspace %s %s" % (
+        colorStatCmd = "statmake --stylespace %s --designspace %s %s" % (
             styleSpaceCOLRv1Path,
             dsPath,
             colorPath,
         )
-    print("... statMake COLRv1 VF", cmd)
-    subprocess.run(cmd, shell=True, check=True)
+        colorStatInputs = [styleSpaceCOLRv1Path]
+
+    def makeColorStat():
+        print("... statMake COLRv1 VF", colorStatCmd)
+        runCommand(shlex.split(colorStatCmd))
+
+    limitedPaths = {}  # Path of the full VF --> path of the reduced-axis VF
+    if axisLimits is not None:
+        limitedPaths[vfPath] = limitedPath(dsParams, MONO_AXES, axisLimits)
+        limitedPaths[colorPath] = limitedPath(
+            dsParams, MONO_AXES + COLOR_AXES, axisLimits
+        )
+        if len(set(limitedPaths.values())) < len(limitedPaths):
+            raise ValueError(
+                "The reduced-axis VF and color VF have the same axes: %s"
+                % formatLimits(axisLimits)
+            )
+
+    def makeLimited():
+        for path, dstPath in limitedPaths.items():
+            print("... Limit axes of %s to %s" % (path, dstPath))
+            with TRACER.span("limitVF", profile=True):
+                limitVF(path, dstPath, axisLimits)
+
+    def makeWeb():
+        print("... Make web fonts in", webPath)
+        with TRACER.span("makeWebFonts", profile=True):
+            makeWebFonts([vfPath, colorPath], webPath)
+
+    masterInputs = [
+        UFO_PATH + md.ufoName,
+        UFO_PATH + md.italicName,
+        UFO_PATH + VARIATION_PIXELS,
+        UFO_PATH + LAYER_ELEMENTS,
+        UFO_PATH + LAYER_ELEMENTS_ITALIC,
+        "scriptsLib/glyphData.py",
+        "scriptsLib/masterData.py",
+        "scriptsLib/prune.py",
+        "scriptsLib/sources.py",
+        "scriptsLib/sync.py",
+    ]
+    fontmakeTools = ["ufoLib2", "fontmake", "ufo2ft", "fonttools"]
+
+    # The key of each stage includes the key of the previous one, so only the
+    # inputs that are new in a stage need to be listed.
+    stages = [
+        Stage(
+            "designspace",
+            makeDesignSpace,
+            inputs=[
+                DESIGNSPACE_TEMPLATE_PATH,
+                UFO_PATH + md.ufoName + "/features.fea",
+                "scriptsLib/__init__.py",
+                "scriptsLib/make.py",
+            ],
+            tools=["fonttools", "gftools"],
+            values=[GOOGLEFONTS, prunedPixels],
+            outputs=[dsPath],
+        ),
+    ]
+    if dumpMasters:
+        # The dumped masters are an artifact that can be cached by itself.
+        stages += [
+            Stage(
+                "masters",
+                makeMasters,
+                inputs=masterInputs,
+                tools=["ufoLib2"],
+                values=[dedupeGlyf, prunedPixels],
+                outputs=[dsParams.ufoPath],
+            ),
+            Stage(
+                "fontmake",
+                makeVF,
+                tools=fontmakeTools,
+                values=[vfPath],
+                needs=[dsPath, dsParams.ufoPath],
+                outputs=[vfPath],
+            ),
+        ]
+    else:
+        # Masters in memory only exist while compiling, so they are one stage.
+        def makeMastersAndVF():
+            makeMasters()
+            makeVF()
+
+        stages.append(
+            Stage(
+                "masters-fontmake",
+                makeMastersAndVF,
+                inputs=masterInputs,
+                tools=fontmakeTools,
+                values=[vfPath, dedupeGlyf, prunedPixels],
+                needs=[dsPath],
+                outputs=[vfPath],
+            )
+        )
+    stages.append(
+        Stage(
+            "stat",
+            makeStat,
+            inputs=statInputs,
+            tools=["gftools", "statmake"],
+            values=[statCmd],
+            needs=[vfPath, dsPath],
+            outputs=[vfPath],
+        )
+    )
+    if GOOGLEFONTS:
+        stages.append(
+            Stage(
+                "fix-family",
+                fixFamily,
+                tools=["gftools"],
+                needs=[vfPath],
+                outputs=[vfPath],
+            )
+        )
+    stages += [
+        Stage(
+            "colrv1",
+            makeCOLRv1,
+            inputs=[
+                "scriptsLib/colrv1.py",
+                "scriptsLib/components.py",
+                "scriptsLib/paintgraph.py",
+                "scriptsLib/sharing.py",
+                "scriptsLib/simplify.py",
+            ],
+            tools=["paintcompiler", "fonttools"],
+            values=[strictPaintBudgets],
+            needs=[vfPath],
+            outputs=[colorPath],
+        ),
+        Stage(
+            "colrv1-stat",
+            makeColorStat,
+            inputs=colorStatInputs,
+            tools=["gftools", "statmake"],
+            values=[colorStatCmd],
+            needs=[colorPath, dsPath],
+            outputs=[colorPath],
+        ),
+    ]
+    finalOutputs = [vfPath, colorPath]
+    if web:
+        stages.append(
+            Stage(
+                "web",
+                makeWeb,
+                inputs=["scriptsLib/web.py"],
+                tools=["fonttools", "brotli"],
+                values=[WEB_SLICES],
+                needs=[vfPath, colorPath],
+                outputs=[webPath],
+            )
+        )
+        finalOutputs.append(webPath)
+    if limitedPaths:
+        stages.append(
+            Stage(
+                "limit",
+                makeLimited,
+                inputs=["scriptsLib/limit.py"],
+                tools=["fonttools"],
+                values=[formatLimits(axisLimits)],
+                needs=list(limitedPaths),
+                outputs=list(limitedPaths.values()),
+            )
+        )
+        finalOutputs += limitedPaths.values()
+    cache = StageCache() if useCache else None
+    runStages(stages, cache, finalOutputs=finalOutputs)
+    sys.stdout.flush()
+    return TRACER.events
+
+
+def reportFailure(dsName, e):
+    print("### Build of %s failed: %s" % (dsName, e), file=sys.__stderr__)
+    if isinstance(e, (MemoryBudgetError, PaintBudgetError)):
+        return  # The message is the report, no need for a traceback
+    for line in traceback.format_exception(e):
+        sys.__stderr__.write(line)
+
+
+def build(
+    dsNames,
+    jobs=1,
+    useCache=True,
+    dumpMasters=False,
+    masterWorkers=1,
+    dedupeGlyf=False,
+    memoryBudget=None,
+    traceMalloc=False,
+    strictPaintBudgets=False,
+    web=True,
+    axisLimits=None,
+    prunedPixels=(),
+):
+    """Build the design spaces, with up to `jobs` of them in parallel.
+    Stop at the first failure. Answer (success, events), where events are the
+    TRACER events of all design spaces that were built."""
+    events = []
+    if jobs <= 1:
+        for dsName in dsNames:
+            try:
+                events += buildDesignSpace(
+                    dsName,
+                    useCache,
+                    dumpMasters,
+                    masterWorkers,
+                    dedupeGlyf,
+                    memoryBudget,
+                    traceMalloc,
+                    strictPaintBudgets,
+                    web,
+                    axisLimits,
+                    prunedPixels,
+                )
+            except Exception as e:
+                reportFailure(dsName, e)
+                return False, events
+        return True, events
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(
+                buildDesignSpace,
+                dsName,
+                useCache,
+                dumpMasters,
+                masterWorkers,
+                dedupeGlyf,
+                memoryBudget,
+                traceMalloc,
+                strictPaintBudgets,
+                web,
+                axisLimits,
+                prunedPixels,
+            ): dsName
+            for dsName in dsNames
+        }
+        success = True
+        for future in as_completed(futures):
+            if future.exception() is not None:
+                reportFailure(futures[future], future.exception())
+                # Don't start new jobs. The ones already running will finish.
+                executor.shutdown(wait=True, cancel_futures=True)
+                success = False
+                break
+    for future in futures:  # Keep the order of dsNames in the events
+        if not future.cancelled() and future.exception() is None:
+            events += future.result()
+    return success, events
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the Bitcount variable fonts.")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of design spaces to build in parallel (default 1)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Run all stages, don't use or fill the build cache",
+    )
+    parser.add_argument(
+        "--dump-masters",
+        action="store_true",
+        help="Also write the generated masters as UFOs into %s" % MASTERS_PATH,
+    )
+    parser.add_argument(
+        "--master-workers",
+        type=int,
+        default=4,
+        help="Number of threads writing the masters with --dump-masters (default %(default)s)",
+    )
+    parser.add_argument(
+        "--dedupe-glyf",
+        action="store_true",
+        help="Make glyphs with the same pixels a component reference to one of them. "
+        "Nested components don't pass Google Fonts QA.",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=BUILD_CACHE_SIZE // 1024**2,
+        help="Max size of the build cache in MB (default %(default)s)",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Write the timing of the stages as Chrome trace event JSON to PATH",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        metavar="MB",
+        help="Fail the build if a stage or one of its tools uses more memory",
+    )
+    parser.add_argument(
+        "--tracemalloc",
+        action="store_true",
+        help="Trace the Python allocations of the in-process stages (slow)",
+    )
+    parser.add_argument(
+        "--strict-paint-budgets",
+        action="store_true",
+        help="Fail the build if a color glyph is over the paint budgets of its variant",
+    )
+    parser.add_argument(
+        "--no-web",
+        action="store_true",
+        help="Don't make the WOFF2 web fonts and their CSS in %s" % WEB_PATH,
+    )
+    parser.add_argument(
+        "--limit-axes",
+        action="store_true",
+        help="Also make reduced-axis VFs in %s" % LIMITED_VF_PATH,
+    )
+    parser.add_argument(
+        "--axis-limits",
+        default=formatLimits(AXIS_LIMITS),
+        metavar="LIMITS",
+        help="Axes of the reduced-axis VFs that are pinned (CRSV or CRSV=1) or "
+        "narrowed (wght=300:700), default %(default)s",
+    )
+    parser.add_argument(
+        "--prune-masters",
+        action="store_true",
+        help="Leave out the masters that the other masters interpolate",
+    )
+    parser.add_argument(
+        "--prune-tolerance",
+        type=float,
+        default=PRUNE_TOLERANCE,
+        metavar="UNITS",
+        help="Max error in font units of a pruned master (default %(default)s)",
+    )
+    parser.add_argument(
+        "designspaces",
+        nargs="*",
+        default=DS_NAMES,
+        help="Design space names to build (default all 6)",
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(VF_PATH):
+        os.makedirs(VF_PATH)
+
+    jobs = min(args.jobs, len(args.designspaces))
+    axisLimits = parseLimits(args.axis_limits) if args.limit_axes else None
+    prunedPixels = ()
+    if args.prune_masters:
+        pruned, _ = pruneMasters(args.prune_tolerance)
+        prunedPixels = tuple(sorted(pruned))
+        print(
+            "--- Prune %d of %d masters, max error %.2f units"
+            % (len(pruned), len(PIXEL_DATA), max(pruned.values(), default=0))
+        )
+    success, events = build(
+        args.designspaces,
+        jobs=jobs,
+        useCache=not args.no_cache,
+        dumpMasters=args.dump_masters,
+        masterWorkers=args.master_workers,
+        dedupeGlyf=args.dedupe_glyf,
+        memoryBudget=args.memory_budget * MB if args.memory_budget else None,
+        traceMalloc=args.tracemalloc,
+        strictPaintBudgets=args.strict_paint_budgets,
+        web=not args.no_web,
+        axisLimits=axisLimits,
+        prunedPixels=prunedPixels,
+    )
+    print("--- Time and memory of the build stages")
+    for line in summary(events):
+        print("    " + line)
+    if success and not args.no_web:
+        webFonts = readWebFonts()
+        writeCSS(webFonts, WEB_CSS_PATH)
+        print(
+            "--- Transfer size of the web fonts, @font-face rules in %s" % WEB_CSS_PATH
+        )
+        for line in transferReport(webFonts):
+            print("    " + line)
+    if success and axisLimits is not None:
+        print("--- Reduced-axis VFs, full --> limited")
+        for dsName in args.designspaces:
+            dsParams = DESIGN_SPACES[dsName]
+            for name, axes in (
+                (dsParams.vfName, MONO_AXES),
+                (dsParams.colorVfName, MONO_AXES + COLOR_AXES),
+            ):
+                path = limitedPath(dsParams, axes, axisLimits)
+                print("... %s" % path)
+                print("    " + reportLine(limitReport(VF_PATH + name, path)))
+    if success and args.prune_masters:
+        print("--- Pruned masters, last full build --> pruned build")
+        for dsName in args.designspaces:
+            vfName = DESIGN_SPACES[dsName].vfName
+            line = pruneReport(vfName)
+            if line is None:
+                line = (
+                    "### No fontmake run of %s with and without pruning recorded, "
+                    "build it with --no-cache" % vfName
+                )
+            print("... %s" % vfName)
+            print("    " + line)
+    if args.tracemalloc:
+        print("--- Top allocation sites of the Python stages")
+        for line in allocationReport(events):
+            print(line)
+    if args.trace:
+        writeChromeTrace(args.trace, events)
+        print("... Trace of the build stages in %s" % args.trace)
+    if not args.no_cache:
+        removed = StageCache(maxSize=args.cache_size * 1024**2).evict()
+        if removed:
+            print("... Evicted %d entries from the build cache" % removed)
+    if not success:
+        sys.exit(1)
@@ -0,0 +1,77 @@
+# -*- coding: UTF-8 -*-
+#
+#   Check the complexity of the COLRv1 paint trees of the color VFs against the
+#   PAINT_BUDGETS of their variant.
+#
+#       python3 scripts/check-paints.py --verbose
+#       python3 scripts/check-paints.py Bitcount_Grid_Single4.designspace --top 10
+#
+#   For every font this shows the largest value of every metric of
+#   scriptsLib/paintgraph.py and the glyph that has it, and the glyphs over
+#   budget. The exit status is 1 if there are glyphs over budget.
+#   The build does the same check after adding the COLRv1 paints.
+#
+import argparse
+import os
+import sys
+
+from fontTools.ttLib import TTFont
+
+sys.path.insert(0, ".")
+
+from scriptsLib import DESIGN_SPACES, PAINT_BUDGETS, VF_PATH
+from scriptsLib.paintgraph import METRICS, overBudget, paintStats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the COLRv1 paint budgets.")
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=0,
+        help="Also list the glyphs with the most paint nodes",
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="List all glyphs over budget"
+    )
+    parser.add_argument(
+        "designspaces",
+        nargs="*",
+        default=list(DESIGN_SPACES),
+        help="Design space names of the color VFs (default all 6)",
+    )
+    args = parser.parse_args()
+
+    failed = False
+    for dsName in args.designspaces:
+        dsParams = DESIGN_SPACES[dsName]
+        path = VF_PATH + dsParams.colorVfName
+        if not os.path.exists(path):
+            print("### Missing %s, build it first" % path)
+            continue
+        stats = paintStats(TTFont(path))
+        budget = PAINT_BUDGETS[dsParams.variant]
+        print("--- %s, %d color glyphs" % (dsParams.colorVfName, len(stats)))
+        for metric in METRICS:
+            glyphName = max(stats, key=lambda name: getattr(stats[name], metric))
+            print(
+                "... %-14s max %8d in /%-20s budget %s"
+                % (
+                    metric,
+                    getattr(stats[glyphName], metric),
+                    glyphName,
+                    budget.get(metric, "-"),
+                )
+            )
+        for glyphName in sorted(stats, key=lambda name: -stats[name].nodes)[: args.top]:
+            print("    /%-20s %s" % (glyphName, stats[glyphName]))
+        over = overBudget(stats, budget)
+        if over:
+            failed = True
+            print(
+                "### %d glyphs over budget"
+                % len({glyphName for glyphName, _, _, _ in over})
+            )
+            for glyphName, metric, value, limit in over if args.verbose else over[:10]:
+                print("    /%s %s %d > %d" % (glyphName, metric, value, limit))
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,86 @@
+# -*- coding: UTF-8 -*-
+#
+#   Check the px components of the source UFOs for duplicates, offsets that
+#   are not on the pixel grid and pixels outside the box of the variant.
+#
+#       python3 scripts/check-pixels.py --verbose
+#       python3 scripts/check-pixels.py --fix Bitcount_Grid_Single.ufo Bitcount_Grid_Single-Italic.ufo
+#
+#   --fix rewrites the glyphs with duplicates removed and the px components in
+#   canonical order, --snap also moves the off grid pixels onto the grid.
+#   The roman and italic UFO interpolate along slnt, --fix only takes both of
+#   them, and gives them the same order.
+#   Pixels outside the box are only reported, they need a decision of the designer
+#   (marks and ligatures are outside the box by design). The exit status is 1 if
+#   there are duplicate pixels left.
+#
+import argparse
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from scriptsLib.bitmaps import BITMAPS
+from scriptsLib.pixels import normalizePair, partnerName, scanAll
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the px components of the UFOs.")
+    parser.add_argument(
+        "--fix", action="store_true", help="Remove duplicates and sort the pixels"
+    )
+    parser.add_argument(
+        "--snap", action="store_true", help="With --fix, snap pixels to the grid"
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="List the offsets with issues"
+    )
+    parser.add_argument(
+        "ufos",
+        nargs="*",
+        default=BITMAPS.ufoNames(),
+        help="Source UFO names (default all 12 roman and italic UFOs)",
+    )
+    args = parser.parse_args()
+    if args.fix:
+        for ufoName in args.ufos:
+            if partnerName(ufoName) not in args.ufos:
+                print(
+                    "### --fix needs %s together with %s, they interpolate along slnt"
+                    % (partnerName(ufoName), ufoName)
+                )
+                sys.exit(2)
+
+    t = time.time()
+    duplicates = False
+    allIssues = scanAll(args.ufos)
+    issuesByName = {issues.ufoName: issues for issues in allIssues}
+    for issues in allIssues:
+        print("... %s" % issues)
+        if args.verbose:
+            for title, glyphOffsets in (
+                ("duplicate", issues.duplicates),
+                ("off grid", issues.offGrid),
+                ("out of box", issues.outOfBox),
+            ):
+                for glyphName, offsets in sorted(glyphOffsets.items()):
+                    print("    /%s %s: %s" % (glyphName, title, offsets))
+        if args.fix:
+            if issues.ufoName.endswith("-Italic.ufo"):
+                continue  # Normalized with its roman
+            changed, incompatible = normalizePair(
+                issues.ufoName,
+                (issues, issuesByName[partnerName(issues.ufoName)]),
+                snap=args.snap,
+            )
+            if changed:
+                print("... Normalized %d glyphs in the roman and italic" % len(changed))
+            if incompatible:
+                print(
+                    "### Not normalized, different number of px in the italic: %s"
+                    % ", ".join(incompatible)
+                )
+        elif issues.duplicates:
+            duplicates = True
+    print("... Checked %d UFOs in %.2fs" % (len(args.ufos), time.time() - t))
+    if duplicates:
+        sys.exit(1)
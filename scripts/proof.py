@@ -0,0 +1,198 @@
+# -*- coding: UTF-8 -*-
+#
+#   Quick proofs of the Bitcount variants for the design loop.
+#
+#   Instead of running diffenator2 through a browser over the compiled fonts,
+#   the pages are rendered by scriptsLib.render straight from the pixel grids of
+#   the source UFOs. The px shape comes from the compiled VF if it exists,
+#   otherwise only the master locations can be shown in the axis sweeps.
+#
+#       python3 scripts/proof.py --jobs 6
+#
+#   For each design space this writes a glyph overview, a waterfall and sweeps
+#   along the wght, ELXP, ELSH and slnt axes as PNG, and an index.html to view them.
+#   Each design space is rendered by one job, so the pages share its px rasters.
+#
+import argparse
+import html
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, ".")
+
+from scriptsLib import DESIGN_SPACES, SHAPES, VF_PATH
+from scriptsLib.bitmaps import BITMAPS
+from scriptsLib.render import renderGlyphs, renderText
+
+SAMPLE = "Hamburgefonstiv 0123456789"
+WATERFALL_SIZES = (12, 16, 20, 24, 32, 48, 64, 96)
+SWEEP_SIZE = 32
+LABEL_SIZE = 16
+GLYPH_SIZE = 32
+GLYPHS_PER_LINE = 24
+GAP = 8  # Device pixels between the parts of a page
+
+# Values of the axis sweeps. Without VF only the master values can be rendered.
+SWEEPS = {
+    "wght": (range(100, 1000, 100), (100, 400, 900)),
+    "ELXP": ((0, 25, 50, 75, 100), (0, 100)),
+    "ELSH": (SHAPES, SHAPES),
+    "slnt": ((0, -2, -4, -6, -8), (0, -8)),
+}
+
+
+def stack(images, horizontal=False):
+    """Answer the images stacked with GAP pixels in between, aligned top/left."""
+    images = [image for image in images if image.size]
+    if horizontal:
+        h = max(image.shape[0] for image in images)
+        w = sum(image.shape[1] for image in images) + GAP * (len(images) - 1)
+    else:
+        h = sum(image.shape[0] for image in images) + GAP * (len(images) - 1)
+        w = max(image.shape[1] for image in images)
+    page = np.zeros((h, w), dtype=np.uint8)
+    offset = 0
+    for image in images:
+        ih, iw = image.shape
+        if horizontal:
+            page[:ih, offset : offset + iw] = image
+            offset += iw + GAP
+        else:
+            page[offset : offset + ih, :iw] = image
+            offset += ih + GAP
+    return page
+
+
+def label(text):
+    """Captions are rendered in Bitcount Grid Single too."""
+    return renderText(text, "Grid", "Single", None, LABEL_SIZE)
+
+
+def glyphOverview(variant, stem):
+    glyphs = BITMAPS.font(BITMAPS.ufoName(variant, stem))
+    # Encoded glyphs first in unicode order, then all others by name.
+    names = sorted(
+        glyphs, key=lambda name: (min(glyphs[name].unicodes or [0x110000]), name)
+    )
+    lines = []
+    for index in range(0, len(names), GLYPHS_PER_LINE):
+        line = []
+        for name in names[index : index + GLYPHS_PER_LINE]:
+            line += [name, "space"]
+        lines.append(line)
+    return stack(
+        [
+            label("%d glyphs" % len(names)),
+            renderGlyphs(lines, variant, stem, None, GLYPH_SIZE),
+        ]
+    )
+
+
+def waterfall(variant, stem):
+    return stack(
+        [
+            stack(
+                [label("%3d" % size), renderText(SAMPLE, variant, stem, None, size)],
+                horizontal=True,
+            )
+            for size in WATERFALL_SIZES
+        ]
+    )
+
+
+def sweep(variant, stem, axis, values):
+    return stack(
+        [
+            stack(
+                [
+                    label("%s %4d" % (axis, value)),
+                    renderText(SAMPLE, variant, stem, {axis: value}, SWEEP_SIZE),
+                ],
+                horizontal=True,
+            )
+            for value in values
+        ]
+    )
+
+
+def proofDesignSpace(dsName, outputPath):
+    """Render all pages of the design space into outputPath.
+    Answer the list of (title, fileName) of the pages."""
+    dsParams = DESIGN_SPACES[dsName]
+    variant, stem = dsParams.variant, dsParams.stem
+    hasVF = os.path.exists(VF_PATH + dsParams.vfName)
+    pages = [
+        ("Glyphs", glyphOverview(variant, stem)),
+        ("Waterfall", waterfall(variant, stem)),
+    ]
+    for axis, (values, masterValues) in SWEEPS.items():
+        pages.append(
+            (
+                "%s sweep" % axis,
+                sweep(variant, stem, axis, values if hasVF else masterValues),
+            )
+        )
+    result = []
+    for title, image in pages:
+        fileName = "%s-%s-%s.png" % (variant, stem, title.split()[0])
+        Image.fromarray(255 - image).save(os.path.join(outputPath, fileName))
+        result.append((title, fileName))
+    return result
+
+
+def writeIndex(outputPath, proofs):
+    lines = [
+        "<!DOCTYPE html>",
+        "<html><head><meta charset='utf-8'><title>Bitcount proofs</title></head><body>",
+    ]
+    for dsName, pages in proofs.items():
+        lines.append("<h1>%s</h1>" % html.escape(dsName))
+        for title, fileName in pages:
+            lines.append("<h2>%s</h2>" % html.escape(title))
+            lines.append("<img src='%s'>" % html.escape(fileName))
+    lines.append("</body></html>")
+    with open(os.path.join(outputPath, "index.html"), "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quick bitmap proofs of Bitcount.")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of design spaces to proof in parallel (default 1)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="out/quickproof",
+        help="Output directory (default %(default)s)",
+    )
+    parser.add_argument(
+        "designspaces",
+        nargs="*",
+        default=list(DESIGN_SPACES),
+        help="Design space names to proof (default all 6)",
+    )
+    args = parser.parse_args()
+    os.makedirs(args.output, exist_ok=True)
+
+    t = time.time()
+    BITMAPS.loadAll()  # Make sure the cached index exists before the jobs use it
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        results = executor.map(
+            proofDesignSpace, args.designspaces, [args.output] * len(args.designspaces)
+        )
+        proofs = dict(zip(args.designspaces, results))
+    writeIndex(args.output, proofs)
+    print(
+        "... Proofs of %d design spaces in %s (%.1fs)"
+        % (len(proofs), os.path.join(args.output, "index.html"), time.time() - t)
+    )
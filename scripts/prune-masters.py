@@ -0,0 +1,71 @@
+# -*- coding: UTF-8 -*-
+#
+#   Report the masters of the design spaces that interpolation of the other masters
+#   predicts within a tolerance, see scriptsLib/prune.py.
+#
+#       python3 scripts/prune-masters.py
+#       python3 scripts/prune-masters.py --tolerance 4 --all
+#
+#   Every prunable master is shown with its error when it is interpolated from all
+#   other masters, and its error in the model of the masters that are left after
+#   pruning, if it is pruned. The masters are the same for all 6 design spaces.
+#   build.py --prune-masters leaves the pruned masters out of the design spaces.
+#
+import argparse
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from scriptsLib import PRUNE_TOLERANCE
+from scriptsLib.glyphData import PIXEL_DATA
+from scriptsLib.prune import pruneMasters
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Report the Bitcount masters that can be interpolated."
+    )
+    parser.add_argument(
+        "-t",
+        "--tolerance",
+        type=float,
+        default=PRUNE_TOLERANCE,
+        help="Max error in font units of a pruned master (default %(default)s)",
+    )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Also show the masters that are not pruned",
+    )
+    args = parser.parse_args()
+
+    t = time.time()
+    pruned, errors = pruneMasters(args.tolerance)
+    print(
+        "--- %d of %d masters pruned with tolerance %g units"
+        % (len(pruned), len(PIXEL_DATA), args.tolerance)
+    )
+    print(
+        "    %-12s %5s %5s %5s %5s %8s %8s"
+        % ("Pixel", "wght", "ELXP", "ELSH", "slnt", "alone", "pruned")
+    )
+    for pName in sorted(errors, key=lambda pName: (errors[pName], pName)):
+        if pName not in pruned and not args.all:
+            continue
+        pd = PIXEL_DATA[pName]
+        print(
+            "    %-12s %5d %5d %5d %5d %8.2f %8s"
+            % (
+                pName,
+                pd.wght,
+                pd.ELXP,
+                pd.ELSH,
+                pd.slnt,
+                errors[pName],
+                "%.2f" % pruned[pName] if pName in pruned else "-",
+            )
+        )
+    print(
+        "... %d masters always stay, the full copies of the sources and the source "
+        "with copyInfo (%.1fs)" % (len(PIXEL_DATA) - len(errors), time.time() - t)
+    )
@@ -0,0 +1,261 @@
+# -*- coding: UTF-8 -*-
+#
+#   Report the glyphs of the COLRv1 color VFs that are slow to render.
+#
+#       python3 scripts/render-hotspots.py --jobs 6
+#       python3 scripts/render-hotspots.py Bitcount_Grid_Single4.designspace --location SZP1=100
+#
+#   Every color glyph is rendered with blackrenderer at a few locations (default
+#   the default, all SZP axes at maximum and italic), see scriptsLib/colrrender.py.
+#   Its render time is reported with the number of components in glyf and the
+#   size of its expanded paint tree from scriptsLib/paintgraph.py, and for every
+#   font the correlation of the slowest time with each of them.
+#   The result is out/hotspots/hotspots.csv and an index.html with tables that
+#   sort by clicking a column header.
+#
+#   Needs blackrenderer with skia-python or pycairo:
+#
+#       pip install --no-deps blackrenderer skia-python
+#
+import argparse
+import csv
+import html
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from fontTools.ttLib import TTFont
+
+sys.path.insert(0, ".")
+
+from scriptsLib import DESIGN_SPACES, SMAX, VF_PATH, slnt_MIN
+from scriptsLib.paintgraph import paintStats
+
+try:
+    from scriptsLib.colrrender import SIZE, benchmarkGlyphs, locationName
+except ImportError as e:
+    print(
+        "### Needs blackrenderer, pip install --no-deps blackrenderer skia-python: %s"
+        % e
+    )
+    sys.exit(2)
+
+LOCATIONS = [{}, dict(SZP1=SMAX, SZP2=SMAX), dict(slnt=slnt_MIN)]
+# Columns that may explain the render time of a glyph.
+FACTORS = ("components", "nodes", "depth", "clips")
+TOP = 20  # Number of slowest glyphs of every font in the output
+
+
+def parseLocation(value):
+    """Answer the location dictionary of a string like "SZP1=100,slnt=-8"."""
+    location = {}
+    for item in value.split(","):
+        if item:
+            axis, v = item.split("=")
+            location[axis] = float(v)
+    return location
+
+
+def hotspotRows(dsName, locations, size, repeat):
+    """Answer the list of row dictionaries of the color glyphs of the design space,
+    slowest first."""
+    fontName = DESIGN_SPACES[dsName].colorVfName
+    path = VF_PATH + fontName
+    ttFont = TTFont(path)
+    stats = paintStats(ttFont)
+    glyf = ttFont["glyf"]
+    unicodes = {}
+    for code, glyphName in sorted(ttFont.getBestCmap().items()):
+        unicodes.setdefault(glyphName, "U+%04X" % code)
+    times = benchmarkGlyphs(path, sorted(stats), locations, size, repeat)
+    rows = []
+    for glyphName, glyphStats in stats.items():
+        ms = {name: values.get(glyphName) for name, values in times.items()}
+        if None in ms.values():
+            continue  # Glyph without bounds, nothing to render
+        glyph = glyf[glyphName]
+        rows.append(
+            dict(
+                font=fontName,
+                glyph=glyphName,
+                unicode=unicodes.get(glyphName, ""),
+                components=len(glyph.components) if glyph.isComposite() else 0,
+                nodes=glyphStats.nodes,
+                depth=glyphStats.depth,
+                clips=glyphStats.clips,
+                **ms,
+                slowest=max(ms.values()),
+            )
+        )
+    rows.sort(key=lambda row: -row["slowest"])
+    return rows
+
+
+def correlations(rows):
+    """Answer the dictionary {factor: r} with the Pearson correlation of the slowest
+    render time of the rows with each of the FACTORS, None if a column is constant."""
+    slowest = np.array([row["slowest"] for row in rows], dtype=np.float64)
+    result = {}
+    for factor in FACTORS:
+        values = np.array([row[factor] for row in rows], dtype=np.float64)
+        if len(rows) < 2 or not values.std() or not slowest.std():
+            result[factor] = None
+        else:
+            result[factor] = float(np.corrcoef(values, slowest)[0, 1])
+    return result
+
+
+def writeCSV(path, columns, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(
+                {
+                    key: "%.3f" % value if isinstance(value, float) else value
+                    for key, value in row.items()
+                }
+            )
+
+
+SORT_SCRIPT = """<script>
+// Sort the rows of a table by the clicked column, numbers descending.
+document.querySelectorAll("th").forEach((th) => th.addEventListener("click", () => {
+  const table = th.closest("table"), body = table.tBodies[0];
+  const ix = th.cellIndex, rows = Array.from(body.rows);
+  const key = (row) => row.cells[ix].textContent;
+  const numeric = rows.every((row) => !isNaN(parseFloat(key(row))));
+  rows.sort((a, b) => numeric ? key(b) - key(a) : key(a).localeCompare(key(b)));
+  rows.forEach((row) => body.appendChild(row));
+}));
+</script>"""
+
+
+def writeHTML(path, columns, fonts):
+    lines = [
+        "<!DOCTYPE html>",
+        "<html><head><meta charset='utf-8'><title>Bitcount render hotspots</title>",
+        "<style>td, th { padding: 0 8px; text-align: right; } th { cursor: pointer; }"
+        "</style></head><body>",
+    ]
+    for fontName, (rows, r) in fonts.items():
+        lines.append("<h1>%s</h1>" % html.escape(fontName))
+        lines.append(
+            "<p>Correlation of the slowest time with %s</p>"
+            % ", ".join(
+                "%s %s" % (factor, "-" if value is None else "%.2f" % value)
+                for factor, value in r.items()
+            )
+        )
+        lines.append("<table><thead><tr>")
+        lines += ["<th>%s</th>" % html.escape(column) for column in columns[1:]]
+        lines.append("</tr></thead><tbody>")
+        for row in rows:
+            cells = []
+            for column in columns[1:]:
+                value = row[column]
+                text = "%.2f" % value if isinstance(value, float) else str(value)
+                cells.append("<td>%s</td>" % html.escape(text))
+            lines.append("<tr>%s</tr>" % "".join(cells))
+        lines.append("</tbody></table>")
+    lines += [SORT_SCRIPT, "</body></html>"]
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Report the Bitcount COLRv1 glyphs that are slow to render."
+    )
+    parser.add_argument(
+        "designspaces",
+        nargs="*",
+        default=list(DESIGN_SPACES),
+        help="Design space names of the color VFs (default all 6)",
+    )
+    parser.add_argument(
+        "--location",
+        action="append",
+        type=parseLocation,
+        help="Location like SZP1=100,slnt=-8 to render at, can be repeated "
+        "(default: default, SZP1=SZP2=100 and slnt=-8)",
+    )
+    parser.add_argument(
+        "--size", type=int, default=SIZE, help="Pixels per em (default %(default)s)"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Renders of every glyph (default 1)"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of fonts to render in parallel (default 1)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="out/hotspots",
+        help="Output directory (default %(default)s)",
+    )
+    args = parser.parse_args()
+    locations = args.location or LOCATIONS
+    designspaces = []
+    for dsName in args.designspaces:
+        path = VF_PATH + DESIGN_SPACES[dsName].colorVfName
+        if os.path.exists(path):
+            designspaces.append(dsName)
+        else:
+            print("### Missing %s, build it first" % path)
+    os.makedirs(args.output, exist_ok=True)
+
+    t = time.time()
+    count = len(designspaces)
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        results = executor.map(
+            hotspotRows,
+            designspaces,
+            [locations] * count,
+            [args.size] * count,
+            [args.repeat] * count,
+        )
+        fonts = {}
+        for rows in results:
+            if not rows:
+                continue
+            fontName = rows[0]["font"]
+            r = correlations(rows)
+            fonts[fontName] = rows, r
+            print("--- %s, %d glyphs" % (fontName, len(rows)))
+            print(
+                "... Correlation of the slowest time with %s"
+                % ", ".join(
+                    "%s %s" % (factor, "-" if value is None else "%.2f" % value)
+                    for factor, value in r.items()
+                )
+            )
+            for row in rows[:TOP]:
+                print(
+                    "... %-24s %8.2f ms %4d components %6d paints depth %3d"
+                    % (
+                        row["glyph"],
+                        row["slowest"],
+                        row["components"],
+                        row["nodes"],
+                        row["depth"],
+                    )
+                )
+
+    columns = ["font", "glyph", "unicode", *FACTORS]
+    columns += [locationName(location) for location in locations] + ["slowest"]
+    allRows = [row for rows, _ in fonts.values() for row in rows]
+    allRows.sort(key=lambda row: -row["slowest"])
+    writeCSV(os.path.join(args.output, "hotspots.csv"), columns, allRows)
+    writeHTML(os.path.join(args.output, "index.html"), columns, fonts)
+    print(
+        "... Hotspots of %d fonts in %s (%.1fs)"
+        % (len(fonts), os.path.join(args.output, "index.html"), time.time() - t)
+    )
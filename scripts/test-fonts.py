@@ -0,0 +1,94 @@
+# -*- coding: UTF-8 -*-
+#
+#   Check the fonts with fontbakery check-googlefonts, a font per process, see
+#   scriptsLib/qa.py. Fonts that did not change since the last run are not checked
+#   again, their results come from the cache in QA_CACHE_PATH.
+#
+#       python3 scripts/test-fonts.py --jobs 6
+#       python3 scripts/test-fonts.py --no-cache fonts/ttf/Bitcount_Grid_Single4*.ttf
+#
+#   Writes the same reports as `fontbakery check-googlefonts -l WARN --full-lists
+#   --succinct`: out/fontbakery/fontbakery-report.html, .md and out/badges.
+#   Exits with 1 if a check has a FAIL, FATAL or ERROR.
+#
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from scriptsLib import TTF_PATH
+from scriptsLib.qa import checkFonts, evictShards, worstStatus, writeReports
+
+FAILURES = ("FAIL", "FATAL", "ERROR")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check the Bitcount fonts with fontbakery, in parallel and cached."
+    )
+    parser.add_argument(
+        "fonts",
+        nargs="*",
+        help="Font files to check (default all files in %s)" % TTF_PATH,
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of fonts to check in parallel (default 1)",
+    )
+    parser.add_argument(
+        "--configuration",
+        default="fontbakery.toml",
+        help="Fontbakery configuration file (default %(default)s)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Check all fonts again and do not store the results",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="out",
+        help="Output directory (default %(default)s)",
+    )
+    args = parser.parse_args()
+    fontPaths = args.fonts or sorted(
+        path
+        for path in glob.glob(TTF_PATH + "**/*", recursive=True)
+        if os.path.isfile(path)
+    )
+    if not fontPaths:
+        print("### No fonts in %s, build them first" % TTF_PATH)
+        sys.exit(2)
+
+    t = time.time()
+    print("--- Fontbakery of %d fonts, %d jobs" % (len(fontPaths), args.jobs))
+    doc, cached = checkFonts(
+        fontPaths, args.configuration, jobs=args.jobs, useCache=not args.no_cache
+    )
+    if not args.no_cache:
+        evictShards()
+    writeReports(
+        doc,
+        html=os.path.join(args.output, "fontbakery", "fontbakery-report.html"),
+        ghmarkdown=os.path.join(args.output, "fontbakery", "fontbakery-report.md"),
+        badges=os.path.join(args.output, "badges"),
+    )
+    print(
+        "... %s"
+        % ", ".join(
+            "%d %s" % (count, status) for status, count in sorted(doc["result"].items())
+        )
+    )
+    print(
+        "... %d of %d shards from the cache, reports in %s (%.1fs)"
+        % (cached, len(fontPaths) + 1, args.output, time.time() - t)
+    )
+    if worstStatus(doc) in FAILURES:
+        print("### Fontbakery reported %s" % worstStatus(doc))
+        sys.exit(1)
@@ -27,8 +27,17 @@ STEMS = (SINGLE, DOUBLE)
 UFO_PATH = "sources/ufo/"
 FEATURES_PATH = "sources/features/"
 MASTERS_PATH = "sources/build/"  # Gitignore, not committing into Github
-
-VF_PATH = "fonts/ttf/variable/"  # vf/
+BUILD_CACHE_PATH = MASTERS_PATH + "cache/"  # Cached artifacts of build stages
+BUILD_CACHE_SIZE = 4 * 1024**3  # Max size of the build cache in bytes
+BITMAP_CACHE_PATH = MASTERS_PATH + "bitmaps/"  # Cached glyph bitmap indexes
+PROFILE_PATH = "out/profile/"  # cProfile output of the build stages
+QA_CACHE_PATH = MASTERS_PATH + "qa/"  # Cached fontbakery results, see qa.py
+PRUNE_STATS_PATH = MASTERS_PATH + "prune/"  # Full and pruned builds, see prune.py
+
+TTF_PATH = "fonts/ttf/"  # All fonts that make test checks
+VF_PATH = TTF_PATH + "variable/"  # vf/
+WEB_PATH = "fonts/webfonts/"  # WOFF2 slices and the @font-face CSS, see web.py
+LIMITED_VF_PATH = "fonts/limited/"  # Reduced-axis VFs, see limit.py
 
 DESIGNSPACE_TEMPLATE_PATH = "sources/Bitcount_Template.designspace"
 
@@ -57,6 +66,53 @@ LMIN = 0  # -100 #For 3x3 elements. Before it was -200 for 5x5 elements
 LDEF = 50  # 0
 LMAX = 100  # For 3x3 elements. Before it was 200 for 5x5 elements
 
+# Budgets of the expanded COLRv1 paint tree of every glyph, by variant, checked by
+# the build, see scriptsLib/paintgraph.py. About 20% above the largest glyphs,
+# the matrix glyphs with 72 pixels. overdraw is in pixel areas, the /canvas of
+# Mono Double is the largest.
+_PAINT_BUDGET = dict(
+    nodes=13000,
+    depth=24,
+    layers=4200,
+    clips=3800,
+    stops=15500,
+    varTransforms=450,
+    overdraw=3600,
+)
+PAINT_BUDGETS = {
+    "Grid": _PAINT_BUDGET,
+    "Mono": dict(_PAINT_BUDGET, overdraw=5000),
+    "Prop": _PAINT_BUDGET,
+}
+
+# Unicode ranges of the WOFF2 slices of the web fonts, a code point goes into the
+# first slice that has it. The ranges of latin and latin-ext are the ones of
+# Google Fonts, None is all code points of the font that are in no other slice.
+WEB_SLICES = (
+    (
+        "latin",
+        "U+0000-00FF,U+0131,U+0152-0153,U+02BB-02BC,U+02C6,U+02DA,U+02DC,U+0304,"
+        "U+0308,U+0329,U+2000-206F,U+20AC,U+2122,U+2191,U+2193,U+2212,U+2215,"
+        "U+FEFF,U+FFFD",
+    ),
+    (
+        "latin-ext",
+        "U+0100-02BA,U+02BD-02C5,U+02C7-02CC,U+02CE-02D7,U+02DD-02FF,U+1D00-1DBF,"
+        "U+1E00-1E9F,U+1EF2-1EFF,U+2020,U+20A0-20AB,U+20AD-20C0,U+2113,U+2C60-2C7F,"
+        "U+A720-A7FF",
+    ),
+    ("symbols", None),
+)
+
+# Default limits of the reduced-axis VFs of build.py --limit-axes, see limit.py.
+# Pin the axes that production pages don't use at their default, keep wght and
+# slnt, and the COLRv1 axes of the color VFs.
+AXIS_LIMITS = dict(CRSV=None, ELSH=None, ELXP=None)
+
+# Max error in font units of the pixel of a master that build.py --prune-masters
+# removes, when it is interpolated from the other masters, see prune.py.
+PRUNE_TOLERANCE = 2
+
 CLOSED_QUAD = 0
 ELXP_QUAD = 100
 
@@ -140,6 +196,11 @@ class DesignSpaceParams:
     def ufoPath(self):
         return f"{MASTERS_PATH}{self.variant}-{self.stem}/"
 
+    # Scratch directory for temporary files of the build job of this design space
+    @property
+    def scratchPath(self):
+        return f"{MASTERS_PATH}scratch/{self.variant}-{self.stem}/"
+
     @property
     def _vfPrefix(self):
         # Bitcount Mono Double -> Bitcount
@@ -153,6 +214,10 @@ class DesignSpaceParams:
         else:
             return f"{BITCOUNT}{self.variant}{self.stem}"
 
+    def axesVfName(self, axes):
+        """Answer the name of a VF of this design space with these axis tags."""
+        return self._vfPrefix + "[%s].ttf" % ",".join(sorted(axes))
+
     @property
     def vfName(self):
         return self._vfPrefix + f"[{axis_suffix}].ttf"
@@ -0,0 +1,293 @@
+# -*- coding: UTF-8 -*-
+#
+#   Benchmarks of the build stages, with a history of the results.
+#
+#   Each benchmark run builds one design space a number of times, stage by stage:
+#   makeDesignSpaceFile, copyMasters, fontmake (buildVF), the colrv1.py paints and
+#   the complete addCOLRv1toVF with paintcompiler. Every stage is timed on its own.
+#
+#   The pipeline runs on fixtures: the real sources, or synthetic variant UFOs
+#   with a given number of random pixel glyphs, to see how the stages scale.
+#   A fixture is a directory with the same layout as the repository, so the build
+#   functions can run in it unchanged, with their relative paths.
+#
+#   Results are appended to a JSON history file, compareRuns answers the stages
+#   that got slower between two runs in the history.
+#
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import ufoLib2
+from fontTools.ttLib import TTFont
+from paintcompiler import add_axes, compile_paints
+
+from scriptsLib import (
+    DESIGN_SPACES,
+    DESIGNSPACE_TEMPLATE_PATH,
+    LAYER_ELEMENTS,
+    LAYER_ELEMENTS_ITALIC,
+    PIXEL_NAME,
+    UFO_PATH,
+    VARIATION_PIXELS,
+    LDEF,
+    LMAX,
+    LMIN,
+    SDEF,
+    SMAX,
+    SMIN,
+)
+from scriptsLib.bitmaps import ITALIC_OFFSETS, SLOPE, VARIANT_GRIDS, P
+from scriptsLib.make import addCOLRv1toVF, buildVF, copyMasters, makeDesignSpaceFile
+from scriptsLib.sources import SOURCES
+
+REPO_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+HISTORY_PATH = "out/benchmarks/history.json"
+
+STAGES = ("designspace", "masters", "fontmake", "colrv1-paints", "colrv1")
+REAL = "real"
+# Synthetic fixtures by name: number of generated glyphs.
+SYNTHETIC = {"small": 200, "5k": 5000, "20k": 20000}
+FIXTURES = (REAL,) + tuple(SYNTHETIC)
+
+# Same axes as addCOLRv1toVF adds for the paints.
+COLR_AXES = [
+    f"SZP1:{SMIN}:{SDEF}:{SMAX}:Size of Paint 1",
+    f"XPN1:{LMIN}:{LDEF}:{LMAX}:Horizontal Position of Paint 1",
+    f"YPN1:{LMIN}:{LDEF}:{LMAX}:Vertical Position of Paint 1",
+    f"SZP2:{SMIN}:{SDEF}:{SMAX}:Size of Paint 2",
+    f"XPN2:{LMIN}:{LDEF}:{LMAX}:Horizontal Position of Paint 2",
+    f"YPN2:{LMIN}:{LDEF}:{LMAX}:Vertical Position of Paint 2",
+]
+
+
+def _syntheticGlyphs(glyphCount, variant, seed=0):
+    """Answer the list of (name, width, [(col, row), ...]) of random pixel glyphs
+    in the box of the variant. Some are copies of others, as in the real fonts."""
+    cols, rows, below = VARIANT_GRIDS[variant]
+    rng = np.random.default_rng(seed)
+    glyphs = []
+    for index in range(glyphCount):
+        if glyphs and rng.random() < 0.2:
+            _, width, pixels = glyphs[rng.integers(len(glyphs))]
+        else:
+            glyphCols = int(rng.integers(3, cols)) if cols > 6 else cols - 1
+            bitmap = rng.random((rows, glyphCols)) < 0.35
+            pixels = [(int(c), int(r) - below) for r, c in np.argwhere(bitmap)]
+            pixels.sort(key=lambda cell: (cell[1], cell[0]))
+            width = (glyphCols + 1) * P
+        glyphs.append(("syn%05d" % index, width, pixels))
+    return glyphs
+
+
+def makeSyntheticUFO(path, sourcePath, glyphs, variant, italic):
+    """Write a UFO with the font info of the source UFO and the synthetic glyphs."""
+    source = ufoLib2.Font.open(sourcePath, lazy=True)
+    font = ufoLib2.Font()
+    font.info = source.info
+    italicOffset = ITALIC_OFFSETS.get(variant, 0)
+    for index, (name, width, pixels) in enumerate(glyphs):
+        glyph = font.newGlyph(name)
+        glyph.width = width
+        if index < 6400:  # Private use area
+            glyph.unicode = 0xE000 + index
+        for col, row in pixels:
+            x, y = col * P, row * P
+            if italic:
+                x += row * SLOPE + italicOffset
+            glyph.components.append(
+                ufoLib2.objects.Component(PIXEL_NAME, (1, 0, 0, 1, x, y))
+            )
+    # makeDesignSpaceFile makes the italic rules from the substitutions in ss08.
+    font.features.text = "feature ss08 {\n    sub %s by %s;\n} ss08;\n" % (
+        glyphs[0][0],
+        glyphs[1][0],
+    )
+    font.save(path, overwrite=True)
+
+
+def makeFixture(path, fixture, dsParams):
+    """Make the fixture directory at path for the design space. Answer the number
+    of glyphs in its source UFO. The real fixture uses the repository itself."""
+    if fixture == REAL:
+        glyphs = ufoLib2.Font.open(UFO_PATH + dsParams.masterName, lazy=True)
+        return len(glyphs)
+    ufoPath = os.path.join(path, UFO_PATH)
+    os.makedirs(ufoPath, exist_ok=True)
+    shutil.copyfile(
+        os.path.join(REPO_PATH, DESIGNSPACE_TEMPLATE_PATH),
+        os.path.join(path, DESIGNSPACE_TEMPLATE_PATH),
+    )
+    # The shared sources are only read, they can be links.
+    for ufoName in (VARIATION_PIXELS, LAYER_ELEMENTS, LAYER_ELEMENTS_ITALIC):
+        os.symlink(
+            os.path.join(REPO_PATH, UFO_PATH, ufoName), os.path.join(ufoPath, ufoName)
+        )
+    # paintcompiler runs scriptsLib/colrv1.py, which imports scriptsLib from ".".
+    os.symlink(os.path.join(REPO_PATH, "scriptsLib"), os.path.join(path, "scriptsLib"))
+    glyphs = _syntheticGlyphs(SYNTHETIC[fixture], dsParams.variant)
+    roman = dsParams.masterName
+    italic = roman.replace(".ufo", "-Italic.ufo")
+    for ufoName, isItalic in ((roman, False), (italic, True)):
+        makeSyntheticUFO(
+            os.path.join(ufoPath, ufoName),
+            os.path.join(REPO_PATH, UFO_PATH, ufoName),
+            glyphs,
+            dsParams.variant,
+            isItalic,
+        )
+    return len(glyphs)
+
+
+def addPaints(vfPath, dstPath=None):
+    """Run colrv1.py on the VF in this process, as paintcompiler does.
+    Save the result if dstPath is given."""
+    font = TTFont(vfPath)
+    font["gvar"]  # Decompile before adding the axes, as paintcompiler does
+    add_axes(font, COLR_AXES)
+    with open("scriptsLib/colrv1.py") as f:
+        compile_paints(font, f.read())
+    if dstPath is not None:
+        font.save(dstPath)
+
+
+def runPipeline(dsParams, scratchPath, times, stages=STAGES):
+    """Run the build stages of the design space once, in the current directory.
+    Add the duration of each of the `stages` to the lists in the times dictionary.
+    Other stages run untimed if a later stage needs them."""
+    dsPath = os.path.join(scratchPath, dsParams.dsName)
+    vfPath = os.path.join(scratchPath, dsParams.vfName)
+    colorPath = os.path.join(scratchPath, dsParams.colorVfName)
+    last = max(STAGES.index(stage) for stage in stages)
+
+    def run(stage, method, *args, **kwargs):
+        if STAGES.index(stage) > last:
+            return None
+        t = time.perf_counter()
+        result = method(*args, **kwargs)
+        if stage in stages:
+            times.setdefault(stage, []).append(time.perf_counter() - t)
+        return result
+
+    SOURCES.clear()  # Every run reads the sources again, as a build does
+    run("designspace", makeDesignSpaceFile, dsPath, dsParams, googlefonts=True)
+    masters = run("masters", copyMasters, dsParams, googlefonts=True)
+    run("fontmake", buildVF, dsPath, vfPath, masters)
+    if "colrv1-paints" in stages:
+        run("colrv1-paints", addPaints, vfPath)
+    run("colrv1", addCOLRv1toVF, vfPath, colorPath)
+
+
+def benchmarkFixture(fixture, dsName, repeat=3, stages=STAGES):
+    """Run the pipeline `repeat` times on the fixture. Answer the dictionary with
+    the number of glyphs and the min/median/max seconds of every stage."""
+    dsParams = DESIGN_SPACES[dsName]
+    cwd = os.getcwd()
+    tmpPath = tempfile.mkdtemp(prefix="bitcount-benchmark-")
+    try:
+        fixturePath = cwd if fixture == REAL else os.path.join(tmpPath, "fixture")
+        scratchPath = os.path.join(tmpPath, "scratch")
+        os.makedirs(scratchPath)
+        glyphCount = makeFixture(fixturePath, fixture, dsParams)
+        os.chdir(fixturePath)
+        times = {}
+        for _ in range(repeat):
+            runPipeline(dsParams, scratchPath, times, stages)
+    finally:
+        os.chdir(cwd)
+        SOURCES.clear()
+        shutil.rmtree(tmpPath, ignore_errors=True)
+    return dict(
+        glyphs=glyphCount,
+        stages={
+            stage: dict(
+                min=min(values),
+                median=statistics.median(values),
+                max=max(values),
+                repeat=len(values),
+            )
+            for stage, values in times.items()
+        },
+    )
+
+
+def gitCommit():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("+dirty" if dirty else "")
+
+
+def makeRun(results, dsName, note=None):
+    """Answer the history record of the results of benchmarkFixture by fixture name."""
+    return dict(
+        date=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        commit=gitCommit(),
+        note=note,
+        designspace=dsName,
+        host=dict(
+            node=platform.node(),
+            python=platform.python_version(),
+            cpus=os.cpu_count(),
+        ),
+        fixtures=results,
+    )
+
+
+def readHistory(path=HISTORY_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def appendHistory(run, path=HISTORY_PATH):
+    history = readHistory(path)
+    history.append(run)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmpPath = path + ".tmp"
+    with open(tmpPath, "w") as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmpPath, path)
+    return len(history) - 1
+
+
+def compareRuns(base, head, minSeconds=0.05):
+    """Answer the list of (fixture, stage, baseSeconds, headSeconds, ratio) of the
+    stages in both runs, comparing their min times. Runs of a different design
+    space have nothing to compare, the synthetic fixtures have the same number of
+    glyphs for all of them. Fixtures of a different size are skipped, stages
+    faster than minSeconds in both runs are too noisy to compare."""
+    result = []
+    if base.get("designspace") != head.get("designspace"):
+        return result
+    for fixture, headResults in head["fixtures"].items():
+        baseResults = base["fixtures"].get(fixture)
+        if baseResults is None or baseResults["glyphs"] != headResults["glyphs"]:
+            continue
+        for stage, headTimes in headResults["stages"].items():
+            baseTimes = baseResults["stages"].get(stage)
+            if baseTimes is None:
+                continue
+            b, h = baseTimes["min"], headTimes["min"]
+            if max(b, h) < minSeconds:
+                continue
+            result.append((fixture, stage, b, h, h / b if b else float("inf")))
+    return result
@@ -0,0 +1,311 @@
+# -*- coding: UTF-8 -*-
+#
+#   Index of all Bitcount glyphs as bitmaps.
+#
+#   Every Bitcount glyph is a list of px components on a grid of P=100 units.
+#   The index reads the component positions of the roman and italic source UFOs
+#   once into packed NumPy bit arrays, together with the advance width, unicodes
+#   and the original px component offsets of each glyph. Build steps, QA and
+#   renderers can then look up glyph shapes without ufoLib2 or fontTools.
+#
+#   The index of each UFO is cached in BITMAP_CACHE_PATH, keyed on the name, size
+#   and modification time of its .glif files, so loading it again takes milliseconds.
+#
+#       from scriptsLib.bitmaps import BITMAPS
+#       bitmap = BITMAPS.getGlyph("Grid", "Single", "A")
+#       bitmap.bitmap  # Boolean array, top row first
+#
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+from fontTools.ufoLib import UFOReader
+
+from scriptsLib import (
+    BITCOUNT,
+    BITMAP_CACHE_PATH,
+    GRID,
+    MONO,
+    PIXEL_NAME,
+    PROP,
+    STEMS,
+    UFO_PATH,
+    VARIANTS,
+)
+
+P = 100  # Size of the pixel grid in units
+SLOPE = 14  # Horizontal slant offset of italic pixels per 100 vertical units
+ITALIC_OFFSETS = {GRID: 8}  # Extra horizontal offset of italic pixels in units
+
+# Max box of the glyphs in pixels (columns, rows), as in glyphData, and the number
+# of rows below the baseline in that box. A box starts at the glyph origin.
+VARIANT_GRIDS = {
+    GRID: (6, 8, 1),
+    MONO: (6, 11, 2),
+    PROP: (10, 11, 2),
+}
+
+INDEX_VERSION = 3  # Change to invalidate the cached indexes
+
+
+@dataclass
+class GlyphBitmap:
+    """Pixels of one glyph. Bit [row, col] of the bitmap is the pixel at column
+    left + col and row bottom + rows - 1 - row on the grid, counting from the glyph
+    origin, so the top row comes first like in an image."""
+
+    name: str
+    width: int  # Advance width in units
+    unicodes: list = field(default_factory=list)
+    left: int = 0  # Grid column of the first bitmap column
+    bottom: int = 0  # Grid row of the last bitmap row
+    rows: int = 0
+    cols: int = 0
+    bits: np.ndarray = None  # Packed bits, np.packbits of the flat bitmap
+    offsets: np.ndarray = None  # (x, y) of the px components in the source, in order
+
+    def __repr__(self):
+        return "<%s /%s %dx%d>" % (
+            self.__class__.__name__,
+            self.name,
+            self.cols,
+            self.rows,
+        )
+
+    @property
+    def bitmap(self):
+        """Answer the unpacked bitmap as 2D array of bools."""
+        if not self.rows or not self.cols:
+            return np.zeros((self.rows, self.cols), dtype=bool)
+        return (
+            np.unpackbits(self.bits, count=self.rows * self.cols)
+            .reshape(self.rows, self.cols)
+            .astype(bool)
+        )
+
+    @property
+    def pixels(self):
+        """Answer the list of (column, row) grid positions of the pixels."""
+        rows, cols = np.nonzero(self.bitmap)
+        return [
+            (int(self.left + c), int(self.bottom + self.rows - 1 - r))
+            for r, c in zip(rows, cols)
+        ]
+
+    @property
+    def pixelCount(self):
+        return int(np.unpackbits(self.bits).sum()) if self.bits is not None else 0
+
+
+def _readComponents(glyphSet, glyphName):
+    """Answer the width, unicodes and px offsets of the glyph, parsed from its .glif."""
+
+    class _Glyph:  # Just enough of a glyph object for readGlyph
+        width = 0
+        unicodes = []
+
+    offsets = []
+
+    class _PointPen:
+        def beginPath(self, **kwargs):
+            pass
+
+        def endPath(self):
+            pass
+
+        def addPoint(self, *args, **kwargs):
+            pass
+
+        def addComponent(self, baseGlyph, transformation, **kwargs):
+            if baseGlyph == PIXEL_NAME:
+                offsets.append(transformation[4:])
+
+    glyph = _Glyph()
+    glyphSet.readGlyph(glyphName, glyph, _PointPen())
+    return glyph.width, list(glyph.unicodes), offsets
+
+
+def makeGlyphBitmap(name, width, unicodes, offsets, italic=False, variant=None):
+    """Answer the GlyphBitmap of the px component offsets. Italic offsets are
+    unslanted first, and moved back by the ITALIC_OFFSETS of the variant, as
+    pixels.gridCells does. Offsets are rounded to the nearest cell of the grid."""
+    array = np.array(offsets, dtype=np.float64).reshape(-1, 2)
+    italicOffset = ITALIC_OFFSETS.get(variant, 0)
+    cells = set()
+    for x, y in offsets:
+        if italic:
+            x -= y * SLOPE / P + italicOffset
+        cells.add((round(x / P), round(y / P)))
+    if not cells:
+        return GlyphBitmap(name, width, unicodes, offsets=array)
+    left = min(c for c, _ in cells)
+    bottom = min(r for _, r in cells)
+    cols = max(c for c, _ in cells) - left + 1
+    rows = max(r for _, r in cells) - bottom + 1
+    bitmap = np.zeros((rows, cols), dtype=bool)
+    for c, r in cells:
+        bitmap[rows - 1 - (r - bottom), c - left] = True
+    return GlyphBitmap(
+        name, width, unicodes, left, bottom, rows, cols, np.packbits(bitmap), array
+    )
+
+
+def _ufoKey(path):
+    """Answer the hash of the names, sizes and modification times of all files
+    in the default layer of the UFO."""
+    h = hashlib.sha256(b"%d" % INDEX_VERSION)
+    glyphsPath = os.path.join(path, "glyphs")
+    for entry in sorted(os.scandir(glyphsPath), key=lambda e: e.name):
+        stat = entry.stat()
+        h.update(b"%s:%d:%d;" % (entry.name.encode(), stat.st_size, stat.st_mtime_ns))
+    return h.hexdigest()[:16]
+
+
+def _save(path, glyphs):
+    names = list(glyphs)
+    meta = np.array(
+        [
+            (
+                g.width,
+                g.left,
+                g.bottom,
+                g.rows,
+                g.cols,
+                len(g.bits) if g.rows else 0,
+                len(g.offsets),
+            )
+            for g in glyphs.values()
+        ],
+        dtype=np.int32,
+    ).reshape(-1, 7)
+    bits = [g.bits for g in glyphs.values() if g.rows]
+    tmpPath = "%s.tmp-%d.npz" % (path, os.getpid())
+    np.savez(
+        tmpPath,
+        names=np.array(names, dtype=str),
+        unicodes=np.array(json.dumps([g.unicodes for g in glyphs.values()])),
+        meta=meta,
+        bits=np.concatenate(bits) if bits else np.zeros(0, dtype=np.uint8),
+        offsets=np.concatenate([g.offsets for g in glyphs.values()]).reshape(-1, 2),
+    )
+    os.replace(tmpPath, path)  # Parallel jobs may save the same index
+
+
+def _load(path):
+    glyphs = {}
+    with np.load(path, allow_pickle=False) as data:
+        names = data["names"]
+        unicodes = json.loads(str(data["unicodes"]))
+        meta = data["meta"]
+        bits = data["bits"]
+        offsets = data["offsets"]
+    offset = pxOffset = 0
+    for name, glyphUnicodes, (width, left, bottom, rows, cols, size, count) in zip(
+        names, unicodes, meta.tolist()
+    ):
+        glyphs[str(name)] = GlyphBitmap(
+            str(name),
+            width,
+            glyphUnicodes,
+            left,
+            bottom,
+            rows,
+            cols,
+            bits[offset : offset + size] if size else None,
+            offsets[pxOffset : pxOffset + count],
+        )
+        offset += size
+        pxOffset += count
+    return glyphs
+
+
+def ufoVariant(ufoName):
+    """Answer the variant of a source UFO name like Bitcount_Grid_Single-Italic.ufo,
+    or None if it has none, like Bitcount-VariationPixels.ufo."""
+    parts = ufoName.split("_")
+    return parts[1] if len(parts) > 2 else None
+
+
+class BitmapIndex:
+    """Bitmaps of the glyphs in the roman and italic source UFOs, read from the cache
+    on disk if the UFO did not change."""
+
+    def __init__(self, path=UFO_PATH, cachePath=BITMAP_CACHE_PATH):
+        self.path = path
+        self.cachePath = cachePath
+        self._fonts = {}
+        self._cmaps = {}
+
+    @staticmethod
+    def ufoName(variant, stem, italic=False):
+        if italic:
+            return f"{BITCOUNT}_{variant}_{stem}-Italic.ufo"
+        return f"{BITCOUNT}_{variant}_{stem}.ufo"
+
+    def ufoNames(self):
+        """Answer the names of the 12 roman and italic source UFOs."""
+        return [
+            self.ufoName(variant, stem, italic)
+            for variant in VARIANTS
+            for stem in STEMS
+            for italic in (False, True)
+        ]
+
+    def font(self, ufoName):
+        """Answer the dictionary {glyphName: GlyphBitmap} of the source UFO."""
+        glyphs = self._fonts.get(ufoName)
+        if glyphs is None:
+            ufoPath = self.path + ufoName
+            cacheFile = os.path.join(
+                self.cachePath, "%s-%s.npz" % (ufoName, _ufoKey(ufoPath))
+            )
+            if os.path.exists(cacheFile):
+                glyphs = _load(cacheFile)
+            else:
+                glyphs = self._read(
+                    ufoPath,
+                    italic=ufoName.endswith("-Italic.ufo"),
+                    variant=ufoVariant(ufoName),
+                )
+                os.makedirs(self.cachePath, exist_ok=True)
+                for fileName in os.listdir(self.cachePath):  # Remove old versions
+                    if fileName.startswith(ufoName + "-"):
+                        os.remove(os.path.join(self.cachePath, fileName))
+                _save(cacheFile, glyphs)
+            self._fonts[ufoName] = glyphs
+        return glyphs
+
+    def _read(self, ufoPath, italic=False, variant=None):
+        glyphs = {}
+        with UFOReader(ufoPath, validate=False) as reader:
+            glyphSet = reader.getGlyphSet(validateRead=False)
+            for glyphName in sorted(glyphSet.keys()):
+                width, unicodes, offsets = _readComponents(glyphSet, glyphName)
+                glyphs[glyphName] = makeGlyphBitmap(
+                    glyphName, width, unicodes, offsets, italic, variant
+                )
+        return glyphs
+
+    def loadAll(self):
+        """Load the index of all source UFOs. Answer the number of glyphs."""
+        return sum(len(self.font(ufoName)) for ufoName in self.ufoNames())
+
+    def getGlyph(self, variant, stem, glyphName, italic=False):
+        return self.font(self.ufoName(variant, stem, italic)).get(glyphName)
+
+    def cmap(self, variant, stem, italic=False):
+        """Answer the dictionary {unicode: glyphName} of the source."""
+        ufoName = self.ufoName(variant, stem, italic)
+        cmap = self._cmaps.get(ufoName)
+        if cmap is None:
+            cmap = self._cmaps[ufoName] = {}
+            for name, glyph in self.font(ufoName).items():
+                for unicode in glyph.unicodes:
+                    cmap.setdefault(unicode, name)
+        return cmap
+
+
+# Shared by everything that runs in this process.
+BITMAPS = BitmapIndex()
@@ -0,0 +1,196 @@
+# -*- coding: UTF-8 -*-
+#
+#   Content addressed cache for the stages of a design space build.
+#
+#   The key of each stage is a hash of the key of the previous stage, plus
+#   the content of its own input files, the versions of the tools it runs
+#   and any other values (like command lines) that change its output.
+#   A stage with an unchanged key is skipped and its artifacts are restored
+#   from the cache. If a build fails, the next run resumes with the first
+#   stage that has no cached result.
+#
+import hashlib
+import importlib.metadata
+import json
+import os
+import shutil
+
+from scriptsLib import BUILD_CACHE_PATH, BUILD_CACHE_SIZE
+from scriptsLib.trace import TRACER
+
+
+def hashPath(h, path):
+    """Add the relative file names and content of file or directory `path` to hash `h`.
+    A path that does not exist is added as such."""
+    if not os.path.exists(path):
+        h.update(b"missing:" + path.encode())
+    elif os.path.isdir(path):
+        for root, dirNames, fileNames in os.walk(path):
+            dirNames.sort()
+            for fileName in sorted(fileNames):
+                filePath = os.path.join(root, fileName)
+                h.update(os.path.relpath(filePath, path).encode())
+                with open(filePath, "rb") as f:
+                    h.update(f.read())
+    else:
+        with open(path, "rb") as f:
+            h.update(f.read())
+
+
+def toolVersion(name):
+    """Answer the installed version of the distribution, to be used in a stage key."""
+    try:
+        return "%s==%s" % (name, importlib.metadata.version(name))
+    except importlib.metadata.PackageNotFoundError:
+        return "%s==none" % name
+
+
+def _copy(srcPath, dstPath):
+    if os.path.isdir(dstPath):
+        shutil.rmtree(dstPath)
+    elif os.path.exists(dstPath):
+        os.remove(dstPath)
+    os.makedirs(os.path.dirname(os.path.normpath(dstPath)) or ".", exist_ok=True)
+    if os.path.isdir(srcPath):
+        shutil.copytree(srcPath, dstPath)
+    else:
+        shutil.copy2(srcPath, dstPath)
+
+
+class Stage:
+    """A step in the build of a design space.
+    `inputs` are the file and directory paths the stage reads from the sources,
+    `tools` are the distribution names of the tools that it runs,
+    `values` are other things that change the output (command lines, flags),
+    `needs` are the artifact paths of previous stages that it reads and
+    `outputs` are the artifact paths that it writes and that get cached.
+    """
+
+    def __init__(self, name, run, inputs=(), tools=(), values=(), needs=(), outputs=()):
+        self.name = name
+        self.run = run
+        self.inputs = inputs
+        self.tools = tools
+        self.values = values
+        self.needs = needs
+        self.outputs = outputs
+        self.key = None
+
+    def __repr__(self):
+        return "<%s %s>" % (self.__class__.__name__, self.name)
+
+    def makeKey(self, parentKey):
+        h = hashlib.sha256()
+        h.update(parentKey.encode())
+        h.update(self.name.encode())
+        for path in self.inputs:
+            hashPath(h, path)
+        for name in self.tools:
+            h.update(toolVersion(name).encode())
+        for value in self.values:
+            h.update(repr(value).encode())
+        self.key = h.hexdigest()
+        return self.key
+
+
+class StageCache:
+    """Store the artifacts of stages under their key in `path`. The cache is
+    kept within `maxSize` bytes by evicting the least recently used entries."""
+
+    def __init__(self, path=BUILD_CACHE_PATH, maxSize=BUILD_CACHE_SIZE):
+        self.path = path
+        self.maxSize = maxSize
+
+    def _entryPath(self, key):
+        return os.path.join(self.path, key)
+
+    def has(self, key):
+        return os.path.exists(os.path.join(self._entryPath(key), "stage.json"))
+
+    def store(self, stage):
+        """Copy the artifacts of the stage into the cache. Write to a temporary
+        entry first, so parallel jobs and failures never leave half entries."""
+        entryPath = self._entryPath(stage.key)
+        if self.has(stage.key):
+            return
+        tmpPath = "%s.tmp-%d" % (entryPath, os.getpid())
+        if os.path.exists(tmpPath):
+            shutil.rmtree(tmpPath)
+        os.makedirs(tmpPath)
+        for index, path in enumerate(stage.outputs):
+            _copy(path, os.path.join(tmpPath, str(index)))
+        with open(os.path.join(tmpPath, "stage.json"), "w") as f:
+            json.dump({"stage": stage.name, "outputs": list(stage.outputs)}, f)
+        try:
+            os.rename(tmpPath, entryPath)
+        except OSError:  # Another job stored the same key first
+            shutil.rmtree(tmpPath)
+
+    def restore(self, stage, path):
+        """Restore artifact `path` of the stage from the cache."""
+        entryPath = self._entryPath(stage.key)
+        _copy(os.path.join(entryPath, str(stage.outputs.index(path))), path)
+        os.utime(entryPath)  # Mark as recently used
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits in maxSize.
+        Answer the number of removed entries."""
+        if not os.path.exists(self.path):
+            return 0
+        entries = []
+        for key in os.listdir(self.path):
+            entryPath = self._entryPath(key)
+            size = 0
+            for root, _, fileNames in os.walk(entryPath):
+                for fileName in fileNames:
+                    size += os.path.getsize(os.path.join(root, fileName))
+            entries.append((os.path.getmtime(entryPath), size, entryPath))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entryPath in sorted(entries):
+            if total <= self.maxSize:
+                break
+            shutil.rmtree(entryPath)
+            total -= size
+            removed += 1
+        return removed
+
+
+def runStages(stages, cache=None, finalOutputs=()):
+    """Run the stages in order. If there is a cache, skip the stages with a cached
+    key and restore the artifacts that are needed by the stages that do run,
+    or that are in `finalOutputs`. The stages are timed by TRACER."""
+    if cache is None:
+        for stage in stages:
+            with TRACER.span(stage.name):
+                stage.run()
+        return
+
+    key = ""
+    for stage in stages:
+        key = stage.makeKey(key)
+    firstMiss = len(stages)
+    for index, stage in enumerate(stages):
+        if not cache.has(stage.key):
+            firstMiss = index
+            break
+
+    # Restore the latest cached version of each artifact we still need.
+    needed = set(finalOutputs)
+    for stage in stages[firstMiss:]:
+        needed.update(stage.needs)
+    for stage in stages[:firstMiss]:
+        print("... Skip cached stage %s" % stage.name)
+    restored = set()
+    for stage in reversed(stages[:firstMiss]):
+        for path in stage.outputs:
+            if path in needed and path not in restored:
+                with TRACER.span("cache restore", "cache"):
+                    cache.restore(stage, path)
+                restored.add(path)
+
+    for stage in stages[firstMiss:]:
+        with TRACER.span(stage.name):
+            stage.run()
+        with TRACER.span("cache store", "cache"):
+            cache.store(stage)
@@ -0,0 +1,224 @@
+# -*- coding: UTF-8 -*-
+#
+#   Render cost of the COLRv1 paints of the color VFs.
+#
+#   The paints of scriptsLib/colrv1.py draw every pixel with layers that are
+#   clipped by the pixel shape and scaled up to 10x with SZP1/SZP2, so the cost
+#   of a glyph depends a lot on the location in the color axes. This module
+#   renders shaped strings with blackrenderer on a skia (or cairo) raster surface,
+#   timing every glyph, at locations along all axes of the font.
+#
+#   blackrenderer is not in requirements.txt. It asks for a newer fontTools than
+#   the pinned one, that paintcompiler fails with, but it works with the pinned
+#   one. Install it without its dependencies, with skia for the raster backend:
+#
+#       pip install --no-deps blackrenderer skia-python
+#
+#   Results are dictionaries that can be saved as JSON and compared with
+#   compareResults, to see paint changes that make rendering slower.
+#
+import json
+import os
+import statistics
+import time
+
+import uharfbuzz as hb
+from blackrenderer.backends import getSurfaceClass
+from blackrenderer.font import BlackRendererFont
+from blackrenderer.render import buildGlyphLine, calcGlyphLineBounds
+from fontTools.misc.arrayTools import insetRect, intRect, scaleRect
+
+from scriptsLib import COLOR_AXES, SMAX
+
+BASELINE_PATH = "out/benchmarks/colrv1-render.json"
+BACKENDS = ("skia", "cairo")  # Raster backends of blackrenderer, by preference
+STRINGS = ("Bitcount", "Hamburgefonstiv", "0123456789")
+SIZE = 48  # Pixels per em
+MARGIN = 8  # Pixels around the rendered string
+
+
+def surfaceClass(backendName=None):
+    """Answer the surface class of the backend, or of the first available raster
+    backend if backendName is None. Raise ImportError if there is none."""
+    for name in (backendName,) if backendName else BACKENDS:
+        result = getSurfaceClass(name, ".png")
+        if result is not None:
+            return result
+    raise ImportError(
+        "No blackrenderer backend of %s, install skia-python or pycairo"
+        % ", ".join((backendName,) if backendName else BACKENDS)
+    )
+
+
+def locationName(location):
+    """Answer the label of the location, like "SZP1=100,SZP2=100"."""
+    if not location:
+        return "default"
+    return ",".join("%s=%g" % (axis, value) for axis, value in location.items())
+
+
+def sweepLocations(font):
+    """Answer the list of locations to render the BlackRendererFont at: the default,
+    the minimum and maximum of every axis on its own, and all SZP axes at maximum."""
+    axes = font.ttFont["fvar"].axes
+    locations = [{}]
+    for axis in axes:
+        for value in (axis.minValue, axis.maxValue):
+            if value != axis.defaultValue:
+                locations.append({axis.axisTag: value})
+    sizeAxes = {
+        axis.axisTag: SMAX
+        for axis in axes
+        if axis.axisTag in COLOR_AXES and axis.axisTag.startswith("SZP")
+    }
+    if len(sizeAxes) > 1:
+        locations.append(sizeAxes)
+    return locations
+
+
+def renderString(font, surfaceClass, text, size=SIZE):
+    """Shape the text at the current location of the BlackRendererFont and render it.
+    Answer the total seconds and the list of (glyphName, seconds) of every glyph."""
+    buf = hb.Buffer()
+    buf.add_str(text)
+    buf.guess_segment_properties()
+    hb.shape(font.hbFont, buf)
+    glyphLine = buildGlyphLine(buf.glyph_infos, buf.glyph_positions, font.glyphNames)
+    scale = size / font.unitsPerEm
+    bounds = calcGlyphLineBounds(glyphLine, font) or (0, 0, 1, 1)
+    bounds = intRect(insetRect(scaleRect(bounds, scale, scale), -MARGIN, -MARGIN))
+    glyphTimes = []
+    t = time.perf_counter()
+    with surfaceClass().canvas(bounds) as canvas:
+        canvas.scale(scale)
+        for glyph in glyphLine:
+            with canvas.savedState():
+                canvas.translate(glyph.xOffset, glyph.yOffset)
+                tGlyph = time.perf_counter()
+                font.drawGlyph(glyph.name, canvas)
+                glyphTimes.append((glyph.name, time.perf_counter() - tGlyph))
+            canvas.translate(glyph.xAdvance, glyph.yAdvance)
+    return time.perf_counter() - t, glyphTimes
+
+
+def renderGlyph(font, surfaceClass, glyphName, size=SIZE):
+    """Render the glyph at the current location of the BlackRendererFont.
+    Answer the seconds it took, or None if the glyph has no bounds."""
+    bounds = font.getGlyphBounds(glyphName)
+    if bounds is None:
+        return None
+    scale = size / font.unitsPerEm
+    bounds = intRect(insetRect(scaleRect(bounds, scale, scale), -MARGIN, -MARGIN))
+    t = time.perf_counter()
+    with surfaceClass().canvas(bounds) as canvas:
+        canvas.scale(scale)
+        font.drawGlyph(glyphName, canvas)
+    return time.perf_counter() - t
+
+
+def benchmarkGlyphs(
+    path, glyphNames=None, locations=None, size=SIZE, repeat=1, backendName=None
+):
+    """Render every glyph of the color VF at path, default the color glyphs, at the
+    locations, `repeat` times. Answer the dictionary {locationName: {glyphName: ms}}
+    with the minimum milliseconds of every glyph that has bounds."""
+    surface = surfaceClass(backendName)
+    font = BlackRendererFont(path)
+    if glyphNames is None:
+        glyphNames = sorted(font.colrV1GlyphNames)
+    if locations is None:
+        locations = [{}]
+    if glyphNames:
+        renderGlyph(font, surface, glyphNames[0], size)  # Warm up the caches
+    result = {}
+    for location in locations:
+        font.setLocation(location)
+        times = result[locationName(location)] = {}
+        for glyphName in glyphNames:
+            seconds = [
+                renderGlyph(font, surface, glyphName, size) for _ in range(repeat)
+            ]
+            if seconds[0] is not None:
+                times[glyphName] = min(seconds) * 1000
+    return result
+
+
+def benchmarkFont(
+    path, strings=STRINGS, locations=None, size=SIZE, repeat=1, backendName=None
+):
+    """Render the strings with the color VF at path at every location, `repeat` times.
+    Answer the dictionary {locationName: dict(location, strings, glyphs)}, with the
+    minimum milliseconds and the number of glyphs of every string, and the median
+    milliseconds of every glyph name."""
+    surface = surfaceClass(backendName)
+    font = BlackRendererFont(path)
+    if locations is None:
+        locations = sweepLocations(font)
+    renderString(font, surface, strings[0], size)  # Warm up the caches of the font
+    result = {}
+    for location in locations:
+        font.setLocation(location)
+        stringTimes = {}
+        glyphTimes = {}
+        for text in strings:
+            times = []
+            for _ in range(repeat):
+                seconds, glyphs = renderString(font, surface, text, size)
+                times.append(seconds)
+                for glyphName, glyphSeconds in glyphs:
+                    glyphTimes.setdefault(glyphName, []).append(glyphSeconds)
+            stringTimes[text] = dict(ms=min(times) * 1000, glyphs=len(glyphs))
+        result[locationName(location)] = dict(
+            location=location,
+            strings=stringTimes,
+            glyphs={
+                name: statistics.median(values) * 1000
+                for name, values in glyphTimes.items()
+            },
+        )
+    return result
+
+
+def msPerGlyph(locationResult):
+    """Answer the milliseconds per glyph of all strings of a location result."""
+    strings = locationResult["strings"].values()
+    return sum(s["ms"] for s in strings) / max(1, sum(s["glyphs"] for s in strings))
+
+
+def readResults(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def writeResults(results, path=BASELINE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmpPath = path + ".tmp"
+    with open(tmpPath, "w") as f:
+        json.dump(results, f, indent=2)
+    os.replace(tmpPath, path)
+
+
+def compareResults(base, head, minMs=1):
+    """Answer the list of (fontName, locationName, text, baseMs, headMs, ratio) of the
+    strings that were rendered in both results. Strings faster than minMs in both
+    are too noisy to compare."""
+    result = []
+    for fontName, locations in head["fonts"].items():
+        baseLocations = base["fonts"].get(fontName, {})
+        for name, headLocation in locations.items():
+            baseLocation = baseLocations.get(name)
+            if baseLocation is None:
+                continue
+            for text, headString in headLocation["strings"].items():
+                baseString = baseLocation["strings"].get(text)
+                if baseString is None:
+                    continue
+                b, h = baseString["ms"], headString["ms"]
+                if max(b, h) < minMs:
+                    continue
+                result.append(
+                    (fontName, name, text, b, h, h / b if b else float("inf"))
+                )
+    return result
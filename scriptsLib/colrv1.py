@@ -6,10 +6,12 @@
 #   Scaled down in colrv1-layer=5x5x2.py and colrv1-layer=3x3x2.py
 #
 import sys
-from collections import defaultdict
 
 sys.path.append(".")
 from scriptsLib import SMIN, SDEF, SMAX, LDEF, LMIN, LMAX, POST_FIX, slnt_MIN, slnt_MAX
+from scriptsLib.components import componentPositions
+from scriptsLib.sharing import sharingReport
+from scriptsLib.simplify import simplifyPaints
 
 P = 100
 G = 5 * P  # Layer grid size, so we can divide into 7 spectrum colors
@@ -958,10 +960,9 @@ y_canvas1 = {
     (("YPN1", LMAX),): P + 2 * G,
 }
 
-layer1_pixel = PaintTranslate(
-    x_pixel1,
-    y_pixel1,
-    PaintTransform((scale_factor1, 0, 0, scale_factor1, 0, 0), layer1),
+# The translate is folded into the transform, one paint less for every pixel.
+layer1_pixel = PaintTransform(
+    (scale_factor1, 0, 0, scale_factor1, x_pixel1, y_pixel1), layer1
 )
 # layer1_canvas = PaintTranslate(
 #     x_canvas1, y_canvas1, PaintTransform((scale_factor1, 0, 0, scale_factor1, 0, 0), layer1)
@@ -1028,10 +1029,9 @@ y_canvas2 = {
 }
 
 # Foreground
-layer2_pixel = PaintTranslate(
-    x_pixel2,
-    y_pixel2,
-    PaintTransform((scale_factor2, 0, 0, scale_factor2, 0, 0), layer2),
+# The translate is folded into the transform, one paint less for every pixel.
+layer2_pixel = PaintTransform(
+    (scale_factor2, 0, 0, scale_factor2, x_pixel2, y_pixel2), layer2
 )
 # layer2_canvas = PaintTranslate(
 #     x_canvas2, y_canvas2, PaintTransform((scale_factor2, 0, 0, scale_factor2, 0, 0), layer2)
@@ -1046,6 +1046,8 @@ glyphs[pixelGlyphName] = PaintColrLayers(
         PaintGlyph(pixelGlyphName, layer2_pixel),  # Foreground
     ]
 )
+# All pixels in all glyphs paint the same, so they can share one paint object.
+pixelPaint = PaintColrGlyph(pixelGlyphName)
 
 ##
 # Applying the pixels
@@ -1075,7 +1077,7 @@ def buildPixelGlyph(glyphName, pixelPositions, layer1, layer2):  # , layer3):
                 )
             )
         else:
-            layers.append(PaintTranslate(x, y, PaintColrGlyph(pixelGlyphName)))
+            layers.append(PaintTranslate(x, y, pixelPaint))
             # layers.append(PaintTranslate(x, y, PaintColrLayers([
             #         PaintGlyph(pixelGlyphName, layer1), # Background
             #         PaintGlyph(pixelGlyphName, layer2)  # Foreground
@@ -1084,7 +1086,7 @@ def buildPixelGlyph(glyphName, pixelPositions, layer1, layer2):  # , layer3):
 
 
 # Now admittedly this is complicated, because the "pixel position"
-# differs across the design space. To make this work, the returned
+# differs across the design space. To make this work, the pixel
 # coordinates will actually be "variable points" like those we
 # created above (for the centers of our radial gradients), specifying
 # how each pixel moves in the designspace.
@@ -1092,41 +1094,70 @@ def buildPixelGlyph(glyphName, pixelPositions, layer1, layer2):  # , layer3):
 # (at this point - I think we might need to do the same for the width
 # axis in compressed fonts), so we gather each pixel position at the
 # extremes of that axis, and turn them into a dictionary.
-def pixelPositions(f, gName):
-    # pixelNames = defaultdict(dict)
-    positions_x = defaultdict(dict)
-    positions_y = defaultdict(dict)
-    # pixelPositions = []
-    for slnt_ax in [slnt_MIN, slnt_MAX]:
-        location = {"slnt": slnt_ax}
-        # We are working on the (binary) TTFont, so we have to do
-        # horrible magic to find the component locations.
-        gs = font.getGlyphSet(location=location)
-        glyph = gs[gName]._getGlyphInstance()
-        if not hasattr(glyph, "components"):
-            return []
-        for ix, component in enumerate(glyph.components):
-            # pixelPositions.append((component.glyphName, component.x, component.y))
-            # pixelNames[ix][tuple(location.items())] = component.glyphName
-            positions_x[ix][tuple(location.items())] = component.x
-            positions_y[ix][tuple(location.items())] = component.y
-    return list(zip(list(positions_x.values()), list(positions_y.values())))
-    # return list(zip(list(pixelNames.values()), list(positions_x.values()), list(positions_y.values())))
-    # return pixelPositions
+# We are working on the (binary) TTFont, so the component offsets of all
+# glyphs are read from glyf and gvar in one go. Glyphs without components
+# are not in PIXEL_POSITIONS.
+PIXEL_POSITIONS = componentPositions(
+    font, [(("slnt", slnt_ax),) for slnt_ax in [slnt_MIN, slnt_MAX]]
+)
 
 
 # OK, we are finally ready to create the paint trees for each glyph.
 # We do this by adding an entry into the "glyphs" dictionary mapping
 # the glyph name to the paint tree.
-
+# Many glyphs have exactly the same pixels, e.g. accented glyphs in Grid and
+# alternates that repeat their base glyph. They get a PaintColrGlyph of the
+# first glyph with that bitmap, sharing its paint tree.
+# Glyphs that are a single component reference to another glyph in glyf
+# (copyMasters with dedupe) refer to the paint of that glyph in the same way.
+
+bitmaps = {}  # Pixel positions --> name of the first glyph with that bitmap
+sharedPaints = {}  # Glyph name --> name of the glyph whose paint tree it refers to
+glyfReferences = []  # Names of the glyphs that are a single component reference
+savedPaints = 0
+glyfTable = font["glyf"]
 for glyphName in font.getGlyphOrder():
     if glyphName.startswith("el_"):
         continue
     if glyphName == pixelGlyphName:  # We did this already
         continue
+    positions = PIXEL_POSITIONS.get(glyphName, [])
+    if positions and glyphName != "canvas":
+        components = glyfTable[glyphName].components
+        if len(components) == 1 and components[0].glyphName != pixelGlyphName:
+            x, y = positions[0]
+            paint = PaintColrGlyph(components[0].glyphName)
+            if any(x.values()) or any(y.values()):
+                paint = PaintTranslate(x, y, paint)
+            glyphs[glyphName] = paint
+            sharedPaints[glyphName] = components[0].glyphName
+            glyfReferences.append(glyphName)
+            continue
+        bitmap = tuple((tuple(x.items()), tuple(y.items())) for x, y in positions)
+        if bitmap in bitmaps:
+            glyphs[glyphName] = PaintColrGlyph(bitmaps[bitmap])
+            sharedPaints[glyphName] = bitmaps[bitmap]
+            # Its own tree would have a PaintTranslate and a PaintColrGlyph per
+            # pixel and a PaintColrLayers, instead of this PaintColrGlyph.
+            savedPaints += 2 * len(positions)
+            continue
+        bitmaps[bitmap] = glyphName
+    # One PaintColrGlyph per pixel, that is now pixelPaint. The first position
+    # of the canvas paints the _canvas glyph instead.
+    savedPaints += len(positions) - (glyphName == "canvas" and len(positions) > 0)
     glyphs[glyphName] = buildPixelGlyph(
         glyphName,
-        pixelPositions(font, glyphName),
+        positions,
         layer1_pixel,  # Background
         layer2_pixel,  # Foreground
     )
+print("... COLRv1 simplify: %s" % simplifyPaints(glyphs))
+print(
+    "... COLRv1: %d glyphs share the paint tree of another glyph, %d paint objects "
+    "saved, %s"
+    % (
+        len(sharedPaints),
+        savedPaints,
+        sharingReport(font, glyphs, sharedPaints, glyfReferences),
+    )
+)
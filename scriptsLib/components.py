@@ -0,0 +1,61 @@
+# -*- coding: UTF-8 -*-
+#
+#   Read the positions of the components (the pixels) of all composite glyphs
+#   in a compiled VF in one pass, for a few locations in the design space.
+#
+#   Instancing each glyph with font.getGlyphSet(location)[glyphName] builds a
+#   glyph set and interpolates the full glyph for every glyph and location.
+#   Bitcount glyphs are composites of pixels, so only the component offsets
+#   in glyf and the gvar deltas of those offsets are needed.
+#
+import struct
+
+from fontTools.ttLib.tables._g_l_y_f import GlyphCoordinates
+from fontTools.varLib.models import supportScalar
+
+
+def isComposite(glyfTable, glyphName):
+    """Answer True if the glyph is a composite, without decompiling it."""
+    glyph = glyfTable.glyphs[glyphName]
+    if hasattr(glyph, "data"):  # Not expanded yet, read numberOfContours
+        return struct.unpack(">h", glyph.data[:2])[0] < 0
+    return glyph.isComposite()
+
+
+def componentPositions(font, locations):
+    """Answer the dictionary {glyphName: [(x, y), ...]} of the components of all
+    composite glyphs in the TTFont. The x and y of each component are dictionaries
+    {location: value} for each of the `locations`, which are tuples of (axisTag, value)
+    pairs in user coordinates, as paintcompiler takes for variable values.
+    Glyphs that are not composites are not in the dictionary."""
+    glyfTable = font["glyf"]
+    variations = font["gvar"].variations if "gvar" in font else {}
+    normalized = [font.normalizeLocation(dict(location)) for location in locations]
+
+    positions = {}
+    for glyphName in font.getGlyphOrder():
+        if not isComposite(glyfTable, glyphName):
+            continue
+        components = glyfTable[glyphName].components
+        count = len(components)
+        offsets = GlyphCoordinates([(c.x, c.y) for c in components])
+        deltas = []
+        for var in variations.get(glyphName, ()):
+            # One point per component, followed by the 4 phantom points.
+            # Composites have no outline to interpolate missing deltas from, they are 0.
+            delta = [d or (0, 0) for d in var.coordinates[:count]]
+            deltas.append((var.axes, GlyphCoordinates(delta)))
+
+        xs = [{} for _ in range(count)]
+        ys = [{} for _ in range(count)]
+        for location, normLocation in zip(locations, normalized):
+            coordinates = GlyphCoordinates(offsets)
+            for axes, delta in deltas:
+                scalar = supportScalar(normLocation, axes)
+                if scalar:
+                    coordinates += delta * scalar
+            for ix, (x, y) in enumerate(coordinates):
+                xs[ix][location] = x
+                ys[ix][location] = y
+        positions[glyphName] = list(zip(xs, ys))
+    return positions
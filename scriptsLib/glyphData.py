@@ -4,21 +4,22 @@
 #
 #
 #   Glyph data for each glyph stored here.
+#   The pixel data of the masters is generated by PixelCatalog, from ELSH2VALUE
+#   and the axes, more shapes or weights only need a change there.
 #
 
 
 from scriptsLib import (
-    BLACK,
     CLOSED_QUAD,
     ELSH2VALUE,
     ELSH_DEF,
+    ELXP_AXIS,
     ELXP_DEF,
-    ELXP_QUAD,
     REGULAR,
-    THIN,
+    wght_AXIS,
     wght_DEF,
+    slnt_AXIS,
     slnt_DEF,
-    ITALIC,
     ROMAN,
 )
 
@@ -113,266 +114,118 @@ GD = GlyphData
 
 DEFAULT_PIXEL_NAME = "Pix01@10"
 
-# Keep GlyphData instances, that know about the design space location of the pixel glyph.
-PIXEL_DATA = {
-    # Roman
-    # Glyph names of the pixels have this format:
-    # Pix<ELSHIndex>@<wghtIndex><open>
-    # wght=3, italic=2, open=2, shape=12
-    # Add "_i" for the italic pixel varant. Circles remain circles, but verticals get slanted."
-    "Pix01@00": GD(ELSHIndex=1, wght=THIN),
-    "Pix01@00_i": GD(ELSHIndex=1, wght=THIN, slnt=ITALIC),
-    "Pix01@01": GD(ELSHIndex=1, wght=THIN, ELXP=ELXP_QUAD),
-    "Pix01@01_i": GD(ELSHIndex=1, wght=THIN, ELXP=ELXP_QUAD, slnt=ITALIC),
-    DEFAULT_PIXEL_NAME: GD(
-        ELSHIndex=1,
-        wght=REGULAR,
-    ),
-    "Pix01@10_i": GD(ELSHIndex=1, wght=REGULAR, slnt=ITALIC),
-    "Pix01@11": GD(ELSHIndex=1, wght=REGULAR, ELXP=ELXP_QUAD),
-    "Pix01@11_i": GD(ELSHIndex=1, wght=REGULAR, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix01@20": GD(
-        ELSHIndex=1,
-        wght=BLACK,
-    ),
-    "Pix01@20_i": GD(ELSHIndex=1, wght=BLACK, slnt=ITALIC),
-    "Pix01@21": GD(ELSHIndex=1, wght=BLACK, ELXP=ELXP_QUAD),
-    "Pix01@21_i": GD(ELSHIndex=1, wght=BLACK, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix02@00": GD(
-        ELSHIndex=2,
-        wght=THIN,
-    ),
-    "Pix02@00_i": GD(ELSHIndex=2, wght=THIN, slnt=ITALIC),
-    "Pix02@01": GD(ELSHIndex=2, wght=THIN, ELXP=ELXP_QUAD),
-    "Pix02@01_i": GD(ELSHIndex=2, wght=THIN, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix02@10": GD(
-        ELSHIndex=2,
-        wght=REGULAR,
-    ),
-    "Pix02@10_i": GD(ELSHIndex=2, wght=REGULAR, slnt=ITALIC),
-    "Pix02@11": GD(ELSHIndex=2, wght=REGULAR, ELXP=ELXP_QUAD),
-    "Pix02@11_i": GD(ELSHIndex=2, wght=REGULAR, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix02@20": GD(
-        ELSHIndex=2,
-        wght=BLACK,
-    ),
-    "Pix02@20_i": GD(ELSHIndex=2, wght=BLACK, slnt=ITALIC),
-    "Pix02@21": GD(ELSHIndex=2, wght=BLACK, ELXP=ELXP_QUAD),
-    "Pix02@21_i": GD(ELSHIndex=2, wght=BLACK, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix03@00": GD(
-        ELSHIndex=3,
-        wght=THIN,
-    ),
-    "Pix03@00_i": GD(ELSHIndex=3, wght=THIN, slnt=ITALIC),
-    "Pix03@01": GD(ELSHIndex=3, wght=THIN, ELXP=ELXP_QUAD),
-    "Pix03@01_i": GD(ELSHIndex=3, wght=THIN, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix03@10": GD(
-        ELSHIndex=3,
-        wght=REGULAR,
-    ),
-    "Pix03@10_i": GD(ELSHIndex=3, wght=REGULAR, slnt=ITALIC),
-    "Pix03@11": GD(ELSHIndex=3, wght=REGULAR, ELXP=ELXP_QUAD),
-    "Pix03@11_i": GD(ELSHIndex=3, wght=REGULAR, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix03@20": GD(
-        ELSHIndex=3,
-        wght=BLACK,
-    ),
-    "Pix03@20_i": GD(ELSHIndex=3, wght=BLACK, slnt=ITALIC),
-    "Pix03@21": GD(ELSHIndex=3, wght=BLACK, ELXP=ELXP_QUAD),
-    "Pix03@21_i": GD(ELSHIndex=3, wght=BLACK, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix04@00": GD(
-        ELSHIndex=4,
-        wght=THIN,
-    ),
-    "Pix04@00_i": GD(ELSHIndex=4, wght=THIN, slnt=ITALIC),
-    "Pix04@01": GD(ELSHIndex=4, wght=THIN, ELXP=ELXP_QUAD),
-    "Pix04@01_i": GD(ELSHIndex=4, wght=THIN, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix04@10": GD(
-        ELSHIndex=4,
-        wght=REGULAR,
-    ),
-    "Pix04@10_i": GD(ELSHIndex=4, wght=REGULAR, slnt=ITALIC),
-    "Pix04@11": GD(ELSHIndex=4, wght=REGULAR, ELXP=ELXP_QUAD),
-    "Pix04@11_i": GD(ELSHIndex=4, wght=REGULAR, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix04@20": GD(
-        ELSHIndex=4,
-        wght=BLACK,
-    ),
-    "Pix04@20_i": GD(ELSHIndex=4, wght=BLACK, slnt=ITALIC),
-    "Pix04@21": GD(ELSHIndex=4, wght=BLACK, ELXP=ELXP_QUAD),
-    "Pix04@21_i": GD(ELSHIndex=4, wght=BLACK, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix05@00": GD(
-        ELSHIndex=5,
-        wght=THIN,
-    ),
-    "Pix05@00_i": GD(ELSHIndex=5, wght=THIN, slnt=ITALIC),
-    "Pix05@01": GD(ELSHIndex=5, wght=THIN, ELXP=ELXP_QUAD),
-    "Pix05@01_i": GD(ELSHIndex=5, wght=THIN, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix05@10": GD(
-        ELSHIndex=5,
-        wght=REGULAR,
-    ),
-    "Pix05@10_i": GD(ELSHIndex=5, wght=REGULAR, slnt=ITALIC),
-    "Pix05@11": GD(ELSHIndex=5, wght=REGULAR, ELXP=ELXP_QUAD),
-    "Pix05@11_i": GD(ELSHIndex=5, wght=REGULAR, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix05@20": GD(
-        ELSHIndex=5,
-        wght=BLACK,
-    ),
-    "Pix05@20_i": GD(ELSHIndex=5, wght=BLACK, slnt=ITALIC),
-    "Pix05@21": GD(ELSHIndex=5, wght=BLACK, ELXP=ELXP_QUAD),
-    "Pix05@21_i": GD(ELSHIndex=5, wght=BLACK, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix06@00": GD(
-        ELSHIndex=6,
-        wght=THIN,
-    ),
-    "Pix06@00_i": GD(ELSHIndex=6, wght=THIN, slnt=ITALIC),
-    "Pix06@01": GD(ELSHIndex=6, wght=THIN, ELXP=ELXP_QUAD),
-    "Pix06@01_i": GD(ELSHIndex=6, wght=THIN, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix06@10": GD(
-        ELSHIndex=6,
-        wght=REGULAR,
-    ),
-    "Pix06@10_i": GD(ELSHIndex=6, wght=REGULAR, slnt=ITALIC),
-    "Pix06@11": GD(ELSHIndex=6, wght=REGULAR, ELXP=ELXP_QUAD),
-    "Pix06@11_i": GD(ELSHIndex=6, wght=REGULAR, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix06@20": GD(
-        ELSHIndex=6,
-        wght=BLACK,
-    ),
-    "Pix06@20_i": GD(ELSHIndex=6, wght=BLACK, slnt=ITALIC),
-    "Pix06@21": GD(ELSHIndex=6, wght=BLACK, ELXP=ELXP_QUAD),
-    "Pix06@21_i": GD(ELSHIndex=6, wght=BLACK, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix07@00": GD(
-        ELSHIndex=7,
-        wght=THIN,
-    ),
-    "Pix07@00_i": GD(ELSHIndex=7, wght=THIN, slnt=ITALIC),
-    "Pix07@01": GD(ELSHIndex=7, wght=THIN, ELXP=ELXP_QUAD),
-    "Pix07@01_i": GD(ELSHIndex=7, wght=THIN, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix07@10": GD(
-        ELSHIndex=7,
-        wght=REGULAR,
-    ),
-    "Pix07@10_i": GD(ELSHIndex=7, wght=REGULAR, slnt=ITALIC),
-    "Pix07@11": GD(ELSHIndex=7, wght=REGULAR, ELXP=ELXP_QUAD),
-    "Pix07@11_i": GD(ELSHIndex=7, wght=REGULAR, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix07@20": GD(
-        ELSHIndex=7,
-        wght=BLACK,
-    ),
-    "Pix07@20_i": GD(ELSHIndex=7, wght=BLACK, slnt=ITALIC),
-    "Pix07@21": GD(ELSHIndex=7, wght=BLACK, ELXP=ELXP_QUAD),
-    "Pix07@21_i": GD(ELSHIndex=7, wght=BLACK, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix08@00": GD(
-        ELSHIndex=8,
-        wght=THIN,
-    ),
-    "Pix08@00_i": GD(ELSHIndex=8, wght=THIN, slnt=ITALIC),
-    "Pix08@01": GD(ELSHIndex=8, wght=THIN, ELXP=ELXP_QUAD),
-    "Pix08@01_i": GD(ELSHIndex=8, wght=THIN, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix08@10": GD(
-        ELSHIndex=8,
-        wght=REGULAR,
-    ),
-    "Pix08@10_i": GD(ELSHIndex=8, wght=REGULAR, slnt=ITALIC),
-    "Pix08@11": GD(ELSHIndex=8, wght=REGULAR, ELXP=ELXP_QUAD),
-    "Pix08@11_i": GD(ELSHIndex=8, wght=REGULAR, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix08@20": GD(
-        ELSHIndex=8,
-        wght=BLACK,
-    ),
-    "Pix08@20_i": GD(ELSHIndex=8, wght=BLACK, slnt=ITALIC),
-    "Pix08@21": GD(ELSHIndex=8, wght=BLACK, ELXP=ELXP_QUAD),
-    "Pix08@21_i": GD(ELSHIndex=8, wght=BLACK, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix09@00": GD(
-        ELSHIndex=9,
-        wght=THIN,
-    ),
-    "Pix09@00_i": GD(ELSHIndex=9, wght=THIN, slnt=ITALIC),
-    "Pix09@01": GD(ELSHIndex=9, wght=THIN, ELXP=ELXP_QUAD),
-    "Pix09@01_i": GD(ELSHIndex=9, wght=THIN, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix09@10": GD(
-        ELSHIndex=9,
-        wght=REGULAR,
-    ),
-    "Pix09@10_i": GD(ELSHIndex=9, wght=REGULAR, slnt=ITALIC),
-    "Pix09@11": GD(ELSHIndex=9, wght=REGULAR, ELXP=ELXP_QUAD),
-    "Pix09@11_i": GD(ELSHIndex=9, wght=REGULAR, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix09@20": GD(
-        ELSHIndex=9,
-        wght=BLACK,
-    ),
-    "Pix09@20_i": GD(ELSHIndex=9, wght=BLACK, slnt=ITALIC),
-    "Pix09@21": GD(ELSHIndex=9, wght=BLACK, ELXP=ELXP_QUAD),
-    "Pix09@21_i": GD(ELSHIndex=9, wght=BLACK, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix10@00": GD(
-        ELSHIndex=10,
-        wght=THIN,
-    ),
-    "Pix10@00_i": GD(ELSHIndex=10, wght=THIN, slnt=ITALIC),
-    "Pix10@01": GD(ELSHIndex=10, wght=THIN, ELXP=ELXP_QUAD),
-    "Pix10@01_i": GD(ELSHIndex=10, wght=THIN, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix10@10": GD(
-        ELSHIndex=10,
-        wght=REGULAR,
-    ),
-    "Pix10@10_i": GD(ELSHIndex=10, wght=REGULAR, slnt=ITALIC),
-    "Pix10@11": GD(ELSHIndex=10, wght=REGULAR, ELXP=ELXP_QUAD),
-    "Pix10@11_i": GD(ELSHIndex=10, wght=REGULAR, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix10@20": GD(
-        ELSHIndex=10,
-        wght=BLACK,
-    ),
-    "Pix10@20_i": GD(ELSHIndex=10, wght=BLACK, slnt=ITALIC),
-    "Pix10@21": GD(ELSHIndex=10, wght=BLACK, ELXP=ELXP_QUAD),
-    "Pix10@21_i": GD(ELSHIndex=10, wght=BLACK, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix11@00": GD(
-        ELSHIndex=11,
-        wght=THIN,
-    ),
-    "Pix11@00_i": GD(ELSHIndex=11, wght=THIN, slnt=ITALIC),
-    "Pix11@01": GD(ELSHIndex=11, wght=THIN, ELXP=ELXP_QUAD),
-    "Pix11@01_i": GD(ELSHIndex=11, wght=THIN, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix11@10": GD(
-        ELSHIndex=11,
-        wght=REGULAR,
-    ),
-    "Pix11@10_i": GD(ELSHIndex=11, wght=REGULAR, slnt=ITALIC),
-    "Pix11@11": GD(ELSHIndex=11, wght=REGULAR, ELXP=ELXP_QUAD),
-    "Pix11@11_i": GD(ELSHIndex=11, wght=REGULAR, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix11@20": GD(
-        ELSHIndex=11,
-        wght=BLACK,
-    ),
-    "Pix11@20_i": GD(ELSHIndex=11, wght=BLACK, slnt=ITALIC),
-    "Pix11@21": GD(ELSHIndex=11, wght=BLACK, ELXP=ELXP_QUAD),
-    "Pix11@21_i": GD(ELSHIndex=11, wght=BLACK, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix12@00": GD(
-        ELSHIndex=12,
-        wght=THIN,
-    ),
-    "Pix12@00_i": GD(ELSHIndex=12, wght=THIN, slnt=ITALIC),
-    "Pix12@01": GD(ELSHIndex=12, wght=THIN, ELXP=ELXP_QUAD),
-    "Pix12@01_i": GD(ELSHIndex=12, wght=THIN, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix12@10": GD(
-        ELSHIndex=12,
-        wght=REGULAR,
-    ),
-    "Pix12@10_i": GD(ELSHIndex=12, wght=REGULAR, slnt=ITALIC),
-    "Pix12@11": GD(ELSHIndex=12, wght=REGULAR, ELXP=ELXP_QUAD),
-    "Pix12@11_i": GD(ELSHIndex=12, wght=REGULAR, ELXP=ELXP_QUAD, slnt=ITALIC),
-    "Pix12@20": GD(
-        ELSHIndex=12,
-        wght=BLACK,
-    ),
-    "Pix12@20_i": GD(ELSHIndex=12, wght=BLACK, slnt=ITALIC),
-    "Pix12@21": GD(ELSHIndex=12, wght=BLACK, ELXP=ELXP_QUAD),
-    "Pix12@21_i": GD(ELSHIndex=12, wght=BLACK, ELXP=ELXP_QUAD, slnt=ITALIC),
-}
-# Add the key as name to the GlyphData instances.
-for name, gd in PIXEL_DATA.items():
-    gd.name = name
+
+class PixelData:
+    """Design space location of a pixel glyph in Bitcount-VariationPixels.ufo, the
+    px glyph of the master at that location."""
+
+    __slots__ = ("name", "ELSHIndex", "wght", "ELXP", "ELSH", "slnt")
+
+    def __init__(self, name, ELSHIndex, wght, ELXP, slnt):
+        self.name = name
+        self.ELSHIndex = ELSHIndex
+        self.wght = wght
+        self.ELXP = ELXP
+        self.ELSH = ELSH2VALUE[ELSHIndex]  # Axis value of the shape index
+        self.slnt = slnt
+
+    def __repr__(self):
+        return "<%s /%s>" % (self.__class__.__name__, self.name)
+
+    @property
+    def location(self):
+        """Answer the (wght, ELXP, ELSH, slnt) tuple of the master."""
+        return self.wght, self.ELXP, self.ELSH, self.slnt
+
+    @property
+    def is_default(self):
+        return (
+            self.wght == wght_DEF
+            and self.ELXP == ELXP_DEF
+            and self.ELSH == ELSH_DEF
+            and self.slnt == slnt_DEF
+        )
+
+
+class PixelCatalog:
+    """The PixelData of every master location, generated from the shapes and the
+    axes. Glyph names of the pixels have this format:
+    Pix<ELSHIndex>@<wghtIndex><open>, with "_i" added for the italic pixel variant.
+    Circles remain circles, but verticals get slanted.
+    The catalog reads as the dictionary {pixelName: PixelData}, in the order of the
+    names. Lookups by name and by location tuple are dictionary lookups."""
+
+    def __init__(
+        self,
+        shapes=ELSH2VALUE,
+        wghtAxis=wght_AXIS,
+        ELXPAxis=ELXP_AXIS,
+        slntAxis=slnt_AXIS,
+    ):
+        weights = sorted(set(wghtAxis))
+        expansions = sorted(set(ELXPAxis))
+        # Roman first, then italic
+        slants = sorted(set(slntAxis), key=lambda slnt: (slnt != slnt_DEF, slnt))
+        self._byName = {}
+        for ELSHIndex in sorted(shapes):
+            for wghtIndex, wght in enumerate(weights):
+                for openIndex, ELXP in enumerate(expansions):
+                    for slnt in slants:
+                        name = "Pix%02d@%d%d%s" % (
+                            ELSHIndex,
+                            wghtIndex,
+                            openIndex,
+                            "" if slnt == slnt_DEF else "_i",
+                        )
+                        self._byName[name] = PixelData(
+                            name, ELSHIndex, wght, ELXP, slnt
+                        )
+        self._byLocation = {pd.location: pd for pd in self._byName.values()}
+        self._locationOrder = [
+            self._byLocation[location] for location in sorted(self._byLocation)
+        ]
+
+    def __repr__(self):
+        return "<%s %d pixels>" % (self.__class__.__name__, len(self))
+
+    def __len__(self):
+        return len(self._byName)
+
+    def __iter__(self):
+        return iter(self._byName)
+
+    def __contains__(self, name):
+        return name in self._byName
+
+    def __getitem__(self, name):
+        return self._byName[name]
+
+    def get(self, name, default=None):
+        return self._byName.get(name, default)
+
+    def keys(self):
+        return self._byName.keys()
+
+    def values(self):
+        return self._byName.values()
+
+    def items(self):
+        return self._byName.items()
+
+    def atLocation(self, location, default=None):
+        """Answer the PixelData at the (wght, ELXP, ELSH, slnt) location, or default
+        if there is no master there."""
+        return self._byLocation.get(tuple(location), default)
+
+    def inLocationOrder(self):
+        """Answer the list of PixelData sorted by location, wght first, the order of
+        the sources in the design space."""
+        return self._locationOrder
+
+
+# Keep PixelData instances, that know about the design space location of the pixel glyph.
+# wght=3, italic=2, open=2, shape=12
+PIXEL_DATA = PixelCatalog()
 
 # Build the pixel layer, where each position in the matrics refers
 # to a separate pixel glyph
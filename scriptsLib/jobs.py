@@ -0,0 +1,86 @@
+# -*- coding: UTF-8 -*-
+#
+#   Helpers to run the build of a design space as an isolated job.
+#   Output of the job (Python prints and subprocess output) gets prefixed
+#   per job, so the logs of parallel builds stay readable.
+#
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from scriptsLib.trace import TRACER
+
+
+class PrefixedWriter:
+    """Wrap a text stream and write each complete line with a prefix,
+    so lines from parallel jobs don't get mixed up halfway."""
+
+    def __init__(self, stream, prefix):
+        self.stream = stream
+        self.prefix = prefix
+        self._buffer = ""
+
+    def write(self, s):
+        self._buffer += s
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            self.stream.write(self.prefix + line + "\n")
+            self.stream.flush()
+        return len(s)
+
+    def flush(self):
+        if self._buffer:
+            self.stream.write(self.prefix + self._buffer)
+            self._buffer = ""
+        self.stream.flush()
+
+
+def startJob(dsParams):
+    """Prepare the current process to run the job of this design space.
+    Prefix all output with the job name and point the temporary directory
+    to a clean scratch directory for this job only."""
+    prefix = "[%s-%s] " % (dsParams.variant, dsParams.stem)
+    if isinstance(sys.stdout, PrefixedWriter):
+        sys.stdout.prefix = sys.stderr.prefix = prefix
+    else:
+        sys.stdout = PrefixedWriter(sys.stdout, prefix)
+        sys.stderr = PrefixedWriter(sys.stderr, prefix)
+        # Show the log of the tools that run in-process, like fontmake does
+        # from the command line.
+        logging.basicConfig(
+            stream=sys.stderr,
+            level=logging.INFO,
+            format="%(levelname)s:%(name)s:%(message)s",
+            force=True,
+        )
+    scratchPath = dsParams.scratchPath
+    if os.path.exists(scratchPath):
+        shutil.rmtree(scratchPath)
+    os.makedirs(scratchPath)
+    os.environ["TMPDIR"] = os.path.abspath(scratchPath)
+    tempfile.tempdir = None  # Force tempfile to read TMPDIR again
+
+
+def runCommand(cmd, shell=False):
+    """Run the command, sending its output through our (prefixed) stdout.
+    Raise subprocess.CalledProcessError if the command fails.
+    The resource usage of the command is reported to TRACER."""
+    process = subprocess.Popen(
+        cmd,
+        shell=shell,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    with TRACER.childProcess(process):
+        for line in process.stdout:
+            sys.stdout.write(line)
+        process.stdout.close()
+        # Wait with wait4, to get the resource usage of this process only.
+        _, status, process.rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, cmd)
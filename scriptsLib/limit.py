@@ -0,0 +1,182 @@
+# -*- coding: UTF-8 -*-
+#
+#   Reduced-axis VFs, made from the finished VFs with the instancer of fontTools.
+#
+#   Most pages only use wght and slnt, but every VF carries CRSV, ELSH and ELXP
+#   with all their master regions in gvar. The limits are a dictionary like
+#   AXIS_LIMITS, {axisTag: limit}, where the limit is
+#
+#   - None, the axis is pinned at its default and removed,
+#   - a number, the axis is pinned at that value and removed,
+#   - (minimum, maximum), the range of the axis is narrowed.
+#
+#   Axes that are not in a font are ignored. The name of a limited VF has the
+#   axes that are left, in the scheme of DesignSpaceParams.vfName, it is written
+#   in LIMITED_VF_PATH, so the QA of fonts/ttf does not change.
+#
+#       python3 scripts/build.py --limit-axes
+#       python3 scripts/build.py --limit-axes --axis-limits CRSV,ELSH,ELXP,wght=300:700
+#
+#   limitReport compares a limited VF with its full VF: the size of the variation
+#   tables and the time of shaping with HarfBuzz and rasterizing with FreeType,
+#   at the maximum of the axes that are left.
+#
+import logging
+import os
+import time
+
+from fontTools.ttLib import TTFont
+from fontTools.varLib import instancer
+
+from scriptsLib import AXIS_LIMITS, LIMITED_VF_PATH
+
+VARIATION_TABLES = ("gvar", "HVAR", "MVAR", "COLR")
+SAMPLE = "Bitcount Hamburgefonstiv 0123456789"
+SIZE = 48  # Pixels per em of the rasterizing
+
+# The instancer logs every table it changes, only show its warnings in the build.
+logging.getLogger("fontTools.varLib.instancer").setLevel(logging.WARNING)
+
+
+def parseLimits(value):
+    """Answer the limits dictionary of a string like "CRSV,ELSH=0,wght=300:700".
+    An axis without value is pinned at its default."""
+    limits = {}
+    for item in value.split(","):
+        if not item:
+            continue
+        axis, _, limit = item.partition("=")
+        if not limit:
+            limits[axis] = None
+        elif ":" in limit:
+            minimum, maximum = limit.split(":")
+            limits[axis] = (float(minimum), float(maximum))
+        else:
+            limits[axis] = float(limit)
+    return limits
+
+
+def formatLimits(limits):
+    """Answer the limits as a string that parseLimits reads."""
+    items = []
+    for axis, limit in limits.items():
+        if limit is None:
+            items.append(axis)
+        elif isinstance(limit, tuple):
+            items.append("%s=%g:%g" % (axis, *limit))
+        else:
+            items.append("%s=%g" % (axis, limit))
+    return ",".join(items)
+
+
+def limitedAxes(axes, limits=AXIS_LIMITS):
+    """Answer the axis tags of `axes` that are not pinned by the limits."""
+    return [axis for axis in axes if isinstance(limits.get(axis, ()), tuple)]
+
+
+def limitedPath(dsParams, axes, limits=AXIS_LIMITS):
+    """Answer the path of the limited VF of the VF of the design space with these
+    axes, in the name scheme of DesignSpaceParams.vfName."""
+    return LIMITED_VF_PATH + dsParams.axesVfName(limitedAxes(axes, limits))
+
+
+def limitVF(path, dstPath, limits=AXIS_LIMITS):
+    """Write the VF at path, limited to the limits, to dstPath."""
+    ttFont = TTFont(path)
+    tags = {axis.axisTag for axis in ttFont["fvar"].axes}
+    limits = {axis: limit for axis, limit in limits.items() if axis in tags}
+    ttFont = instancer.instantiateVariableFont(ttFont, limits)
+    os.makedirs(os.path.dirname(dstPath), exist_ok=True)
+    ttFont.save(dstPath)
+
+
+def tableSizes(path):
+    """Answer the dictionary {tag: bytes} of the VARIATION_TABLES in the font at path
+    and the size of the file as "total"."""
+    ttFont = TTFont(path)
+    sizes = {
+        tag: ttFont.reader.tables[tag].length
+        for tag in VARIATION_TABLES
+        if tag in ttFont.reader.tables
+    }
+    with open(path, "rb") as f:
+        sizes["total"] = len(f.read())
+    return sizes
+
+
+def maxLocation(path):
+    """Answer the location of the font at path, with all axes at their maximum,
+    or at their minimum for an axis that has its default at the maximum (slnt)."""
+    return {
+        axis.axisTag: (
+            axis.minValue if axis.defaultValue == axis.maxValue else axis.maxValue
+        )
+        for axis in TTFont(path)["fvar"].axes
+    }
+
+
+def shapeTime(path, location, text=SAMPLE, repeat=1000):
+    """Answer the microseconds to shape the text with HarfBuzz at the location."""
+    import uharfbuzz as hb
+
+    with open(path, "rb") as f:
+        font = hb.Font(hb.Face(f.read()))
+    font.set_variations(location)
+    t = time.perf_counter()
+    for _ in range(repeat):
+        buf = hb.Buffer()
+        buf.add_str(text)
+        buf.guess_segment_properties()
+        hb.shape(font, buf)
+    return (time.perf_counter() - t) * 1e6 / repeat
+
+
+def rasterTime(path, location, text=SAMPLE, size=SIZE, repeat=5):
+    """Answer the microseconds to rasterize the glyphs of the text with FreeType
+    at the location."""
+    import freetype
+
+    face = freetype.Face(path)
+    axes = face.get_variation_info().axes
+    face.set_var_design_coords([location.get(axis.tag, axis.default) for axis in axes])
+    face.set_pixel_sizes(0, size)
+    glyphIndices = [face.get_char_index(c) for c in text]
+    t = time.perf_counter()
+    for _ in range(repeat):
+        for glyphIndex in glyphIndices:
+            face.load_glyph(glyphIndex, freetype.FT_LOAD_RENDER)
+    return (time.perf_counter() - t) * 1e6 / repeat
+
+
+def limitReport(path, limitedPath):
+    """Answer the dictionary with the sizes of the variation tables and the shape
+    and raster times of the full VF at path and the limited VF at limitedPath, as
+    {key: (full, limited)}. The times are at the maximum location of the limited
+    VF, the other axes of the full VF are at their default."""
+    location = maxLocation(limitedPath)
+    full, limited = tableSizes(path), tableSizes(limitedPath)
+    report = {tag: (full[tag], limited.get(tag, 0)) for tag in full}
+    for name, timer in (("shape", shapeTime), ("raster", rasterTime)):
+        # The fastest of a few runs, after a warm up.
+        report[name] = tuple(
+            min(timer(fontPath, location) for _ in range(4))
+            for fontPath in (path, limitedPath)
+        )
+    return report
+
+
+def reportLine(report):
+    """Answer the limitReport as one line of text."""
+    items = []
+    for key, (full, limited) in report.items():
+        if key in ("shape", "raster"):
+            items.append(
+                "%s %.1f --> %.1fus %.2fx"
+                % (key, full, limited, full / limited if limited else 0)
+            )
+        else:
+            items.append(
+                "%s %.1f --> %.1fKB %+.0f%%"
+                % (key, full / 1024, limited / 1024, (limited / full - 1) * 100)
+            )
+    return "  ".join(items)
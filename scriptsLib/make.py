@@ -2,9 +2,12 @@
 #
 #   Making the separate Bitcount masters, with the pixel shapes filled in.
 #
-import os, shutil
+import os
+import shutil
+import sys
 import ufoLib2
-import subprocess
+from ufoLib2.objects import Component
+from concurrent.futures import ThreadPoolExecutor
 
 from gftools.constants import OFL_LICENSE_INFO
 from gftools.util.google_fonts import _KNOWN_WEIGHTS
@@ -13,8 +16,10 @@ from fontTools.designspaceLib import (
     SourceDescriptor,
     InstanceDescriptor,
 )
-from fontTools.feaLib.parser import Parser
 from fontTools.feaLib import ast
+from fontmake.compatibility import CompatibilityChecker
+from fontmake.errors import FontmakeError
+from fontmake.font_project import FontProject
 
 from scriptsLib import (
     BITCOUNT,
@@ -30,7 +35,6 @@ from scriptsLib import (
     LDEF,
     LMAX,
     LMIN,
-    MASTERS_PATH,
     PIXEL_NAME,
     POST_FIX,
     SDEF,
@@ -43,9 +47,11 @@ from scriptsLib import (
     UFO_PATH,
     VARIATION_PIXELS,
     wght_DEF,
-    wght_MAX,
-    wght_MIN,
 )
+from scriptsLib.jobs import runCommand
+from scriptsLib.sources import SOURCES
+from scriptsLib.sync import SyncCounts, syncUFO
+from scriptsLib.trace import writeProfileSummary
 from scriptsLib.glyphData import (
     PIXEL_DATA,
 )  # Data of all pixel glyphs
@@ -68,38 +74,89 @@ def getStyleName(pd):
     return f"wght{pd.wght} ELXP{pd.ELXP} ELSH{pd.ELSH} slnt{pd.slnt}"
 
 
-def copyMasters(dsParams, googlefonts=False):
-    """Copy the Bitcount masters into MASTERS_PATH, alther their name an fill in the pixels
+def findDuplicateGlyphs(fonts):
+    """Answer the dictionary {glyphName: targetName} of the pixel glyphs that have
+    exactly the same components and width as another glyph (the target) in all of
+    the fonts. These glyphs can be a single component reference to their target."""
+    duplicates = None
+    for font in fonts:
+        targets = {}  # Components and width --> name of the first glyph with them
+        found = {}
+        for glyphName in sorted(font.keys()):
+            glyph = font[glyphName]
+            if (
+                glyphName == "canvas"
+                or glyph.contours
+                or not glyph.components
+                or any(c.baseGlyph != PIXEL_NAME for c in glyph.components)
+            ):
+                continue
+            key = (
+                glyph.width,
+                tuple(tuple(c.transformation) for c in glyph.components),
+            )
+            if key in targets:
+                found[glyphName] = targets[key]
+            else:
+                targets[key] = glyphName
+        if duplicates is None:
+            duplicates = found
+        else:  # Masters must stay compatible, only keep the ones that are in all fonts.
+            duplicates = {
+                name: target
+                for name, target in duplicates.items()
+                if found.get(name) == target
+            }
+    return duplicates or {}
+
+
+def copyMasters(
+    dsParams, googlefonts=False, dump=False, workers=1, dedupe=False, pruned=()
+):
+    """Make the Bitcount masters for this design space, alther their name an fill in the pixels
     shape at that location in the design space.
-    If subsetAsTest is True, then copy from a source UFO with a small sybset of glyphs.
+    Answer the dictionary of the generated ufoLib2.Font masters, with the source filename
+    in the design space file as key, so they can be compiled without reading them again.
+    The masters only live in memory. If dump is True, they are also written into
+    MASTERS_PATH, e.g. for debugging. Masters that are already there are synced,
+    only the files that changed get written. Up to `workers` masters are written
+    at the same time, by a pool of threads.
+    If dedupe is True, glyphs with the same pixels and width as another glyph are
+    replaced by a single component reference to that glyph. Note that Google Fonts
+    QA does not accept such nested components.
+    The masters of the pixel names in `pruned` are not made, see scriptsLib/prune.py.
     """
-    # Make the local _masters/ path. Note that this directory does not commit to Github.
-    print("... Cleaning/creating directories in _masters/")
-    if not os.path.exists(MASTERS_PATH):
-        print("... Make %s folder" % MASTERS_PATH)
-        os.mkdir(MASTERS_PATH)
     ufoPath = dsParams.ufoPath
-    if not os.path.exists(ufoPath):
-        os.mkdir(ufoPath)
-    else:
-        # Remove old UFO masters one by one in case they are here
-        os.system("rm -r %s*.ufo" % ufoPath)
-
-    # Copy pixels from this UFO.
-    pixels = ufoLib2.Font.open(UFO_PATH + VARIATION_PIXELS)
-    # Copy COLRv1 mask elements from this UFO.
-    elements = ufoLib2.Font.open(UFO_PATH + LAYER_ELEMENTS)
-    elementsItalic = ufoLib2.Font.open(UFO_PATH + LAYER_ELEMENTS_ITALIC)
+    if dump:
+        # Make the local _masters/ path. Note that this directory does not commit to Github.
+        print("... Creating directories in _masters/")
+        os.makedirs(ufoPath, exist_ok=True)  # Parallel jobs may race here
+        writer = ThreadPoolExecutor(max_workers=workers)
+        syncs = {}  # Keeps the PIXEL_DATA order, to report the results in order
 
+    # Pixels get copied from VARIATION_PIXELS and the COLRv1 mask elements from
+    # LAYER_ELEMENTS(_ITALIC). They are opened once per process by SOURCES.
     # Open the pixel font, as lead for the masters that need to be generated.
     md = MASTERS_DATA[dsParams.masterName]
     ufoDirPath = UFO_PATH
 
     print(
-        "... Copy %s %d location masters (wght=3, open=2, shape=12, slanted=2)"
-        % (dsParams.masterName, len(PIXEL_DATA))
+        "... Make %s %d location masters (wght=3, open=2, shape=12, slanted=2)"
+        % (dsParams.masterName, len(PIXEL_DATA) - len(pruned))
     )
+    duplicates = {}
+    if dedupe:
+        duplicates = findDuplicateGlyphs(
+            [SOURCES.font(md.ufoName), SOURCES.font(md.italicName)]
+        )
+        print(
+            "... Dedupe %d glyphs into a reference to an identical glyph"
+            % len(duplicates)
+        )
+    masters = {}
     for pName, pd in PIXEL_DATA.items():
+        if pName in pruned:
+            continue
         if pd.slnt:
             ufoName = md.italicName
         else:
@@ -108,63 +165,114 @@ def copyMasters(dsParams, googlefonts=False):
             md, pd
         )  # Calculate master name from master data and pixel data
         dstPath = md.path + dstName
-        if not os.path.exists(dstPath):
-            print("    ... Make master %s" % dstName)
-            srcPath = ufoDirPath + ufoName
-            if (
-                pd.ELSH or pd.ELXP or pd.wght != wght_DEF
-            ):  # Only copy pixels, this can be sparse
-                dst = ufoLib2.Font()
+        srcPath = ufoDirPath + ufoName
+        if (
+            pd.ELSH or pd.ELXP or pd.wght != wght_DEF
+        ):  # Only copy pixels, this can be sparse
+            dst = ufoLib2.Font()
+            linkFrom = None
+        else:  # Full copy of the source master
+            dst = ufoLib2.Font.open(srcPath, lazy=False)
+            linkFrom = srcPath
+            for glyphName, target in duplicates.items():
+                dst[glyphName].components = [Component(target)]
+        dst.info.familyName = getFamilyName(md)
+        dst.info.styleName = getStyleName(pd)
+        # Copy the glyphs: assigning to the font renames the glyph object itself,
+        # and the masters must not share glyphs when compiled in memory.
+        dst[PIXEL_NAME] = SOURCES.glyph(VARIATION_PIXELS, pName)
+        # Copy the COLRv1 mask pixel glyphs. Roman and italic pixels get copied from their own element source.
+        # If this is the default instance, we add the elements too
+        dst.info.italicAngle = 0  # Set default angle
+        if pd.is_default or pd.slnt:
+            if pd.slnt:
+                dst.info.italicAngle = ITALIC_ANGLE
+                eFontName = LAYER_ELEMENTS_ITALIC
             else:
-                shutil.copytree(srcPath, dstPath)
-                dst = ufoLib2.Font.open(dstPath)
-            dst.info.familyName = getFamilyName(md)
-            dst.info.styleName = getStyleName(pd)
-            dst[PIXEL_NAME] = pixels[pName]
-            # Copy the COLRv1 mask pixel glyphs. Roman and italic pixels get copied from their own element source.
-            # If this is the default instance, we add the elements too
-            dst.info.italicAngle = 0  # Set default angle
-            if pd.is_default or pd.slnt:
-                if pd.slnt:
-                    dst.info.italicAngle = ITALIC_ANGLE
-                    eFont = elementsItalic
-                else:
-                    eFont = elements
-                for elementName in eFont.keys():
-                    # print('... Copy element', elementName,'to', POST_FIX+elementName)
-                    dst[POST_FIX + elementName] = eFont[elementName]
-            if googlefonts:
-                dst.info.openTypeNameLicense = OFL_LICENSE_INFO
-                dst.info.copyright = GF_COPYRIGHT
-                if dst.info.familyName == "Bitcount Mono Double":
-                    dst.info.familyName = "Bitcount"
-                    dst.info.styleMapFamilyName = "Bitcount"
-                    dst.info.postscriptFontName = "Bitcount-Regular"
-                    dst.info.openTypeNamePreferredFamilyName = "Bitcount"
-                dst.info.openTypeOS2WinAscent = 1000
-                dst.info.openTypeOS2TypoLineGap = 0
-                dst.info.openTypeOS2TypoAscender = 840
-                dst.info.openTypeOS2TypoDescender = -360
-                dst.info.openTypeNameDescription = ""
-                if "space" in dst:
-                    dst["uni00A0"] = dst["space"].copy("uni00A0")
-                    dst["uni00A0"].unicode = 0x00A0
-                    dst.info.styleName = "Regular"
-                dst.info.openTypeOS2Type = []
-                dst.info.openTypeOS2Selection = [7]
-
-            dst.save(dstPath, overwrite=True)
-            dst.close()
-
-    pixels.close()
-
-
-def makeDesignSpaceFile(dsName, dsParams, googlefonts=False):
+                eFontName = LAYER_ELEMENTS
+            for element in SOURCES.glyphs(eFontName, prefix=POST_FIX):
+                dst[element.name] = element
+        if googlefonts:
+            dst.info.openTypeNameLicense = OFL_LICENSE_INFO
+            dst.info.copyright = GF_COPYRIGHT
+            if dst.info.familyName == "Bitcount Mono Double":
+                dst.info.familyName = "Bitcount"
+                dst.info.styleMapFamilyName = "Bitcount"
+                dst.info.postscriptFontName = "Bitcount-Regular"
+                dst.info.openTypeNamePreferredFamilyName = "Bitcount"
+            dst.info.openTypeOS2WinAscent = 1000
+            dst.info.openTypeOS2TypoLineGap = 0
+            dst.info.openTypeOS2TypoAscender = 840
+            dst.info.openTypeOS2TypoDescender = -360
+            dst.info.openTypeNameDescription = ""
+            if "space" in dst:
+                dst["uni00A0"] = dst["space"].copy("uni00A0")
+                dst["uni00A0"].unicode = 0x00A0
+                dst.info.styleName = "Regular"
+            dst.info.openTypeOS2Type = []
+            dst.info.openTypeOS2Selection = [7]
+
+        if dump:
+            print("    ... Sync master %s" % dstName)
+            # The master is not changed anymore, it can be written while we make the next.
+            syncs[dstName] = writer.submit(syncUFO, dst, dstPath, linkFrom=linkFrom)
+        masters[f"{md.variant}-{md.stem}/{dstName}"] = dst
+
+    if dump:
+        writer.shutdown(wait=True)
+        counts = SyncCounts()
+        errors = []
+        for dstName, sync in syncs.items():
+            e = sync.exception()
+            if e is None:
+                counts += sync.result()
+            else:
+                errors.append((dstName, e))
+        if errors:
+            raise RuntimeError(
+                "Writing %d masters failed:\n%s"
+                % (
+                    len(errors),
+                    "\n".join("    %s: %r" % (dstName, e) for dstName, e in errors),
+                )
+            ) from errors[0][1]
+        # Remove old UFO masters that are no longer generated
+        names = {name.split("/")[-1] for name in masters}
+        for fileName in os.listdir(ufoPath):
+            if fileName.endswith(".ufo") and fileName not in names:
+                shutil.rmtree(ufoPath + fileName)
+        print("... Synced masters glyphs: %s" % counts)
+
+    print("... Source cache: %s" % SOURCES.report())
+    return masters
+
+
+def buildVF(dsPath, vfPath, masters=None):
+    """Compile the design space into a VF at vfPath, running fontmake in this process.
+    Optional `masters` is the dictionary answered by copyMasters. Sources that are in
+    there don't get parsed again, the others are opened from disk."""
+    print("... fontmake -o variable -m %s --output-path %s" % (dsPath, vfPath))
+    designspace = DesignSpaceDocument.fromfile(dsPath)
+    for source in designspace.sources:
+        if masters and source.filename in masters:
+            source.font = masters[source.filename]
+    project = FontProject()
+    designspace.loadSourceFonts(opener=project.open_ufo)
+    # Same check as fontmake does from the command line for variable output.
+    if not CompatibilityChecker(
+        [source.font for source in designspace.sources]
+    ).check():
+        raise FontmakeError("Compatibility check failed", dsPath)
+    project.build_variable_fonts(designspace, output_path=vfPath)
+
+
+def makeDesignSpaceFile(dsName, dsParams, googlefonts=False, pruned=()):
     """Dynamic generation of the design space file for this number of axes and this variant.
     The <sources> definition has two parts, it's actually a merge of two independent design spaces.
     The main part is the “traditional” definition of the shapes of the pixels in 4 axes.
     The COLRv1 part defind the scale and relative position (for each pixel) of the color
     layers that use the main pixels as mask.
+    The masters of the pixel names in `pruned` are left out, see scriptsLib/prune.py.
     """
     print("... Make design space %s" % dsName)
     # Read the template file
@@ -193,29 +301,27 @@ def makeDesignSpaceFile(dsName, dsParams, googlefonts=False):
 
     # Layer axes are independent from main Bitcount shape axes
 
-    for wght in (wght_MIN, wght_DEF, wght_MAX):
-        # minValue is the same as default
-        for ELXP in (ELXP_MIN, ELXP_MAX):
-            # minValue is the same as default
-            for ELSH in SHAPES:
-                # minValue is the same as default
-                for slnt in (slnt_MIN, slnt_MAX):
-                    path = f"{variant}-{stem}/Bitcount_{variant}_{stem}-wght{wght}_ELXP{ELXP}_ELSH{ELSH}_slnt{slnt}.ufo"
-                    source = SourceDescriptor(
-                        filename=path,
-                        familyName=familyName,
-                        name=familyName,
-                        styleName=f"wght{wght} ELXP{ELXP} ELSH{ELSH} slnt{slnt}",
-                        location={
-                            "Weight": wght,
-                            "Element Expansion": ELXP,
-                            "Element Shape": ELSH,
-                            "Slant": slnt,
-                        },
-                    )
-                    if DEFAULT_LOCATION == (wght, ELXP, ELSH, slnt):
-                        source.copyInfo = True
-                    template.sources.append(source)
+    # All combinations of wght, ELXP, ELSH and slnt, wght first
+    for pd in PIXEL_DATA.inLocationOrder():
+        if pd.name in pruned:
+            continue
+        wght, ELXP, ELSH, slnt = pd.location
+        path = f"{variant}-{stem}/Bitcount_{variant}_{stem}-wght{wght}_ELXP{ELXP}_ELSH{ELSH}_slnt{slnt}.ufo"
+        source = SourceDescriptor(
+            filename=path,
+            familyName=familyName,
+            name=familyName,
+            styleName=f"wght{wght} ELXP{ELXP} ELSH{ELSH} slnt{slnt}",
+            location={
+                "Weight": wght,
+                "Element Expansion": ELXP,
+                "Element Shape": ELSH,
+                "Slant": slnt,
+            },
+        )
+        if DEFAULT_LOCATION == pd.location:
+            source.copyInfo = True
+        template.sources.append(source)
 
     for wght, weightName in sorted(weightInstances.items()):
         # minValue is the same as default
@@ -255,7 +361,7 @@ def makeDesignSpaceFile(dsName, dsParams, googlefonts=False):
 
     # Add cursive axis rules
     #
-    features = Parser(UFO_PATH + f"Bitcount_{variant}_{stem}.ufo/features.fea").parse()
+    features = SOURCES.features(f"Bitcount_{variant}_{stem}.ufo")
     # Find ss08
     ss08 = [
         s
@@ -272,10 +378,21 @@ def makeDesignSpaceFile(dsName, dsParams, googlefonts=False):
     template.write(dsName)
 
 
-def addCOLRv1toVF(vfPath, dstPath):
+def addCOLRv1toVF(vfPath, dstPath, profilePath=None):
+    """Run paintcompiler with scriptsLib/colrv1.py on the VF. If profilePath is
+    given, run it with cProfile, writing profilePath.prof and profilePath.txt."""
     print("--- Adding COLORv1 pixels to", dstPath)
-    cmd = [
-        "paintcompiler",
+    cmd = ["paintcompiler"]
+    if profilePath is not None:
+        cmd = [
+            sys.executable,
+            "-m",
+            "cProfile",
+            "-o",
+            profilePath + ".prof",
+            shutil.which("paintcompiler"),
+        ]
+    cmd += [
         "-o",
         dstPath,
         "--add-axis",
@@ -295,4 +412,7 @@ def addCOLRv1toVF(vfPath, dstPath):
         vfPath,
     ]
     print(" ".join(cmd))
-    subprocess.run(cmd, check=True)
+    runCommand(cmd)
+    if profilePath is not None:
+        writeProfileSummary(profilePath)
+        print("... Profile of paintcompiler in %s.prof" % profilePath)
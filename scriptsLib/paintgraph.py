@@ -0,0 +1,178 @@
+# -*- coding: UTF-8 -*-
+#
+#   Complexity of the COLRv1 paint graphs of the color VFs.
+#
+#   A renderer walks the paint tree of a glyph from its BaseGlyphPaintRecord,
+#   into the layers of PaintColrLayers and into the paint of the glyph of a
+#   PaintColrGlyph. Shared paints are walked again for every reference, so the
+#   cost of a glyph is that of its expanded tree, not of the compiled graph.
+#   paintStats answers the size of the expanded tree of every color glyph,
+#   memoized on the shared paints, so all glyphs of a font take a fraction of
+#   a second.
+#
+#   The overdraw is an estimate of the area that is filled: every solid or
+#   gradient fill inside a PaintGlyph clip fills the bounding box of the outermost
+#   clip. In Bitcount every px repaints all elements of layer1 and layer2, clipped
+#   to the px, so the overdraw is about the number of pixels times the number of
+#   elements in the layers.
+#
+#   checkBudgets compares the stats with the PAINT_BUDGETS of the variant, the
+#   build runs it on every color VF, so paints that are too complex to render are
+#   found before they get into a browser.
+#
+#       from fontTools.ttLib import TTFont
+#       from scriptsLib.paintgraph import paintStats
+#       stats = paintStats(TTFont(path))
+#
+from dataclasses import dataclass, fields
+
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables.otTables import PaintFormat
+
+from scriptsLib import PAINT_BUDGETS
+from scriptsLib.bitmaps import P
+
+FILLS = {
+    PaintFormat.PaintSolid,
+    PaintFormat.PaintVarSolid,
+    PaintFormat.PaintLinearGradient,
+    PaintFormat.PaintVarLinearGradient,
+    PaintFormat.PaintRadialGradient,
+    PaintFormat.PaintVarRadialGradient,
+    PaintFormat.PaintSweepGradient,
+    PaintFormat.PaintVarSweepGradient,
+}
+VAR_TRANSFORMS = {
+    PaintFormat.PaintVarTransform,
+    PaintFormat.PaintVarTranslate,
+    PaintFormat.PaintVarScale,
+    PaintFormat.PaintVarScaleAroundCenter,
+    PaintFormat.PaintVarScaleUniform,
+    PaintFormat.PaintVarScaleUniformAroundCenter,
+    PaintFormat.PaintVarRotate,
+    PaintFormat.PaintVarRotateAroundCenter,
+    PaintFormat.PaintVarSkew,
+    PaintFormat.PaintVarSkewAroundCenter,
+}
+
+
+class PaintBudgetError(Exception):
+    """A color glyph has a paint tree that is over the budget of its variant."""
+
+
+@dataclass(frozen=True)
+class PaintStats:
+    """Size of the expanded paint tree of a color glyph. nodes is the number of
+    paints a renderer visits, depth the longest path from the root, layers the
+    number of PaintColrLayers layers, clips the number of PaintGlyph, each one a
+    clip path and a fill. stops is the number of gradient color stops, varTransforms
+    the number of variable transforms, overdraw the filled area in pixels (P x P)."""
+
+    nodes: int = 0
+    depth: int = 0
+    layers: int = 0
+    clips: int = 0
+    stops: int = 0
+    varTransforms: int = 0
+    overdraw: float = 0
+
+
+METRICS = tuple(f.name for f in fields(PaintStats))
+
+
+def _children(paint, colr, baseGlyphs):
+    if paint.Format == PaintFormat.PaintColrGlyph:
+        return [baseGlyphs[paint.Glyph]] if paint.Glyph in baseGlyphs else []
+    return paint.getChildren(colr)
+
+
+def _scale(paint):
+    """Answer the factor of the area of the transform of the paint at the default
+    location, 1 if the paint does not scale."""
+    name = paint.getFormatName()
+    if name in ("PaintTransform", "PaintVarTransform"):
+        t = paint.Transform
+        return abs(t.xx * t.yy - t.xy * t.yx)
+    if name.startswith(("PaintScaleUniform", "PaintVarScaleUniform")):
+        return paint.scale**2
+    if name.startswith(("PaintScale", "PaintVarScale")):
+        return abs(paint.scaleX * paint.scaleY)
+    return 1
+
+
+def paintStats(ttFont):
+    """Answer the dictionary {glyphName: PaintStats} of the COLRv1 glyphs of the
+    TTFont. Raise ValueError for cycles of PaintColrGlyph."""
+    colr = ttFont["COLR"].table
+    glyf = ttFont["glyf"]
+    baseGlyphs = {}
+    if colr.BaseGlyphList is not None:
+        baseGlyphs = {
+            record.BaseGlyph: record.Paint
+            for record in colr.BaseGlyphList.BaseGlyphPaintRecord
+        }
+    memo = {}  # id(paint) --> (PaintStats, number of fills) of the tree of the paint
+    visiting = set()
+
+    def area(glyphName):
+        glyph = glyf[glyphName]
+        if not hasattr(glyph, "xMin"):
+            return 0
+        return (glyph.xMax - glyph.xMin) * (glyph.yMax - glyph.yMin) / (P * P)
+
+    def visit(paint):
+        key = id(paint)
+        if key in memo:
+            return memo[key]
+        if key in visiting:
+            raise ValueError("Cycle in the paint graph at %s" % paint.getFormatName())
+        visiting.add(key)
+        fmt = paint.Format
+        nodes, depth, clips = 1, 0, int(fmt == PaintFormat.PaintGlyph)
+        layers = paint.NumLayers if fmt == PaintFormat.PaintColrLayers else 0
+        stops = len(paint.ColorLine.ColorStop) if hasattr(paint, "ColorLine") else 0
+        varTransforms = int(fmt in VAR_TRANSFORMS)
+        fills = int(fmt in FILLS)
+        overdraw = 0
+        for child in _children(paint, colr, baseGlyphs):
+            stats, childFills = visit(child)
+            nodes += stats.nodes
+            depth = max(depth, stats.depth)
+            layers += stats.layers
+            clips += stats.clips
+            stops += stats.stops
+            varTransforms += stats.varTransforms
+            fills += childFills
+            overdraw += stats.overdraw
+        if fmt == PaintFormat.PaintGlyph:
+            # Everything inside is clipped to the glyph.
+            overdraw = fills * area(paint.Glyph)
+        else:
+            overdraw *= _scale(paint)
+        visiting.discard(key)
+        stats = PaintStats(
+            nodes, depth + 1, layers, clips, stops, varTransforms, overdraw
+        )
+        memo[key] = stats, fills
+        return memo[key]
+
+    return {glyphName: visit(paint)[0] for glyphName, paint in baseGlyphs.items()}
+
+
+def overBudget(stats, budget):
+    """Answer the list of (glyphName, metric, value, limit) of the stats that are
+    larger than the budget dictionary {metric: limit}, largest excess first."""
+    result = []
+    for glyphName, glyphStats in stats.items():
+        for metric, limit in budget.items():
+            value = getattr(glyphStats, metric)
+            if value > limit:
+                result.append((glyphName, metric, value, limit))
+    result.sort(key=lambda item: -item[2] / item[3] if item[3] else 0)
+    return result
+
+
+def checkBudgets(path, variant):
+    """Answer the list of (glyphName, metric, value, limit) of the color glyphs of
+    the font at path that are over the PAINT_BUDGETS of the variant."""
+    return overBudget(paintStats(TTFont(path)), PAINT_BUDGETS[variant])
@@ -0,0 +1,239 @@
+# -*- coding: UTF-8 -*-
+#
+#   Scan and normalize the px components of the source UFOs.
+#
+#   Over the years of editing, glyphs collected px components that are on top
+#   of each other, that are not on the pixel grid, or that are outside the box
+#   of the variant. A duplicate px is invisible in black, but it adds a component
+#   to glyf and gvar and a PaintTranslate layer to COLR, and with overlapping
+#   bold pixels the component order decides the pattern inside the letters.
+#
+#   scanUFO checks all px offsets of a UFO at once with NumPy, from the bitmap
+#   index, so a scan of the whole family takes a fraction of a second.
+#   normalizePair rewrites the glyphs with duplicates removed and the px components
+#   sorted from bottom to top and left to right, optionally snapped to the grid.
+#   The roman and italic UFO of a variant and stem are the masters of the slnt
+#   axis, so they are normalized together, with the same order of the px
+#   components and the same duplicates removed.
+#
+#       from scriptsLib.pixels import scanUFO
+#       issues = scanUFO("Bitcount_Grid_Single.ufo")
+#
+from dataclasses import dataclass, field
+
+import numpy as np
+import ufoLib2
+from fontTools.ufoLib import UFOWriter
+
+from scriptsLib import PIXEL_NAME, UFO_PATH
+from scriptsLib.bitmaps import BITMAPS, ITALIC_OFFSETS, SLOPE, VARIANT_GRIDS, P
+
+TOLERANCE = 0.5  # Max distance of a px offset to the grid in units
+
+
+@dataclass
+class PixelIssues:
+    """Dictionaries {glyphName: [(x, y), ...]} of the px offsets with issues in one
+    UFO, and the names of the glyphs that are not in canonical order."""
+
+    ufoName: str
+    duplicates: dict = field(default_factory=dict)
+    offGrid: dict = field(default_factory=dict)
+    outOfBox: dict = field(default_factory=dict)
+    unordered: list = field(default_factory=list)
+
+    def __repr__(self):
+        return "%s: %d duplicates, %d off grid, %d out of box, %d glyphs unordered" % (
+            self.ufoName,
+            sum(len(offsets) for offsets in self.duplicates.values()),
+            sum(len(offsets) for offsets in self.offGrid.values()),
+            sum(len(offsets) for offsets in self.outOfBox.values()),
+            len(self.unordered),
+        )
+
+
+def _parseUFOName(ufoName):
+    """Answer (variant, italic) of a source UFO name like Bitcount_Grid_Single-Italic.ufo."""
+    return ufoName.split("_")[1], ufoName.endswith("-Italic.ufo")
+
+
+def gridCells(offsets, variant, italic):
+    """Answer the (cols, rows) arrays of the grid cells of the (x, y) px offsets and the
+    (dx, dy) arrays of their distance to that cell in units."""
+    x = offsets[:, 0]
+    y = offsets[:, 1]
+    if italic:
+        x = x - y * SLOPE / P - ITALIC_OFFSETS.get(variant, 0)
+    cols = np.rint(x / P)
+    rows = np.rint(y / P)
+    return cols, rows, x - cols * P, y - rows * P
+
+
+def _group(names, glyphIndex, offsets, mask):
+    result = {}
+    for ix in np.flatnonzero(mask):
+        result.setdefault(names[glyphIndex[ix]], []).append(tuple(offsets[ix].tolist()))
+    return result
+
+
+def scanUFO(ufoName):
+    """Answer the PixelIssues of all px components in the default layer of the UFO."""
+    variant, italic = _parseUFOName(ufoName)
+    boxCols, boxRows, below = VARIANT_GRIDS[variant]
+    glyphs = BITMAPS.font(ufoName)
+    names = list(glyphs)
+    counts = np.array([len(glyph.offsets) for glyph in glyphs.values()])
+    issues = PixelIssues(ufoName)
+    if not counts.sum():
+        return issues
+    offsets = np.concatenate([glyph.offsets for glyph in glyphs.values()])
+    glyphIndex = np.repeat(np.arange(len(names)), counts)
+    cols, rows, dx, dy = gridCells(offsets, variant, italic)
+
+    offGrid = (np.abs(dx) > TOLERANCE) | (np.abs(dy) > TOLERANCE)
+    outOfBox = (
+        (cols < 0) | (cols >= boxCols) | (rows < -below) | (rows >= boxRows - below)
+    )
+    # One int per (glyph, cell), in canonical order: rows bottom to top, then columns.
+    keys = (glyphIndex * 4096 + (rows + 2048)) * 4096 + (cols + 2048)
+    keys = keys.astype(np.int64)
+    _, first = np.unique(keys, return_index=True)
+    duplicates = np.ones(len(keys), dtype=bool)
+    duplicates[first] = False
+    sameGlyph = glyphIndex[1:] == glyphIndex[:-1]
+    unordered = np.unique(glyphIndex[1:][sameGlyph & (keys[1:] < keys[:-1])])
+
+    issues.duplicates = _group(names, glyphIndex, offsets, duplicates)
+    issues.offGrid = _group(names, glyphIndex, offsets, offGrid)
+    issues.outOfBox = _group(names, glyphIndex, offsets, outOfBox)
+    issues.unordered = [names[ix] for ix in unordered]
+    return issues
+
+
+def scanAll(ufoNames=None):
+    """Answer the list of PixelIssues of the source UFOs, default all of them."""
+    return [scanUFO(ufoName) for ufoName in ufoNames or BITMAPS.ufoNames()]
+
+
+def canonicalOrder(romanOffsets, italicOffsets, variant):
+    """Answer the list of indices of the px components of a glyph, that are the same
+    components in its roman and italic source, without duplicates and sorted from
+    bottom to top and left to right. A component is a duplicate if it is in the
+    same cell as another one in both sources, of duplicates the one closest to the
+    grid is kept. Both sources get this order, so they stay compatible."""
+    roman = np.array(romanOffsets, dtype=np.float64).reshape(-1, 2)
+    italic = np.array(italicOffsets, dtype=np.float64).reshape(-1, 2)
+    cols, rows, dx, dy = gridCells(roman, variant, False)
+    iCols, iRows, iDx, iDy = gridCells(italic, variant, True)
+    distance = np.hypot(dx, dy) + np.hypot(iDx, iDy)
+    # Sort by cells and by distance within the cells, then take the first of each.
+    order = np.lexsort((distance, iCols, iRows, cols, rows))
+    cells = np.stack((rows, cols, iRows, iCols), axis=1)[order]
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = np.any(cells[1:] != cells[:-1], axis=1)
+    return order[keep].tolist()
+
+
+def snapOffset(x, y, variant, italic):
+    """Answer the (x, y) px offset moved onto the grid."""
+    cols, rows, _, _ = gridCells(np.array([[x, y]], dtype=np.float64), variant, italic)
+    x, y = cols[0] * P, rows[0] * P
+    if italic:
+        x += y * SLOPE / P + ITALIC_OFFSETS.get(variant, 0)
+    return (int(x) if x == int(x) else x, int(y) if y == int(y) else y)
+
+
+def partnerName(ufoName):
+    """Answer the name of the italic UFO of a roman UFO, or of the roman of an italic."""
+    if ufoName.endswith("-Italic.ufo"):
+        return ufoName[: -len("-Italic.ufo")] + ".ufo"
+    return ufoName[: -len(".ufo")] + "-Italic.ufo"
+
+
+def _components(glyph, pixels):
+    """Answer the components of the glyph with its px components replaced by pixels,
+    in the places of the px components, the other components stay where they are."""
+    pixels = iter(pixels)
+    components = []
+    for component in glyph.components:
+        if component.baseGlyph != PIXEL_NAME:
+            components.append(component)
+        else:
+            pixel = next(pixels, None)
+            if pixel is not None:  # Removed duplicates leave the last px places
+                components.append(pixel)
+    return components
+
+
+def normalizePair(romanName, issues=(), snap=False, path=UFO_PATH):
+    """Rewrite the glyphs of the roman UFO and its italic partner that have duplicate,
+    off grid (if snap) or unordered px components in one of the PixelIssues. Both
+    get the same order and lose the same duplicates, see canonicalOrder, and the px
+    components keep their transformation apart from the snapped offset.
+    Answer (changed, incompatible), the lists of names of the rewritten glyphs and
+    of the glyphs with a different number of px components in the two UFOs, that
+    are left as they are."""
+    variant, _ = _parseUFOName(romanName)
+    glyphNames = set()
+    for ufoIssues in issues:
+        glyphNames |= set(ufoIssues.duplicates) | set(ufoIssues.unordered)
+        if snap:
+            glyphNames |= set(ufoIssues.offGrid)
+    changed = []
+    incompatible = []
+    if not glyphNames:
+        return changed, incompatible
+    writers = [
+        UFOWriter(path + ufoName, validate=False)
+        for ufoName in (romanName, partnerName(romanName))
+    ]
+    glyphSets = [
+        writer.getGlyphSet(validateRead=False, validateWrite=False)
+        for writer in writers
+    ]
+    for glyphName in sorted(glyphNames):
+        if not all(glyphName in glyphSet for glyphSet in glyphSets):
+            continue
+        glyphs = []
+        for glyphSet in glyphSets:
+            glyph = ufoLib2.objects.Glyph(glyphName)
+            glyphSet.readGlyph(glyphName, glyph, glyph.getPointPen(), validate=False)
+            glyphs.append(glyph)
+        pixels = [
+            [c for c in glyph.components if c.baseGlyph == PIXEL_NAME]
+            for glyph in glyphs
+        ]
+        if len(pixels[0]) != len(pixels[1]):
+            incompatible.append(glyphName)
+            continue
+        order = canonicalOrder(
+            *([c.transformation[4:] for c in px] for px in pixels), variant
+        )
+        components = []
+        for glyph, px, italic in zip(glyphs, pixels, (False, True)):
+            ordered = []
+            for ix in order:
+                transformation = px[ix].transformation
+                if snap:
+                    transformation = transformation[:4] + snapOffset(
+                        *transformation[4:], variant, italic
+                    )
+                ordered.append(
+                    ufoLib2.objects.Component(
+                        PIXEL_NAME, transformation, identifier=px[ix].identifier
+                    )
+                )
+            components.append(_components(glyph, ordered))
+        if all(
+            [(c.baseGlyph, tuple(c.transformation)) for c in new]
+            == [(c.baseGlyph, tuple(c.transformation)) for c in glyph.components]
+            for glyph, new in zip(glyphs, components)
+        ):
+            continue
+        for glyphSet, glyph, new in zip(glyphSets, glyphs, components):
+            glyph.components = new
+            glyphSet.writeGlyph(glyphName, glyph, glyph.drawPoints, validate=False)
+        changed.append(glyphName)
+    for writer in writers:
+        writer.close()
+    return changed, incompatible
@@ -0,0 +1,186 @@
+# -*- coding: UTF-8 -*-
+#
+#   Redundant masters: masters of the design space that interpolation of the
+#   other masters already predicts.
+#
+#   makeDesignSpaceFile makes a source for every combination of 3 wght, 2 ELXP,
+#   12 ELSH and 2 slnt, 144 masters. The sparse masters only differ in their px
+#   glyph, the pixel of PIXEL_DATA in Bitcount-VariationPixels.ufo, the other
+#   glyphs are components of px. So a master is redundant if its pixel can be
+#   interpolated from the pixels of the other masters, within the tolerance in
+#   font units. The error is the largest difference of a point coordinate or
+#   the width, before gvar rounds the deltas.
+#
+#   pruneMasters removes masters one by one, the best predicted first, and keeps
+#   a master if removing it makes the error of it, or of a master removed before,
+#   larger than the tolerance. The model is the one of varLib, made from the
+#   masters that are left. The masters that are a full copy of the sources
+#   (wght=400, ELXP=0, ELSH=0, roman and italic, with the default) stay, and the
+#   source with copyInfo at DEFAULT_LOCATION.
+#   The element glyphs of the italic masters are the same in all of them, so
+#   they do not limit the pruning.
+#
+#       python3 scripts/prune-masters.py --tolerance 4
+#       python3 scripts/build.py --prune-masters --prune-tolerance 4
+#
+#   The build records the number of masters, the size of the VF and its gvar
+#   table and the fontmake time of the last full and the last pruned build of
+#   every design space in PRUNE_STATS_PATH, pruneReport compares them.
+#
+import json
+import os
+
+import numpy as np
+from fontTools.ttLib import TTFont
+from fontTools.varLib.models import VariationModel
+
+from scriptsLib import (
+    DEFAULT_LOCATION,
+    ELSH_AXIS,
+    ELXP_AXIS,
+    PRUNE_STATS_PATH,
+    PRUNE_TOLERANCE,
+    VARIATION_PIXELS,
+    slnt_AXIS,
+    wght_AXIS,
+    wght_DEF,
+)
+from scriptsLib.glyphData import PIXEL_DATA
+from scriptsLib.sources import SOURCES
+
+AXES = dict(wght=wght_AXIS, ELXP=ELXP_AXIS, ELSH=ELSH_AXIS, slnt=slnt_AXIS)
+FULL = "full"
+PRUNED = "pruned"
+
+
+def normalizedLocation(pd):
+    """Answer the normalized location of the master of the pixel data. The map of
+    ELXP keeps its minimum and maximum, the only values of the masters."""
+    location = {}
+    for tag, (minimum, default, maximum) in AXES.items():
+        value = getattr(pd, tag)
+        if value < default:
+            location[tag] = (value - default) / (default - minimum)
+        elif value > default:
+            location[tag] = (value - default) / (maximum - default)
+        else:
+            location[tag] = 0.0
+    return location
+
+
+def isPrunable(pd):
+    """Answer True if the master of the pixel data only has the px glyph that
+    varies, as copyMasters makes it sparse, and is not the source with copyInfo
+    at DEFAULT_LOCATION."""
+    return bool(pd.ELSH or pd.ELXP or pd.wght != wght_DEF) and (
+        pd.location != DEFAULT_LOCATION
+    )
+
+
+def pixelVector(glyph):
+    """Answer the width and the point coordinates of the glyph as numpy array."""
+    values = [glyph.width]
+    for contour in glyph.contours:
+        for point in contour.points:
+            values += [point.x, point.y]
+    return np.array(values, dtype=np.float64)
+
+
+def pixelVectors(pixelData=PIXEL_DATA):
+    """Answer the dictionary {pixelName: vector} of the pixels of the masters."""
+    return {
+        pName: pixelVector(SOURCES.font(VARIATION_PIXELS)[pName]) for pName in pixelData
+    }
+
+
+def predictionErrors(vectors, removed, pixelData=PIXEL_DATA):
+    """Answer the dictionary {pixelName: error} of the removed masters, interpolated
+    by the model of the other masters."""
+    kept = [pName for pName in vectors if pName not in removed]
+    model = VariationModel(
+        [normalizedLocation(pixelData[pName]) for pName in kept], axisOrder=list(AXES)
+    )
+    # getDeltas subtracts in place, it gets copies of the vectors.
+    deltas = model.getDeltas([vectors[pName].copy() for pName in kept])
+    errors = {}
+    for pName in removed:
+        predicted = model.interpolateFromDeltas(
+            normalizedLocation(pixelData[pName]), deltas
+        )
+        errors[pName] = float(np.abs(predicted - vectors[pName]).max())
+    return errors
+
+
+def pruneMasters(tolerance=PRUNE_TOLERANCE, pixelData=PIXEL_DATA):
+    """Answer (pruned, errors). pruned is the dictionary {pixelName: error} of the
+    masters that can be removed together, with their error in the model of the
+    masters that are left. errors is the dictionary {pixelName: error} of every
+    prunable master, interpolated from all the others."""
+    vectors = pixelVectors(pixelData)
+    errors = {}
+    for pName, pd in pixelData.items():
+        if isPrunable(pd):
+            errors.update(predictionErrors(vectors, {pName}, pixelData))
+    pruned = {}
+    for pName in sorted(errors, key=lambda pName: (errors[pName], pName)):
+        if errors[pName] > tolerance:
+            break
+        result = predictionErrors(vectors, set(pruned) | {pName}, pixelData)
+        if max(result.values()) <= tolerance:
+            pruned = result
+    return pruned, errors
+
+
+def _statsPath(vfName, statsPath=PRUNE_STATS_PATH):
+    return os.path.join(statsPath, os.path.splitext(vfName)[0] + ".json")
+
+
+def writeStats(vfPath, masters, seconds, mode, statsPath=PRUNE_STATS_PATH):
+    """Record the number of masters, the size of the VF and of its gvar table and
+    the fontmake seconds of the build of the VF at vfPath, as the FULL or PRUNED
+    build of its design space. Every VF has its own file, so parallel jobs can
+    write them."""
+    path = _statsPath(os.path.basename(vfPath), statsPath)
+    stats = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            stats = json.load(f)
+    stats[mode] = dict(
+        masters=masters,
+        size=os.path.getsize(vfPath),
+        gvar=TTFont(vfPath).reader.tables["gvar"].length,
+        seconds=seconds,
+    )
+    os.makedirs(statsPath, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(stats, f, indent=2)
+
+
+def pruneReport(vfName, statsPath=PRUNE_STATS_PATH):
+    """Answer the line that compares the last full and pruned build of the VF, or
+    None if one of them was not recorded."""
+    path = _statsPath(vfName, statsPath)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        stats = json.load(f)
+    if FULL not in stats or PRUNED not in stats:
+        return None
+    full, pruned = stats[FULL], stats[PRUNED]
+    return (
+        "masters %d --> %d  gvar %.1f --> %.1fKB %+.0f%%  size %.1f --> %.1fKB %+.0f%%  "
+        "fontmake %.1f --> %.1fs %+.0f%%"
+        % (
+            full["masters"],
+            pruned["masters"],
+            full["gvar"] / 1024,
+            pruned["gvar"] / 1024,
+            (pruned["gvar"] / full["gvar"] - 1) * 100,
+            full["size"] / 1024,
+            pruned["size"] / 1024,
+            (pruned["size"] / full["size"] - 1) * 100,
+            full["seconds"],
+            pruned["seconds"],
+            (pruned["seconds"] / full["seconds"] - 1) * 100,
+        )
+    )
@@ -0,0 +1,297 @@
+# -*- coding: UTF-8 -*-
+#
+#   Sharded and cached fontbakery runs of the fonts.
+#
+#   fontbakery check-googlefonts checks all fonts in one process, and checks them
+#   all again if only one of them changed. Here every font is a shard, checked
+#   in its own process of a pool. The family checks, that run once for all fonts and
+#   compare them, are one more shard with all fonts.
+#   The result of a shard is the document of the JSON reporter of fontbakery. It
+#   is cached in QA_CACHE_PATH, keyed on the content of its fonts, the fontbakery
+#   configuration and the version of fontbakery, so unchanged fonts are not
+#   checked again. The documents of all shards are merged and written by the
+#   HTML, GitHub Markdown and badge reporters of fontbakery, as the command does.
+#
+#       from scriptsLib.qa import checkFonts, writeReports
+#       doc, cached = checkFonts(fontPaths, "fontbakery.toml", jobs=4)
+#       writeReports(doc, html="out/fontbakery/fontbakery-report.html")
+#
+import copy
+import hashlib
+import importlib
+import importlib.metadata
+import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+from scriptsLib import QA_CACHE_PATH
+
+QA_PROFILE = "googlefonts"
+QA_CACHE_ENTRIES = 200  # Max number of cached shards, the oldest are removed
+# Statuses of fontbakery, least severe first.
+STATUSES = ("DEBUG", "PASS", "SKIP", "INFO", "WARN", "FAIL", "FATAL", "ERROR")
+
+
+def loadProfile():
+    """Answer the fontbakery profile QA_PROFILE, loaded the way the
+    check-googlefonts command does."""
+    from fontbakery.utils import set_profile_name
+
+    set_profile_name(QA_PROFILE)
+    return importlib.import_module("fontbakery.profiles." + QA_PROFILE).profile
+
+
+def familyCheckIds(profile):
+    """Answer the set of ids of the checks of the profile that do not run once for
+    every font, also not by their conditions. They run once for all fonts, or for
+    every source (ufo, designspace)."""
+    return {
+        check.id
+        for section in profile.sections
+        for check in section.checks
+        if "font" not in profile.get_iterargs(check)
+    }
+
+
+def profileValues(profile, paths):
+    """Answer the values of the runner, the paths sorted by the accepted files of
+    the profile, as the command line does. Files that are not given are empty
+    lists, so their checks do not run."""
+    values = {description.name: [] for description in profile.accepted_files}
+    for path in paths:
+        for description in profile.accepted_files:
+            if any(path.endswith(extension) for extension in description.extensions):
+                values[description.name].append(path)
+    return values
+
+
+def shardKey(fontPaths, configPath, family):
+    """Answer the cache key of the shard with these fonts."""
+    h = hashlib.sha256()
+    h.update(importlib.metadata.version("fontbakery").encode())
+    h.update(QA_PROFILE.encode())
+    h.update(repr(family).encode())
+    with open(configPath, "rb") as f:
+        h.update(f.read())
+    for path in fontPaths:
+        h.update(path.encode())
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def checkId(check):
+    """Answer the id of a check of a JSON reporter document, its key has the repr
+    of the check like "<FontBakeryCheck:com.google.fonts/check/...>"."""
+    return check["key"][1].strip("<>").partition(":")[2]
+
+
+def _selectChecks(doc, checkIds, keep):
+    """Answer the doc with only the checks that are (keep=True) or are not in
+    checkIds, and the counters of the result."""
+    sections = []
+    for section in doc["sections"]:
+        checks = [
+            check for check in section["checks"] if (checkId(check) in checkIds) == keep
+        ]
+        if checks:
+            result = Counter(check["result"] for check in checks)
+            sections.append(dict(section, checks=checks, result=result))
+    return dict(
+        result=sum((section["result"] for section in sections), Counter()),
+        sections=sections,
+    )
+
+
+def runShard(fontPaths, configPath, family):
+    """Run fontbakery on the fonts. If family is True, only run the family checks,
+    otherwise all other checks. Answer the document of the JSON reporter."""
+    from fontbakery.checkrunner import CheckRunner
+    from fontbakery.configuration import Configuration
+    from fontbakery.reporters.serialize import SerializeReporter
+    from fontbakery.status import Status
+
+    profile = loadProfile()
+    familyIds = familyCheckIds(profile)
+    config = Configuration.from_config_file(configPath)
+    config["full_lists"] = True
+    if family:
+        # Ids select by substring, _selectChecks removes the ones that are not
+        # family checks.
+        config["explicit_checks"] = sorted(familyIds)
+    runner = CheckRunner(
+        profile, values=profileValues(profile, fontPaths), config=config
+    )
+    reporter = SerializeReporter(
+        runner=runner, loglevels=[Status(status) for status in STATUSES]
+    )
+    runner.run([reporter])
+    # Round trip to JSON, so the document is the same as a cached one. Errors of
+    # checks can have exceptions in their messages, these become text.
+    doc = json.loads(json.dumps(reporter.getdoc(), default=str))
+    return _selectChecks(doc, familyIds, family)
+
+
+def cachedShard(fontPaths, configPath, family, cachePath=QA_CACHE_PATH):
+    """Answer (doc, cached) of the shard, from the cache if it is there, otherwise
+    from running it and storing it in the cache."""
+    path = os.path.join(cachePath, shardKey(fontPaths, configPath, family) + ".json")
+    if os.path.exists(path):
+        os.utime(path)  # Mark as recently used
+        with open(path) as f:
+            return json.load(f), True
+    doc = runShard(fontPaths, configPath, family)
+    os.makedirs(cachePath, exist_ok=True)
+    tmpPath = "%s.tmp-%d" % (path, os.getpid())
+    with open(tmpPath, "w") as f:
+        json.dump(doc, f)
+    os.replace(tmpPath, path)
+    return doc, False
+
+
+def evictShards(cachePath=QA_CACHE_PATH, maxEntries=QA_CACHE_ENTRIES):
+    """Remove the least recently used shards over maxEntries. Answer the number of
+    removed shards."""
+    if not os.path.exists(cachePath):
+        return 0
+    paths = [
+        os.path.join(cachePath, fileName)
+        for fileName in os.listdir(cachePath)
+        if fileName.endswith(".json")
+    ]
+    paths.sort(key=os.path.getmtime, reverse=True)
+    for path in paths[maxEntries:]:
+        os.remove(path)
+    return max(0, len(paths) - maxEntries)
+
+
+def _identity(key):
+    """Answer the key of a check result as a hashable (check, iterargs)."""
+    return key[1], tuple(tuple(iterarg) for iterarg in key[2])
+
+
+def runOrder(fontPaths, configPath):
+    """Answer the dictionary {(check, iterargs): index} of the order in which one
+    run of fontbakery on all fonts has the check results."""
+    from fontbakery.checkrunner import CheckRunner
+    from fontbakery.configuration import Configuration
+
+    profile = loadProfile()
+    config = Configuration.from_config_file(configPath)
+    runner = CheckRunner(
+        profile, values=profileValues(profile, fontPaths), config=config
+    )
+    return {
+        _identity(identity.key): index for index, identity in enumerate(runner.order)
+    }
+
+
+def mergeDocs(docs, order):
+    """Answer the document with the checks of all docs, sorted by the order of
+    runOrder, and grouped in sections as one run of all fonts has them."""
+    checks = [
+        (section, check)
+        for doc in docs
+        for section in doc["sections"]
+        for check in section["checks"]
+    ]
+    checks.sort(key=lambda item: order.get(_identity(item[1]["key"]), len(order)))
+    sections = {}
+    for section, check in checks:
+        name = section["key"][0]
+        if name not in sections:
+            sections[name] = dict(section, checks=[], result=Counter())
+        sections[name]["checks"].append(check)
+        sections[name]["result"][check["result"]] += 1
+    sections = list(sections.values())
+    return dict(
+        result=sum((section["result"] for section in sections), Counter()),
+        sections=sections,
+    )
+
+
+def _setFontIndex(doc, index):
+    """Set the index of the font in the iterargs of the checks of the document of a
+    shard with one font to its index in all fonts."""
+    for section in doc["sections"]:
+        for check in section["checks"]:
+            check["key"][2] = [
+                [name, index if name == "font" else value]
+                for name, value in check["key"][2]
+            ]
+
+
+def checkFonts(fontPaths, configPath, jobs=1, useCache=True, cachePath=QA_CACHE_PATH):
+    """Check the fonts, every font in a shard and the family checks of all fonts in
+    one more, up to `jobs` of them in parallel. Answer (doc, cached), the merged
+    document of all shards and the number of shards that came from the cache."""
+    shards = [([path], False) for path in fontPaths] + [(list(fontPaths), True)]
+    docs = []
+    cached = 0
+    with ProcessPoolExecutor(max_workers=max(1, jobs)) as executor:
+        if useCache:
+            futures = [
+                executor.submit(cachedShard, paths, configPath, family, cachePath)
+                for paths, family in shards
+            ]
+        else:
+            futures = [
+                executor.submit(runShard, paths, configPath, family)
+                for paths, family in shards
+            ]
+        for index, future in enumerate(futures):
+            doc = future.result()
+            if useCache:
+                doc, isCached = doc
+                cached += isCached
+            if index < len(fontPaths):
+                _setFontIndex(doc, index)
+            docs.append(doc)
+    return mergeDocs(docs, runOrder(fontPaths, configPath)), cached
+
+
+def worstStatus(doc):
+    """Answer the most severe status of the checks in the document, or None."""
+    statuses = [status for status in STATUSES if doc["result"].get(status)]
+    return statuses[-1] if statuses else None
+
+
+def writeReports(
+    doc, html=None, ghmarkdown=None, badges=None, loglevel="WARN", succinct=True
+):
+    """Write the document with the reporters of fontbakery, to the HTML file, the
+    GitHub Markdown file and the badges directory that are not None. Only checks
+    with loglevel or more severe are shown."""
+    from fontbakery.reporters.badge import BadgeReporter
+    from fontbakery.reporters.ghmarkdown import GHMarkdownReporter
+    from fontbakery.reporters.html import HTMLReporter
+    from fontbakery.status import Status
+
+    loglevels = [Status(status) for status in STATUSES[STATUSES.index(loglevel) :]]
+    # The HTML reporter only needs the profile of the runner, for its templates.
+    runner = SimpleNamespace(profile=loadProfile())
+    for reporterClass, path in (
+        (HTMLReporter, html),
+        (GHMarkdownReporter, ghmarkdown),
+        (BadgeReporter, badges),
+    ):
+        if path is None:
+            continue
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        reporter = reporterClass(
+            runner=runner,
+            loglevels=loglevels,
+            output_file=path,
+            succinct=succinct,
+            quiet=True,
+        )
+        # The reporters change the document while they write it.
+        docCopy = copy.deepcopy(doc)
+        reporter._counter = docCopy["result"]
+        reporter._sections = {
+            section["key"][0]: section for section in docCopy["sections"]
+        }
+        reporter.write()
@@ -0,0 +1,331 @@
+# -*- coding: UTF-8 -*-
+#
+#   Render Bitcount text straight from the pixel grids, without FreeType.
+#
+#   Every Bitcount glyph is a set of px components on the grid, so instead of
+#   rasterizing the outlines of each glyph, the px shape is rasterized once for
+#   each (location, size) and then stamped on all pixel positions of the text
+#   with NumPy. The glyph bitmaps and advance widths come from the bitmap index
+#   of the source UFOs, the italic source if slnt is not 0. The px shape comes from
+#   the compiled VF, or from Bitcount-VariationPixels.ufo if the location is one
+#   of the masters.
+#   The text is shaped from the sources too: the ligatures without context of the
+#   features that HarfBuzz applies by default (liga and calt in Bitcount), and
+#   the kerning pairs of kerning.plist. Other GSUB and GPOS lookups are not
+#   applied, and italic glyphs at an slnt between 0 and the italic master are
+#   the italic bitmaps sheared by the slant, not the interpolated outlines.
+#
+#       from scriptsLib.render import renderText
+#       image = renderText("Bitcount", "Grid", "Single", {"wght": 700}, size=48)
+#
+#   The answered image is a 2D uint8 array of ink coverage, 255 is black.
+#   Positions of the pixels are rounded to whole device pixels.
+#
+import itertools
+import math
+import os
+
+import numpy as np
+from fontTools.feaLib import ast
+from fontTools.pens.basePen import BasePen
+from fontTools.ttLib import TTFont
+from fontTools.ufoLib.kerning import lookupKerningValue
+
+from scriptsLib import (
+    PIXEL_NAME,
+    VARIATION_PIXELS,
+    VF_PATH,
+    DesignSpaceParams,
+    slnt_MIN,
+)
+from scriptsLib.bitmaps import BITMAPS, ITALIC_OFFSETS, P, SLOPE
+from scriptsLib.glyphData import PIXEL_DATA
+from scriptsLib.sources import SOURCES
+
+UPM = 1000
+ASCENDER = 840  # As set in the masters by copyMasters
+DESCENDER = -360
+SUPER_SAMPLING = 8  # Samples per device pixel in each direction for anti-aliasing
+CURVE_STEPS = 8  # Line segments per curve when flattening the px outline
+
+DEFAULT_LOCATION = {"wght": 400, "ELXP": 0, "ELSH": 0, "slnt": 0}
+# Features with ligatures that HarfBuzz applies by default.
+LIGATURE_FEATURES = ("ccmp", "rlig", "liga", "clig", "calt")
+
+_vfs = {}  # Opened VFs by path
+_pixelRasters = {}  # (variant, stem, location, size) --> (raster, dx, dy)
+_ligatures = {}  # ufoName --> {(glyphName, ...): ligatureName}
+_kernings = {}  # ufoName --> (kerning, groups, glyphToFirstGroup, glyphToSecondGroup)
+
+
+class FlattenPen(BasePen):
+    """Collect the contours of a glyph as lists of points, with curves
+    flattened into CURVE_STEPS line segments."""
+
+    def __init__(self, glyphSet=None):
+        super().__init__(glyphSet)
+        self.contours = []
+
+    def _moveTo(self, pt):
+        self.contours.append([pt])
+
+    def _lineTo(self, pt):
+        self.contours[-1].append(pt)
+
+    def _curveToOne(self, pt1, pt2, pt3):
+        x0, y0 = self._getCurrentPoint()
+        for i in range(1, CURVE_STEPS + 1):
+            t = i / CURVE_STEPS
+            u = 1 - t
+            self.contours[-1].append(
+                (
+                    u**3 * x0
+                    + 3 * u**2 * t * pt1[0]
+                    + 3 * u * t**2 * pt2[0]
+                    + t**3 * pt3[0],
+                    u**3 * y0
+                    + 3 * u**2 * t * pt1[1]
+                    + 3 * u * t**2 * pt2[1]
+                    + t**3 * pt3[1],
+                )
+            )
+
+    def _qCurveToOne(self, pt1, pt2):
+        x0, y0 = self._getCurrentPoint()
+        for i in range(1, CURVE_STEPS + 1):
+            t = i / CURVE_STEPS
+            u = 1 - t
+            self.contours[-1].append(
+                (
+                    u**2 * x0 + 2 * u * t * pt1[0] + t**2 * pt2[0],
+                    u**2 * y0 + 2 * u * t * pt1[1] + t**2 * pt2[1],
+                )
+            )
+
+
+def rasterize(contours, scale):
+    """Answer the coverage raster of the contours, scaled from units to device pixels,
+    as (raster, dx, dy), where (dx, dy) is the device position of the top-left corner
+    of the raster relative to the origin, y pointing down. Nonzero winding fill."""
+    edges = []
+    for contour in contours:
+        points = [(x * scale, -y * scale) for x, y in contour]
+        for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1]):
+            if y0 != y1:
+                edges.append((x0, y0, x1, y1))
+    if not edges:
+        return np.zeros((0, 0), dtype=np.uint8), 0, 0
+    edges = np.array(edges)
+    xs = np.concatenate([edges[:, 0], edges[:, 2]])
+    ys = np.concatenate([edges[:, 1], edges[:, 3]])
+    dx, dy = math.floor(xs.min()), math.floor(ys.min())
+    w, h = math.ceil(xs.max()) - dx, math.ceil(ys.max()) - dy
+
+    # Winding number of the center of each sample, for all edges at once.
+    s = SUPER_SAMPLING
+    sx = dx + (np.arange(w * s) + 0.5) / s
+    sy = dy + (np.arange(h * s) + 0.5) / s
+    x0, y0, x1, y1 = (edges[:, i][:, None, None] for i in range(4))
+    py = sy[None, :, None]
+    px = sx[None, None, :]
+    t = (py - y0) / (y1 - y0)
+    crossX = x0 + t * (x1 - x0)
+    down = (y0 <= py) & (py < y1)
+    up = (y1 <= py) & (py < y0)
+    winding = ((down & (px < crossX)).astype(np.int16) - (up & (px < crossX))).sum(
+        axis=0
+    )
+    coverage = (winding != 0).reshape(h, s, w, s).mean(axis=(1, 3))
+    return (coverage * 255 + 0.5).astype(np.uint8), dx, dy
+
+
+def _locationKey(location):
+    loc = dict(DEFAULT_LOCATION)
+    loc.update(location or {})
+    return tuple(sorted(loc.items()))
+
+
+def pixelContours(variant, stem, location=None):
+    """Answer the flattened contours of the px glyph at the location, in units.
+    Read from the compiled VF if it exists, otherwise the location must be one of the
+    masters in Bitcount-VariationPixels.ufo."""
+    loc = dict(_locationKey(location))
+    vfPath = VF_PATH + DesignSpaceParams(variant, stem).vfName
+    pen = FlattenPen()
+    if os.path.exists(vfPath):
+        if vfPath not in _vfs:
+            _vfs[vfPath] = TTFont(vfPath, lazy=True)
+        glyphSet = _vfs[vfPath].getGlyphSet(location=loc)
+        pen.glyphSet = glyphSet
+        glyphSet[PIXEL_NAME].draw(pen)
+        return pen.contours
+    pd = PIXEL_DATA.atLocation((loc["wght"], loc["ELXP"], loc["ELSH"], loc["slnt"]))
+    if pd is not None:
+        SOURCES.glyph(VARIATION_PIXELS, pd.name).draw(pen)
+        return pen.contours
+    raise ValueError(
+        "### No %s to render location %s, build the fonts first" % (vfPath, loc)
+    )
+
+
+def pixelRaster(variant, stem, location, size):
+    """Answer the cached (raster, dx, dy) of the px glyph at the location and size."""
+    key = (variant, stem, _locationKey(location), size)
+    raster = _pixelRasters.get(key)
+    if raster is None:
+        contours = pixelContours(variant, stem, location)
+        raster = _pixelRasters[key] = rasterize(contours, size / UPM)
+    return raster
+
+
+def sourceLigatures(ufoName):
+    """Answer the dictionary {(glyphName, ...): ligatureName} of the ligature
+    substitutions without context in the LIGATURE_FEATURES of the source."""
+    ligatures = _ligatures.get(ufoName)
+    if ligatures is None:
+        ligatures = _ligatures[ufoName] = {}
+        for block in SOURCES.features(ufoName).statements:
+            if not isinstance(block, ast.FeatureBlock):
+                continue
+            if block.name not in LIGATURE_FEATURES:
+                continue
+            statements = []
+            for statement in block.statements:
+                if isinstance(statement, ast.LookupBlock):
+                    statements += statement.statements
+                else:
+                    statements.append(statement)
+            for statement in statements:
+                if not isinstance(statement, ast.LigatureSubstStatement):
+                    continue
+                if statement.prefix or statement.suffix:
+                    continue
+                for names in itertools.product(
+                    *(glyph.glyphSet() for glyph in statement.glyphs)
+                ):
+                    ligatures.setdefault(names, statement.replacement)
+    return ligatures
+
+
+def substituteLigatures(glyphNames, ligatures):
+    """Answer the glyph names with the longest ligature substituted at every
+    position, from the start of the line."""
+    longest = max((len(names) for names in ligatures), default=0)
+    result = []
+    i = 0
+    while i < len(glyphNames):
+        for n in range(min(longest, len(glyphNames) - i), 1, -1):
+            ligature = ligatures.get(tuple(glyphNames[i : i + n]))
+            if ligature is not None:
+                result.append(ligature)
+                i += n
+                break
+        else:
+            result.append(glyphNames[i])
+            i += 1
+    return result
+
+
+def kerningValue(ufoName, first, second):
+    """Answer the kerning of the pair of glyph names in the source, with the groups
+    of kerning.plist as ufo2ft compiles them into GPOS."""
+    kerning = _kernings.get(ufoName)
+    if kerning is None:
+        font = SOURCES.font(ufoName)
+        glyphToFirstGroup = {}
+        glyphToSecondGroup = {}
+        for groupName, glyphNames in font.groups.items():
+            if groupName.startswith("public.kern1."):
+                glyphToFirstGroup.update(dict.fromkeys(glyphNames, groupName))
+            elif groupName.startswith("public.kern2."):
+                glyphToSecondGroup.update(dict.fromkeys(glyphNames, groupName))
+        kerning = _kernings[ufoName] = (
+            dict(font.kerning),
+            dict(font.groups),
+            glyphToFirstGroup,
+            glyphToSecondGroup,
+        )
+    kerning, groups, glyphToFirstGroup, glyphToSecondGroup = kerning
+    if not kerning:
+        return 0
+    return lookupKerningValue(
+        (first, second),
+        kerning,
+        groups,
+        glyphToFirstGroup=glyphToFirstGroup,
+        glyphToSecondGroup=glyphToSecondGroup,
+    )
+
+
+def textToGlyphNames(text, variant, stem):
+    """Answer the lines of the text as lists of glyph names, with the ligatures of
+    the source. Characters that are not in the font become .notdef."""
+    cmap = BITMAPS.cmap(variant, stem)
+    ligatures = sourceLigatures(BITMAPS.ufoName(variant, stem))
+    return [
+        substituteLigatures([cmap.get(ord(c), ".notdef") for c in line], ligatures)
+        for line in text.split("\n")
+    ]
+
+
+def layoutGlyphs(lines, variant, stem, location=None, size=32):
+    """Answer the (x, y) device positions of the origin of all pixels in the lines
+    of glyph names, relative to the top left of the image, and the size of the
+    image as (w, h). The glyphs are kerned, glyph names that are not in the font
+    are skipped."""
+    loc = dict(_locationKey(location))
+    scale = size / UPM
+    slant = loc["slnt"] / slnt_MIN  # 0 for roman, 1 for full italic
+    italicOffset = ITALIC_OFFSETS.get(variant, 0)
+    ufoName = BITMAPS.ufoName(variant, stem, italic=bool(loc["slnt"]))
+    glyphs = BITMAPS.font(ufoName)
+
+    xs = []
+    ys = []
+    width = 0
+    for lineIndex, line in enumerate(lines):
+        x = 0
+        baseline = ASCENDER + lineIndex * (ASCENDER - DESCENDER)
+        previous = None
+        for glyphName in line:
+            glyph = glyphs.get(glyphName)
+            if glyph is None:
+                continue
+            if previous is not None:
+                x += kerningValue(ufoName, previous, glyphName)
+            for col, row in glyph.pixels:
+                xs.append(x + col * P + (row * SLOPE + italicOffset) * slant)
+                ys.append(baseline - row * P)
+            x += glyph.width
+            previous = glyphName
+        width = max(width, x)
+    w = math.ceil(width * scale)
+    h = math.ceil(len(lines) * (ASCENDER - DESCENDER) * scale)
+    xs = np.round(np.array(xs) * scale).astype(int)
+    ys = np.round(np.array(ys) * scale).astype(int)
+    return xs, ys, (w, h)
+
+
+def renderGlyphs(lines, variant, stem, location=None, size=32):
+    """Render the lines of glyph names, see renderText."""
+    xs, ys, (w, h) = layoutGlyphs(lines, variant, stem, location, size)
+    raster, dx, dy = pixelRaster(variant, stem, location, size)
+    rh, rw = raster.shape
+    # The px raster may stick out of its cell, add a margin to the image for it.
+    margin = max(0, -dx, -dy, dx + rw, dy + rh)
+    image = np.zeros((h + 2 * margin, w + 2 * margin), dtype=np.uint8)
+    if len(xs) and raster.size:
+        # Index of every raster sample for every pixel, stamped all at once.
+        # Neighbouring pixels can overlap, so keep the max coverage.
+        rows = (ys + dy + margin)[:, None, None] + np.arange(rh)[None, :, None]
+        cols = (xs + dx + margin)[:, None, None] + np.arange(rw)[None, None, :]
+        np.maximum.at(image, (rows, cols), raster[None, :, :])
+    return image[margin : margin + h, margin : margin + w]
+
+
+def renderText(text, variant, stem, location=None, size=32):
+    """Render the text with the Bitcount variant and stem at the location in the
+    design space (dict of wght, ELXP, ELSH and slnt user values) at size pixels
+    per em. Answer a 2D uint8 array of ink coverage."""
+    lines = textToGlyphNames(text, variant, stem)
+    return renderGlyphs(lines, variant, stem, location, size)
@@ -0,0 +1,76 @@
+# -*- coding: UTF-8 -*-
+#
+#   Bytes saved by sharing the paint trees of glyphs with the same pixels.
+#
+#   colrv1.py paints a glyph with the same bitmap as an earlier glyph as
+#   PaintColrGlyph of that glyph, and a glyph that is a single component
+#   reference in glyf (copyMasters with dedupe) as PaintColrGlyph of its
+#   component. sharingReport compiles the COLR table of the paints as they are,
+#   and with the paint tree of the referred glyph copied into every glyph that
+#   shares it, as it would be without sharing. Both tables are compiled without
+#   the variation store, that is the same for both.
+#   For the single component references it also answers the bytes of glyf, as
+#   the difference of the compiled reference and the compiled glyph that it
+#   refers to. gvar is not included.
+#
+#       from scriptsLib.sharing import sharingReport
+#       print(sharingReport(font, glyphs, sharedPaints, glyfReferences))
+#
+from fontTools.colorLib.builder import buildCOLR
+from fontTools.misc.textTools import pad
+from fontTools.ttLib.tables.otTables import PaintFormat
+
+
+def unsharedPaint(paint, glyphs, sharedPaints):
+    """Answer the paint with every PaintColrGlyph of a glyph in sharedPaints
+    replaced by the paint tree of the glyph that it shares."""
+    if paint.get("Format") == PaintFormat.PaintColrGlyph:
+        glyphName = paint["Glyph"]
+        if glyphName in glyphs and glyphName in sharedPaints.values():
+            return unsharedPaint(glyphs[glyphName], glyphs, sharedPaints)
+        return paint
+    if isinstance(paint.get("Paint"), dict):
+        return dict(paint, Paint=unsharedPaint(paint["Paint"], glyphs, sharedPaints))
+    return paint
+
+
+def colrSize(ttFont, glyphs):
+    """Answer the number of bytes of the COLR table of the paints in the glyphs
+    dictionary, compiled without variation store."""
+    return len(buildCOLR(glyphs, version=1).compile(ttFont))
+
+
+def glyfSize(ttFont, glyphNames):
+    """Answer the number of bytes of the glyphs in the glyf table of ttFont, padded
+    as the table stores them."""
+    glyfTable = ttFont["glyf"]
+    return sum(
+        len(pad(glyfTable[glyphName].compile(glyfTable), 4)) for glyphName in glyphNames
+    )
+
+
+def sharingReport(ttFont, glyphs, sharedPaints, glyfReferences=()):
+    """Answer the report of the bytes that sharing saves. sharedPaints is the
+    dictionary {glyphName: name of the glyph whose paint tree it refers to},
+    glyfReferences the names of its glyphs that are a single component reference
+    in glyf."""
+    unshared = {
+        glyphName: (
+            unsharedPaint(paint, glyphs, sharedPaints)
+            if glyphName in sharedPaints
+            else paint
+        )
+        for glyphName, paint in glyphs.items()
+    }
+    shared, copied = colrSize(ttFont, glyphs), colrSize(ttFont, unshared)
+    report = "COLR %d --> %d bytes, %d saved" % (copied, shared, copied - shared)
+    if glyfReferences:
+        references = glyfSize(ttFont, glyfReferences)
+        targets = sum(
+            glyfSize(ttFont, [sharedPaints[glyphName]]) for glyphName in glyfReferences
+        )
+        report += ", glyf %d bytes saved by %d references" % (
+            targets - references,
+            len(glyfReferences),
+        )
+    return report
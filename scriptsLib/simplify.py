@@ -0,0 +1,221 @@
+# -*- coding: UTF-8 -*-
+#
+#   Simplify the COLRv1 paint trees of scriptsLib/colrv1.py before paintcompiler
+#   builds the COLR table from them.
+#
+#   The paint functions of paintcompiler answer dictionaries in the format of
+#   fontTools.colorLib.builder. colrv1.py calls simplifyPaints on its `glyphs`
+#   dictionary at the end, so the pass runs between the paint definitions and
+#   buildCOLR. It rewrites chains of static (not variable) transforms:
+#
+#   - Identity transforms are dropped, e.g. PaintScale(LS, ...) with LS = 1.
+#   - Nested transforms are folded into one transform, e.g. translate of translate
+#     becomes one PaintTranslate.
+#
+#   A chain is only folded if the combined transform can be stored exactly in the
+#   table format of the result, so the rendering does not change. Variable
+#   transforms are left as they are: their values are already in the variation
+#   store when the dictionaries are made.
+#   Paints that are shared by glyphs or layers stay shared, so buildCOLR can still
+#   reuse their layers.
+#
+#       from scriptsLib.simplify import simplifyPaints
+#       report = simplifyPaints(glyphs)
+#
+from dataclasses import dataclass
+
+from fontTools.misc.fixedTools import fixedToFloat, floatToFixed, otRound
+from fontTools.misc.transform import Identity, Transform
+
+# Formats of the static transforms in fontTools.colorLib.builder dictionaries.
+TRANSFORM = 12
+TRANSLATE = 14
+SCALE = 16
+SCALE_CENTER = 18
+SCALE_UNIFORM = 20
+SCALE_UNIFORM_CENTER = 22
+ROTATE = 24
+ROTATE_CENTER = 26
+SKEW = 28
+SKEW_CENTER = 30
+STATIC_TRANSFORMS = {
+    TRANSFORM,
+    TRANSLATE,
+    SCALE,
+    SCALE_CENTER,
+    SCALE_UNIFORM,
+    SCALE_UNIFORM_CENTER,
+    ROTATE,
+    ROTATE_CENTER,
+    SKEW,
+    SKEW_CENTER,
+}
+CHILD_KEYS = ("Paint", "SourcePaint", "BackdropPaint")
+
+
+@dataclass
+class SimplifyReport:
+    """Number of paints of the glyphs before and after simplifyPaints. The paints
+    are counted as objects (shared paints once) and as nodes of the trees of the
+    glyphs (shared paints for every use, not following PaintColrGlyph)."""
+
+    objectsBefore: int = 0
+    objectsAfter: int = 0
+    nodesBefore: int = 0
+    nodesAfter: int = 0
+    identities: int = 0  # Identity transforms that are dropped
+    folded: int = 0  # Transforms that are folded into another one
+
+    def __repr__(self):
+        return (
+            "%d identity transforms dropped, %d transforms folded, paint objects "
+            "%d --> %d, paint nodes %d --> %d"
+            % (
+                self.identities,
+                self.folded,
+                self.objectsBefore,
+                self.objectsAfter,
+                self.nodesBefore,
+                self.nodesAfter,
+            )
+        )
+
+
+def _children(paint):
+    result = [paint[key] for key in CHILD_KEYS if isinstance(paint.get(key), dict)]
+    return result + [
+        layer for layer in paint.get("Layers", ()) if isinstance(layer, dict)
+    ]
+
+
+def countPaints(glyphs):
+    """Answer (objects, nodes) of the paint trees in the glyphs dictionary."""
+    objects = {}  # id(paint) --> number of nodes of its tree
+
+    def visit(paint):
+        key = id(paint)
+        if key not in objects:
+            objects[key] = 1 + sum(visit(child) for child in _children(paint))
+        return objects[key]
+
+    nodes = sum(visit(paint) for paint in glyphs.values())
+    return len(objects), nodes
+
+
+def _f2dot14(value):
+    return fixedToFloat(floatToFixed(value, 14), 14)
+
+
+def _fixed(value):
+    return fixedToFloat(floatToFixed(value, 16), 16)
+
+
+def transformOf(paint):
+    """Answer the Transform of a static transform paint, with the values as they are
+    stored in the table. Answer None for a rotation or skew that is not zero, these
+    can't be folded exactly."""
+    fmt = paint["Format"]
+    if fmt == TRANSFORM:
+        m = paint["Transform"]
+        return Transform(
+            *[_fixed(m[key]) for key in ("xx", "yx", "xy", "yy", "dx", "dy")]
+        )
+    if fmt == TRANSLATE:
+        return Transform().translate(otRound(paint["dx"]), otRound(paint["dy"]))
+    if fmt in (SCALE, SCALE_CENTER):
+        t = Transform().scale(_f2dot14(paint["scaleX"]), _f2dot14(paint["scaleY"]))
+    elif fmt in (SCALE_UNIFORM, SCALE_UNIFORM_CENTER):
+        t = Transform().scale(_f2dot14(paint["scale"]))
+    else:
+        # Angles are stored in half turns as F2Dot14.
+        angles = [
+            paint[key] for key in ("angle", "xSkewAngle", "ySkewAngle") if key in paint
+        ]
+        if any(_f2dot14(angle / 180) for angle in angles):
+            return None
+        return Identity
+    if fmt in (SCALE_CENTER, SCALE_UNIFORM_CENTER):
+        cx, cy = paint["centerX"], paint["centerY"]
+        t = Transform().translate(cx, cy).transform(t).translate(-cx, -cy)
+    return t
+
+
+def transformPaint(t, paint):
+    """Answer the simplest static transform paint of t around the paint, or None if
+    t cannot be stored exactly. Answer the paint itself if t is the identity."""
+    xx, yx, xy, yy, dx, dy = t
+    if (xx, yx, xy, yy) == (1, 0, 0, 1):
+        if dx == dy == 0:
+            return paint
+        if (
+            dx == int(dx)
+            and dy == int(dy)
+            and -32768 <= min(dx, dy) <= max(dx, dy) < 32768
+        ):
+            return {"Format": TRANSLATE, "dx": int(dx), "dy": int(dy), "Paint": paint}
+    elif xy == yx == dx == dy == 0 and all(
+        -2 <= v < 2 and _f2dot14(v) == v for v in (xx, yy)
+    ):
+        if xx == yy:
+            return {"Format": SCALE_UNIFORM, "scale": xx, "Paint": paint}
+        return {"Format": SCALE, "scaleX": xx, "scaleY": yy, "Paint": paint}
+    if all(-32768 <= v < 32768 and _fixed(v) == v for v in t):
+        return {
+            "Format": TRANSFORM,
+            "Paint": paint,
+            "Transform": dict(xx=xx, yx=yx, xy=xy, yy=yy, dx=dx, dy=dy),
+        }
+    return None
+
+
+def isStatic(paint):
+    """Answer True if the paint is a static transform that can be folded."""
+    return (
+        isinstance(paint, dict)
+        and paint.get("Format") in STATIC_TRANSFORMS
+        and transformOf(paint) is not None
+    )
+
+
+def simplifyPaints(glyphs):
+    """Simplify the paint trees of the glyphs dictionary {glyphName: paint} in place.
+    Answer the SimplifyReport."""
+    report = SimplifyReport()
+    report.objectsBefore, report.nodesBefore = countPaints(glyphs)
+    memo = {}  # id(paint) --> simplified paint, so shared paints stay shared
+
+    def simplify(paint):
+        if not isinstance(paint, dict):
+            return paint
+        key = id(paint)
+        if key in memo:
+            return memo[key]
+        if isStatic(paint):
+            # Collect the chain of static transforms and fold them into one.
+            chain = [paint]
+            t = transformOf(paint)
+            while isStatic(chain[-1]["Paint"]):
+                chain.append(chain[-1]["Paint"])
+                t = t.transform(transformOf(chain[-1]))
+            child = simplify(chain[-1]["Paint"])
+            result = transformPaint(t, child)
+            if result is not None:
+                if result is child:
+                    report.identities += len(chain)
+                else:
+                    report.folded += len(chain) - 1
+                memo[key] = result
+                return result
+        result = dict(paint)
+        for childKey in CHILD_KEYS:
+            if childKey in result:
+                result[childKey] = simplify(result[childKey])
+        if "Layers" in result:
+            result["Layers"] = [simplify(layer) for layer in result["Layers"]]
+        memo[key] = result
+        return result
+
+    for glyphName, paint in glyphs.items():
+        glyphs[glyphName] = simplify(paint)
+    report.objectsAfter, report.nodesAfter = countPaints(glyphs)
+    return report
@@ -0,0 +1,79 @@
+# -*- coding: UTF-8 -*-
+#
+#   Read-only cache of the source UFOs and features, shared by all design spaces
+#   that are built in the same process.
+#
+#   Each source UFO is opened once, with lazy loading, so only the glyphs that
+#   are actually used get parsed. The sparse masters only need the px glyph
+#   of Bitcount-VariationPixels.ufo, the rest of its glyphs is never read.
+#   The cache answers copies of glyphs, the cached sources must never be changed.
+#
+import ufoLib2
+
+from fontTools.feaLib.parser import Parser
+
+from scriptsLib import UFO_PATH
+
+
+class SourceCache:
+    """Open source UFOs and parse features.fea files once per process."""
+
+    def __init__(self, path=UFO_PATH):
+        self.path = path
+        self._fonts = {}
+        self._features = {}
+        self.hits = self.misses = 0
+
+    def __repr__(self):
+        return "<%s %d fonts, %d hits, %d misses>" % (
+            self.__class__.__name__,
+            len(self._fonts),
+            self.hits,
+            self.misses,
+        )
+
+    def font(self, ufoName):
+        """Answer the lazy loaded ufoLib2.Font of the source. Read only."""
+        font = self._fonts.get(ufoName)
+        if font is None:
+            self.misses += 1
+            font = self._fonts[ufoName] = ufoLib2.Font.open(
+                self.path + ufoName, lazy=True
+            )
+        else:
+            self.hits += 1
+        return font
+
+    def glyph(self, ufoName, glyphName, name=None):
+        """Answer a copy of the glyph in the source, optionally renamed to `name`.
+        Only this glyph gets loaded from the UFO."""
+        return self.font(ufoName)[glyphName].copy(name)
+
+    def glyphs(self, ufoName, prefix=""):
+        """Answer copies of all glyphs in the source, with `prefix` added to their names."""
+        font = self.font(ufoName)
+        return [font[name].copy(prefix + name) for name in font.keys()]
+
+    def features(self, ufoName):
+        """Answer the parsed feaLib AST of the features.fea of the source. Read only."""
+        features = self._features.get(ufoName)
+        if features is None:
+            self.misses += 1
+            features = self._features[ufoName] = Parser(
+                self.path + ufoName + "/features.fea"
+            ).parse()
+        else:
+            self.hits += 1
+        return features
+
+    def clear(self):
+        """Forget all sources, e.g. after they changed on disk."""
+        self._fonts.clear()
+        self._features.clear()
+
+    def report(self):
+        return "%d hits, %d misses" % (self.hits, self.misses)
+
+
+# Shared by all design spaces that are built in this process.
+SOURCES = SourceCache()
@@ -0,0 +1,162 @@
+# -*- coding: UTF-8 -*-
+#
+#   Incremental writing of UFOs.
+#
+#   Instead of removing a UFO and writing it again, syncUFO compares every
+#   .glif and plist with what is already on disk and only rewrites the files
+#   that changed. Glyphs of a new UFO that are identical to the file in the
+#   UFO it was copied from get reflinked (copy on write) instead of written, if
+#   the filesystem can. Hardlinks are only made on request: a program that
+#   writes into a hardlinked file, like ufoLib or a font editor, would change
+#   the source UFO too. Hardlinked files are made read-only.
+#
+import fcntl
+import os
+import shutil
+import stat
+
+from fontTools.ufoLib import UFOFileStructure, UFOLibError, UFOReader, UFOWriter
+from fontTools.ufoLib.glifLib import writeGlyphToString
+
+FICLONE = 0x40049409  # Linux ioctl to make a copy-on-write clone of a file
+
+
+def linkFile(srcPath, dstPath, hardlink=False):
+    """Make dstPath share the content of srcPath. Try a reflink (copy on write), and
+    copy the file if the filesystem does not support it. If hardlink is True, try
+    a hardlink first, and make the file read-only, for both paths."""
+    if hardlink:
+        try:
+            os.link(srcPath, dstPath)
+            mode = os.stat(dstPath).st_mode
+            os.chmod(dstPath, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+            return
+        except OSError:
+            pass
+    try:
+        with open(srcPath, "rb") as src, open(dstPath, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return
+    except OSError:
+        pass
+    shutil.copyfile(srcPath, dstPath)
+
+
+def _readBytes(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+class SyncCounts:
+    """Number of files that syncUFO wrote, linked, kept and removed."""
+
+    def __init__(self):
+        self.written = self.linked = self.unchanged = self.removed = 0
+
+    def __iadd__(self, other):
+        self.written += other.written
+        self.linked += other.linked
+        self.unchanged += other.unchanged
+        self.removed += other.removed
+        return self
+
+    def __repr__(self):
+        return "%d written, %d linked, %d unchanged, %d removed" % (
+            self.written,
+            self.linked,
+            self.unchanged,
+            self.removed,
+        )
+
+
+def _syncLayer(layer, glyphSet, linkFrom, counts, hardlink=False):
+    glyphsPath = glyphSet.fs.getsyspath("/")
+    linkContents = {}
+    if linkFrom is not None:
+        linkContents = linkFrom.contents
+        linkPath = linkFrom.fs.getsyspath("/")
+    existing = {fileName.lower() for fileName in glyphSet.contents.values()}
+
+    for glyph in layer:
+        name = glyph.name
+        data = writeGlyphToString(name, glyph, glyph.drawPoints).encode("utf-8")
+        fileName = glyphSet.contents.get(name)
+        if fileName is None:
+            fileName = glyphSet.glyphNameToFileName(name, existing)
+            existing.add(fileName.lower())
+        path = os.path.join(glyphsPath, fileName)
+        current = _readBytes(path)
+        if current is not None and not hardlink and os.stat(path).st_nlink > 1:
+            current = None  # Hardlinked by an older build, replace it by a copy
+            os.remove(path)
+        if current == data:
+            counts.unchanged += 1
+            glyphSet.contents[name] = fileName
+            continue
+        if current is not None:
+            # Never write into the file, it may be linked to the source UFO.
+            os.remove(path)
+        linkFileName = linkContents.get(name)
+        if (
+            linkFileName is not None
+            and _readBytes(os.path.join(linkPath, linkFileName)) == data
+        ):
+            linkFile(os.path.join(linkPath, linkFileName), path, hardlink)
+            counts.linked += 1
+        else:
+            with open(path, "wb") as f:
+                f.write(data)
+            counts.written += 1
+        glyphSet.contents[name] = fileName
+
+    for name in set(glyphSet.contents) - set(layer.keys()):
+        os.remove(os.path.join(glyphsPath, glyphSet.contents.pop(name)))
+        counts.removed += 1
+    glyphSet._existingFileNames = None  # We changed the contents behind its back
+    glyphSet.writeContents()
+    glyphSet.writeLayerInfo(layer)
+
+
+def syncUFO(font, path, linkFrom=None, hardlink=False):
+    """Write the ufoLib2.Font to path, only rewriting the .glif files and plists
+    that changed. If linkFrom is the path of the UFO that the font was opened from,
+    unchanged .glif files are reflinked to that UFO instead of written, or
+    hardlinked read-only if hardlink is True, see linkFile.
+    Answer the SyncCounts of the glyph files."""
+    counts = SyncCounts()
+    try:
+        writer = UFOWriter(path, structure=UFOFileStructure.PACKAGE)
+    except UFOLibError:
+        # Left broken by an interrupted build, start again from scratch.
+        shutil.rmtree(path)
+        writer = UFOWriter(path, structure=UFOFileStructure.PACKAGE)
+    reader = None
+    if linkFrom is not None:
+        reader = UFOReader(linkFrom)
+    writer.writeFeatures(font.features.text)
+    writer.writeGroups(font.groups)
+    writer.writeInfo(font.info)
+    writer.writeKerning(font.kerning)
+    writer.writeLib(font.lib)
+
+    for name in set(writer.layerContents) - set(font.layers.layerOrder):
+        writer.deleteGlyphSet(name)
+    defaultLayer = font.layers.defaultLayer
+    for layer in font.layers:
+        default = layer is defaultLayer
+        glyphSet = writer.getGlyphSet(layer.name, defaultLayer=default)
+        linkGlyphSet = None
+        if reader is not None and layer.name in reader.getLayerNames():
+            linkGlyphSet = reader.getGlyphSet(layer.name)
+        _syncLayer(layer, glyphSet, linkGlyphSet, counts, hardlink)
+    writer.writeLayerContents(font.layers.layerOrder)
+
+    font.data.write(writer, saveAs=False)
+    font.images.write(writer, saveAs=False)
+    writer.close()
+    if reader is not None:
+        reader.close()
+    return counts
@@ -0,0 +1,370 @@
+# -*- coding: UTF-8 -*-
+#
+#   Timing and memory use of the build stages, as Chrome trace events and a
+#   summary table.
+#
+#   Every span records its wall time, the CPU time of this process and the CPU
+#   time of the child processes that finished in it (gftools, paintcompiler).
+#   It also records the peak RSS of the build process during the span and the
+#   largest peak RSS of the child processes that runCommand started in it.
+#   With tracemalloc on, the spans of Python stages also record the peak of the
+#   Python allocations and the top allocation sites at their end.
+#   A memory budget makes a stage fail with MemoryBudgetError if its peak RSS,
+#   or that of one of its child processes, is larger.
+#   The build job of each design space collects its own spans and answers them
+#   to the main process, which writes them into one trace file, to view in
+#   chrome://tracing or https://ui.perfetto.dev
+#
+#   With BITCOUNT_PROFILE=1 (or a directory name) in the environment, spans that
+#   run Python code in the build process are also profiled with cProfile. Each one
+#   writes a .prof file for pstats or snakeviz and a .txt with the top functions.
+#
+#       BITCOUNT_PROFILE=1 python3 scripts/build.py --no-cache --trace out/trace.json
+#
+import cProfile
+import json
+import os
+import pstats
+import re
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from scriptsLib import PROFILE_PATH
+
+PROFILE_ENV = "BITCOUNT_PROFILE"
+PROFILE_LINES = 40  # Number of functions in the .txt summary of a profile
+ALLOCATION_SITES = 10  # Number of top allocation sites recorded by tracemalloc
+MB = 1024**2
+
+
+class MemoryBudgetError(Exception):
+    """A stage of the build used more memory than the budget."""
+
+
+def profilePath(job, name):
+    """Answer the path of the .prof file of the span, without extension, if profiling
+    is enabled by the environment. Otherwise answer None."""
+    value = os.environ.get(PROFILE_ENV)
+    if not value:
+        return None
+    path = PROFILE_PATH if value == "1" else value
+    os.makedirs(path, exist_ok=True)
+    return os.path.join(path, re.sub(r"[^\w.-]+", "_", "%s-%s" % (job, name)))
+
+
+def writeProfileSummary(path):
+    """Write the top functions by cumulative time of path.prof into path.txt."""
+    with open(path + ".txt", "w") as f:
+        stats = pstats.Stats(path + ".prof", stream=f)
+        stats.sort_stats("cumulative").print_stats(PROFILE_LINES)
+
+
+def _childTime():
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+def _maxRSS(rusage):
+    """Answer the ru_maxrss of the resource usage in bytes."""
+    if sys.platform == "darwin":
+        return rusage.ru_maxrss
+    return rusage.ru_maxrss * 1024
+
+
+def processPeakRSS(pid="self"):
+    """Answer the peak RSS of the running process in bytes, if the OS tells (Linux).
+    Otherwise answer None."""
+    try:
+        with open("/proc/%s/status" % pid) as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _peakRSS():
+    """Answer the peak RSS of this process in bytes, since the last _resetPeakRSS."""
+    peak = processPeakRSS()
+    if peak is None:
+        peak = _maxRSS(resource.getrusage(resource.RUSAGE_SELF))
+    return peak
+
+
+def _resetPeakRSS():
+    """Reset the peak RSS of this process to the current RSS, if the OS can (Linux).
+    Otherwise the peak is the peak of the lifetime of the process."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+    )
+
+
+class Tracer:
+    """Collect the timed spans of the build job that runs in this process."""
+
+    def __init__(self):
+        self.start(None)
+
+    def start(self, job, memoryBudget=None, traceMalloc=False):
+        """Start collecting the spans of a new job. If memoryBudget is a number of
+        bytes, stages that use more fail. If traceMalloc is True, Python stages
+        are traced by tracemalloc, which makes them a lot slower."""
+        self.job = job
+        self.events = []
+        self.memoryBudget = memoryBudget
+        self.traceMalloc = traceMalloc
+        self._open = []  # Memory peaks of the open spans, the innermost last
+        if traceMalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def childProcess(self, process, interval=0.05):
+        """Watch the peak RSS of the subprocess.Popen in the with block, that must
+        reap it with os.wait4 and assign its resource usage to process.rusage.
+        The ru_maxrss of a child includes the RSS of this process when it forked,
+        so the peak is also sampled from /proc while it runs."""
+        parentPeak = _peakRSS()
+        sampled = [0]
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(interval):
+                sampled[0] = max(sampled[0], processPeakRSS(process.pid) or 0)
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        try:
+            yield
+        finally:
+            done.set()
+            sampler.join()
+        peak = sampled[0]
+        maxRSS = _maxRSS(process.rusage)
+        if maxRSS > parentPeak:  # Then it must be the peak of the child itself
+            peak = max(peak, maxRSS)
+        for peaks in self._open:
+            peaks["childRSS"] = max(peaks["childRSS"], peak)
+
+    def _foldPeaks(self):
+        """Add the peaks since the last reset to all open spans, then reset them."""
+        rss = _peakRSS()
+        python = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+        for peaks in self._open:
+            peaks["rss"] = max(peaks["rss"], rss)
+            peaks["python"] = max(peaks["python"], python)
+        _resetPeakRSS()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+    @contextmanager
+    def span(self, name, category="stage", profile=False):
+        """Time the code in the with block. If profile is True, the block runs Python
+        code in this process, so it is profiled with cProfile if profiling is enabled
+        and its allocations are recorded if traceMalloc is on."""
+        profiler = None
+        path = profilePath(self.job, name) if profile else None
+        if path is not None:
+            profiler = cProfile.Profile()
+        start = time.time()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        children = _childTime()
+        self._foldPeaks()
+        peaks = dict(rss=0, childRSS=0, python=0)
+        self._open.append(peaks)
+        traced = profile and self.traceMalloc
+        if traced:
+            before = _snapshot()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            self._foldPeaks()
+            self._open.pop()
+            allocations = []
+            if traced:
+                # Sites that hold more memory than at the start of the span.
+                allocations = [
+                    (str(stat.traceback[0]), stat.size_diff)
+                    for stat in _snapshot().compare_to(before, "lineno")
+                    if stat.size_diff > 0
+                ][:ALLOCATION_SITES]
+            event = dict(
+                name=name,
+                category=category,
+                job=self.job,
+                pid=os.getpid(),
+                depth=len(self._open),
+                start=start,
+                wall=time.perf_counter() - wall,
+                cpu=time.process_time() - cpu,
+                children=_childTime() - children,
+                rss=peaks["rss"],
+                childRSS=peaks["childRSS"],
+                python=peaks["python"] if self.traceMalloc else None,
+                allocations=allocations,
+            )
+            self.events.append(event)
+            if profiler is not None:
+                profiler.dump_stats(path + ".prof")
+                writeProfileSummary(path)
+                print("... Profile of %s in %s.prof" % (name, path))
+        # Only reached if the block did not raise an exception.
+        if self.memoryBudget and not self._open:
+            self._checkBudget(event)
+
+    def _checkBudget(self, event):
+        peak = max(event["rss"], event["childRSS"])
+        if peak <= self.memoryBudget:
+            return
+        lines = [
+            "Stage %s of %s used %d MB, the memory budget is %d MB"
+            % (event["name"], self.job, peak // MB, self.memoryBudget // MB),
+            "    Peak RSS of the build process: %d MB" % (event["rss"] // MB),
+            "    Peak RSS of its largest child process: %d MB"
+            % (event["childRSS"] // MB),
+        ]
+        # The Python stages that ran in this stage are the events just before it.
+        for inner in self.events[-2::-1]:
+            if inner["start"] < event["start"]:
+                break
+            if inner["python"] is not None:
+                lines.append(
+                    "    Peak of Python allocations in %s: %d MB"
+                    % (inner["name"], inner["python"] // MB)
+                )
+            lines += allocationReport([inner], indent="        ")
+        raise MemoryBudgetError("\n".join(lines))
+
+
+# Spans of the job in this process.
+TRACER = Tracer()
+
+
+def writeChromeTrace(path, events):
+    """Write the events as Chrome trace event JSON. Every job gets its own row."""
+    if not events:
+        return
+    t0 = min(e["start"] for e in events)
+    jobs = list(dict.fromkeys(e["job"] for e in events))
+    traceEvents = []
+    for tid, job in enumerate(jobs):
+        pid = next(e["pid"] for e in events if e["job"] == job)
+        traceEvents.append(
+            dict(name="thread_name", ph="M", pid=pid, tid=tid, args=dict(name=job))
+        )
+    for e in events:
+        traceEvents.append(
+            dict(
+                name=e["name"],
+                cat=e["category"],
+                ph="X",
+                pid=e["pid"],
+                tid=jobs.index(e["job"]),
+                ts=round((e["start"] - t0) * 1e6),
+                dur=round(e["wall"] * 1e6),
+                args=dict(
+                    cpu=round(e["cpu"], 3),
+                    children=round(e["children"], 3),
+                    rssMB=round(e["rss"] / MB, 1),
+                    childRssMB=round(e["childRSS"] / MB, 1),
+                ),
+            )
+        )
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(dict(traceEvents=traceEvents, displayTimeUnit="ms"), f)
+
+
+def summary(events):
+    """Answer the lines of a table with the total times of each span name over all
+    jobs, in the order they first ran. Nested spans are indented."""
+    totals = {}
+    for e in sorted(events, key=lambda e: e["start"]):
+        name = "  " * e["depth"] + e["name"]
+        total = totals.setdefault(
+            name,
+            dict(
+                jobs=0,
+                wall=0,
+                cpu=0,
+                children=0,
+                maxWall=0,
+                maxJob="",
+                rss=0,
+                childRSS=0,
+            ),
+        )
+        total["jobs"] += 1
+        for key in ("wall", "cpu", "children"):
+            total[key] += e[key]
+        for key in ("rss", "childRSS"):
+            total[key] = max(total[key], e[key])
+        if e["wall"] > total["maxWall"]:
+            total["maxWall"] = e["wall"]
+            total["maxJob"] = e["job"]
+    lines = [
+        "%-24s %4s %9s %9s %9s %9s %9s %9s  %s"
+        % (
+            "Stage",
+            "Jobs",
+            "Wall",
+            "CPU",
+            "Children",
+            "Max wall",
+            "RSS",
+            "Child RSS",
+            "Slowest job",
+        )
+    ]
+    for name, t in totals.items():
+        lines.append(
+            "%-24s %4d %8.2fs %8.2fs %8.2fs %8.2fs %6d MB %6d MB  %s"
+            % (
+                name,
+                t["jobs"],
+                t["wall"],
+                t["cpu"],
+                t["children"],
+                t["maxWall"],
+                t["rss"] // MB,
+                t["childRSS"] // MB,
+                t["maxJob"],
+            )
+        )
+    return lines
+
+
+def allocationReport(events, indent="    "):
+    """Answer the lines with the Python peak and top allocation sites of the events
+    that were traced by tracemalloc."""
+    lines = []
+    for e in events:
+        if not e["allocations"]:
+            continue
+        lines.append(
+            "%s%s %s: peak %d MB, grown at the end:"
+            % (indent, e["job"], e["name"], e["python"] // MB)
+        )
+        for site, size in e["allocations"]:
+            lines.append("%s    %8.1f MB %s" % (indent, size / MB, site))
+    return lines
@@ -0,0 +1,264 @@
+# -*- coding: UTF-8 -*-
+#
+#   Web delivery of the VFs: WOFF2 files, sliced by unicode-range, and an
+#   @font-face CSS manifest.
+#
+#   The build makes the web fonts of a design space after its color VF, in
+#   WEB_PATH/<variant>-<stem>/, for the VF and the color VF:
+#
+#   - <name>.<hash>.woff2, the complete font as WOFF2 (brotli).
+#   - <name>-<slice>.<hash>.woff2 for every slice of WEB_SLICES that has code
+#     points in the font, subset with the layout features, variations and COLRv1
+#     paints of the glyphs that the slice can reach.
+#   - webfonts.json, with the files, unicode ranges and sizes.
+#
+#   The <hash> is the start of the sha256 of the file, so the files can be served
+#   as immutable. writeCSS makes WEB_PATH/bitcount.css from the webfonts.json of all
+#   design spaces, with an @font-face for every slice. A browser then only fetches
+#   the slices with characters on the page. The family of the color VF gets
+#   " Color" after its name, as both fonts have the same family name.
+#
+#       from scriptsLib.web import makeWebFonts, readWebFonts, writeCSS
+#       makeWebFonts([vfPath, colorPath], "fonts/webfonts/Grid-Single/")
+#       writeCSS(readWebFonts(), "fonts/webfonts/bitcount.css")
+#
+import glob
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+
+from fontTools import subset
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables import otTables
+
+from scriptsLib import WEB_PATH, WEB_SLICES
+
+WEBFONTS_JSON = "webfonts.json"
+HASH_LENGTH = 8  # Hex digits of the content hash in the file names
+KB = 1024
+
+# The subsetter logs every table it prunes, only show its warnings in the build.
+logging.getLogger("fontTools.subset").setLevel(logging.WARNING)
+
+
+def parseUnicodeRange(value):
+    """Answer the set of code points of a CSS unicode-range like "U+0000-00FF,U+0131"."""
+    result = set()
+    for item in value.split(","):
+        item = item.strip().upper().replace("U+", "")
+        if not item:
+            continue
+        first, _, last = item.partition("-")
+        result.update(range(int(first, 16), int(last or first, 16) + 1))
+    return result
+
+
+def unicodeRange(codePoints):
+    """Answer the shortest CSS unicode-range of the code points, as a string."""
+    ranges = []
+    for code in sorted(codePoints):
+        if ranges and ranges[-1][1] == code - 1:
+            ranges[-1][1] = code
+        else:
+            ranges.append([code, code])
+    return ",".join(
+        "U+%04X" % first if first == last else "U+%04X-%04X" % (first, last)
+        for first, last in ranges
+    )
+
+
+def sliceCodePoints(codePoints, slices=WEB_SLICES):
+    """Answer the list of (sliceName, codePoints) of the slices that have code points
+    of the font. A code point goes into the first slice that has it, a slice with
+    range None gets the code points of no other slice."""
+    remaining = set(codePoints)
+    result = []
+    for name, value in slices:
+        if value is None:
+            sliceCodes = set(remaining)
+        else:
+            sliceCodes = remaining & parseUnicodeRange(value)
+        remaining -= sliceCodes
+        if sliceCodes:
+            result.append((name, sliceCodes))
+    return result
+
+
+def _woff2Data(ttFont):
+    ttFont.flavor = "woff2"
+    f = io.BytesIO()
+    ttFont.save(f)
+    return f.getvalue()
+
+
+def emptyNullLookups(ttFont):
+    """Replace the lookups with a null offset, as in GSUB of Grid Double, by empty
+    lookups. They do nothing either way, but the subsetter fails on the None."""
+    for tag in ("GSUB", "GPOS"):
+        if tag not in ttFont or ttFont[tag].table.LookupList is None:
+            continue
+        lookups = ttFont[tag].table.LookupList.Lookup
+        for index, lookup in enumerate(lookups):
+            if lookup is None:
+                lookup = otTables.Lookup()
+                lookup.LookupType = 1
+                lookup.LookupFlag = 0
+                lookup.SubTable = []
+                lookup.SubTableCount = 0
+                lookups[index] = lookup
+
+
+def subsetOptions():
+    """Answer the subset.Options of the slices. Everything of the glyphs that stay
+    is kept: all features, names, hinting and the variation and color tables."""
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = ["*"]
+    options.name_IDs = ["*"]
+    options.name_languages = ["*"]
+    options.notdef_outline = True
+    options.glyph_names = False
+    return options
+
+
+def cssFontStyle(ttFont):
+    """Answer the CSS font-style range of the slnt axis of the font, "normal" if it
+    has none. The negative slnt of Bitcount is an oblique to the right."""
+    for axis in ttFont["fvar"].axes if "fvar" in ttFont else ():
+        if axis.axisTag == "slnt" and axis.minValue != axis.maxValue:
+            return "oblique %gdeg %gdeg" % (0 - axis.maxValue, 0 - axis.minValue)
+    return "normal"
+
+
+def cssFontWeight(ttFont):
+    """Answer the CSS font-weight range of the wght axis of the font."""
+    for axis in ttFont["fvar"].axes if "fvar" in ttFont else ():
+        if axis.axisTag == "wght":
+            return "%g %g" % (axis.minValue, axis.maxValue)
+    return "%d" % ttFont["OS/2"].usWeightClass
+
+
+def _writeHashed(dirPath, stem, data):
+    fileName = "%s.%s.woff2" % (stem, hashlib.sha256(data).hexdigest()[:HASH_LENGTH])
+    with open(os.path.join(dirPath, fileName), "wb") as f:
+        f.write(data)
+    return dict(file=fileName, size=len(data))
+
+
+def makeWebFont(path, dirPath):
+    """Write the WOFF2 file and slices of the font at path into dirPath.
+    Answer the dictionary of the font as it is stored in webfonts.json."""
+    ttFont = TTFont(path)
+    color = "COLR" in ttFont
+    family = ttFont["name"].getBestFamilyName() + (" Color" if color else "")
+    stem = os.path.basename(path).split("[")[0] + ("-Color" if color else "")
+    codePoints = set(ttFont.getBestCmap())
+    result = dict(
+        font=os.path.basename(path),
+        family=family,
+        style=cssFontStyle(ttFont),
+        weight=cssFontWeight(ttFont),
+        ttfSize=os.path.getsize(path),
+        woff2=_writeHashed(dirPath, stem, _woff2Data(ttFont)),
+        slices=[],
+    )
+    options = subsetOptions()
+    for sliceName, sliceCodes in sliceCodePoints(codePoints):
+        # The subsetter changes the font in place, each slice starts from the file.
+        sliceFont = TTFont(path)
+        emptyNullLookups(sliceFont)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=sliceCodes)
+        subsetter.subset(sliceFont)
+        item = _writeHashed(dirPath, "%s-%s" % (stem, sliceName), _woff2Data(sliceFont))
+        item.update(slice=sliceName, unicodeRange=unicodeRange(sliceCodes))
+        result["slices"].append(item)
+    return result
+
+
+def makeWebFonts(paths, dirPath):
+    """Make the web fonts of the fonts at paths in the empty directory dirPath and
+    write their webfonts.json. Answer the list of font dictionaries."""
+    if os.path.exists(dirPath):
+        shutil.rmtree(dirPath)  # No files with the hash of an older build
+    os.makedirs(dirPath)
+    fonts = [makeWebFont(path, dirPath) for path in paths]
+    with open(os.path.join(dirPath, WEBFONTS_JSON), "w") as f:
+        json.dump(fonts, f, indent=2)
+    return fonts
+
+
+def readWebFonts(webPath=WEB_PATH):
+    """Answer the list of (dirName, font dictionary) of all webfonts.json in webPath."""
+    result = []
+    for jsonPath in sorted(glob.glob(os.path.join(webPath, "*", WEBFONTS_JSON))):
+        dirName = os.path.basename(os.path.dirname(jsonPath))
+        with open(jsonPath) as f:
+            result += [(dirName, font) for font in json.load(f)]
+    return result
+
+
+def writeCSS(webFonts, cssPath):
+    """Write the @font-face rules of the slices of the webFonts, as answered by
+    readWebFonts, into the CSS file at cssPath, with urls relative to it."""
+    lines = ["/* Generated by scripts/build.py, see scriptsLib/web.py */"]
+    for dirName, font in webFonts:
+        for item in font["slices"]:
+            lines += [
+                "",
+                "/* %s, %s */" % (font["font"], item["slice"]),
+                "@font-face {",
+                '  font-family: "%s";' % font["family"],
+                "  font-style: %s;" % font["style"],
+                "  font-weight: %s;" % font["weight"],
+                "  font-display: swap;",
+                '  src: url("%s/%s") format("woff2");' % (dirName, item["file"]),
+                "  unicode-range: %s;" % item["unicodeRange"],
+                "}",
+            ]
+    os.makedirs(os.path.dirname(cssPath) or ".", exist_ok=True)
+    with open(cssPath, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def transferReport(webFonts):
+    """Answer the lines of a table with the transfer size of every font as TTF,
+    as WOFF2 and as its slices, and the totals."""
+    sliceNames = [name for name, _ in WEB_SLICES]
+    lines = [
+        "%-28s %9s %9s  %s"
+        % ("Font", "TTF", "WOFF2", "  ".join("%9s" % name for name in sliceNames))
+    ]
+    totals = dict(ttf=0, woff2=0)
+    for _, font in webFonts:
+        sizes = {item["slice"]: item["size"] for item in font["slices"]}
+        totals["ttf"] += font["ttfSize"]
+        totals["woff2"] += font["woff2"]["size"]
+        for name in sliceNames:
+            totals[name] = totals.get(name, 0) + sizes.get(name, 0)
+        lines.append(
+            "%-28s %7.1fKB %7.1fKB  %s"
+            % (
+                font["woff2"]["file"].rsplit(".", 2)[0],
+                font["ttfSize"] / KB,
+                font["woff2"]["size"] / KB,
+                "  ".join(
+                    "%7.1fKB" % (sizes[name] / KB) if name in sizes else "%9s" % "-"
+                    for name in sliceNames
+                ),
+            )
+        )
+    if webFonts:
+        lines.append(
+            "%-28s %7.1fKB %7.1fKB  %s"
+            % (
+                "Total",
+                totals["ttf"] / KB,
+                totals["woff2"] / KB,
+                "  ".join("%7.1fKB" % (totals[name] / KB) for name in sliceNames),
+            )
+        )
+    return lines